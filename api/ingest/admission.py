@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger("rt.api.ingest")
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted. Carries the HTTP status to answer with."""
+
+    def __init__(self, status_code: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounds the load the ingest API accepts.
+
+    - At most max_in_flight requests are handled at the same time.
+    - At most max_waiting requests wait for a free slot; beyond that requests get 429.
+    - A request that waits longer than wait_timeout for a slot gets 503.
+    - While the sink's write-behind queue holds max_queue_depth units or more
+      (the database is not keeping up), new requests get 503.
+
+    Refused requests carry a Retry-After header so clients back off instead of
+    timing out and silently dropping data.
+    """
+
+    def __init__(self, max_in_flight=64, max_waiting=256, wait_timeout=2.0, max_queue_depth=9000, retry_after=1):
+        self.max_in_flight = int(max_in_flight)
+        self.max_waiting = int(max_waiting)
+        self.wait_timeout = float(wait_timeout)
+        self.max_queue_depth = int(max_queue_depth)
+        self.retry_after = int(retry_after)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = None
+
+    async def acquire(self, event_sink):
+        queue_depth = getattr(event_sink, "queue_depth", lambda: 0)()
+        if queue_depth >= self.max_queue_depth:
+            raise Overloaded(503, f"Ingest queue is full ({queue_depth} pending writes)")
+
+        if self._slots is None:
+            # Created lazily so it binds to the running event loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        if self._slots.locked():
+            if self.waiting >= self.max_waiting:
+                raise Overloaded(429, "Too many requests")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise Overloaded(503, "Timed out waiting for a free slot")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that runs every POST through the AdmissionController."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        event_sink = scope["app"].state.event_sink
+        try:
+            await self.controller.acquire(event_sink)
+        except Overloaded as e:
+            self.controller.rejected += 1
+            logger.warning("[ADMISSION] Refusing %s with %d: %s", scope["path"], e.status_code, e.reason)
+            await self._refuse(send, e)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _refuse(self, send, error: Overloaded):
+        body = json.dumps({"error": error.reason}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": error.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(self.controller.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -3,7 +3,10 @@ from shared.helpers.config_loader import load_config
 from shared.helpers.logger import setup_root_logging
 from api.ingest.sinks import BaseIngestSink, AsyncSqliteSink, AsyncPostgresSink
 from api.ingest.routes import router as ingest_routes
+from api.ingest.admission import AdmissionController, AdmissionMiddleware
+from shared.helpers.metric_rollups import compact_metrics_periodically
 from contextlib import asynccontextmanager
+import asyncio
 
 # Load configuration and setup root logging
 config = load_config()
@@ -13,13 +16,23 @@ setup_root_logging(config.get("log_level", "info"))
 database_url = config.get("database_url", "sqlite:///eventlog.db")
 
 if database_url.startswith("sqlite:///"):
-    event_sink = AsyncSqliteSink(database_url=database_url)
+    event_sink = AsyncSqliteSink(
+        database_url=database_url,
+        flush_size=int(config.get("ingest_flush_size", 500)),
+        flush_interval=float(config.get("ingest_flush_interval_ms", 200)) / 1000,
+        max_queue_size=int(config.get("ingest_max_queue_size", 10000)),
+    )
 elif database_url.startswith(("postgresql://", "postgres://")):
-    event_sink = AsyncPostgresSink(database_url=database_url)
+    event_sink = AsyncPostgresSink(
+        database_url=database_url,
+        flush_size=int(config.get("ingest_flush_size", 500)),
+        flush_interval=float(config.get("ingest_flush_interval_ms", 200)) / 1000,
+        max_queue_size=int(config.get("ingest_max_queue_size", 10000)),
+    )
 else:
     raise ValueError("Unsupported database_url: must start with sqlite:/// or postgres://")
 
-# Lifespan context used to initialize the database on app startup
+# Lifespan context used to initialize the database on app startup and flush it on shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     if isinstance(event_sink, BaseIngestSink):
@@ -29,7 +42,26 @@ async def lifespan(app: FastAPI):
             print(f"[FATAL] Could not initialize database: {e}")
             import sys
             sys.exit(1)
+    # Fold old metric samples into the rollup tables in the background; off unless an interval is configured
+    compaction = None
+    compaction_interval = float(config.get("metrics_compaction_interval", 0))
+    if compaction_interval > 0:
+        compaction = asyncio.create_task(compact_metrics_periodically(
+            database_url,
+            compaction_interval,
+            raw_retention_hours=float(config.get("metrics_raw_retention_hours", 24)),
+            minute_retention_days=float(config.get("metrics_minute_retention_days", 7)),
+        ))
     yield
+    if compaction is not None:
+        compaction.cancel()
+        try:
+            await compaction
+        except asyncio.CancelledError:
+            pass
+    # Write whatever is still buffered before the process exits
+    if isinstance(event_sink, BaseIngestSink):
+        await event_sink.close()
 
 def create_app() -> FastAPI:
     """
@@ -48,5 +80,16 @@ def create_app() -> FastAPI:
     """
     app = FastAPI(lifespan=lifespan)
     app.include_router(ingest_routes)
+
+    # Refuse work with 429/503 + Retry-After instead of letting requests pile up
+    max_queue_size = int(config.get("ingest_max_queue_size", 10000))
+    app.state.admission = AdmissionController(
+        max_in_flight=int(config.get("ingest_max_in_flight", 64)),
+        max_waiting=int(config.get("ingest_max_waiting", 256)),
+        wait_timeout=float(config.get("ingest_admission_timeout", 2.0)),
+        max_queue_depth=int(config.get("ingest_max_queue_depth", int(max_queue_size * 0.9))),
+        retry_after=int(config.get("ingest_retry_after", 1)),
+    )
+    app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
     app.state.event_sink = event_sink
     return app
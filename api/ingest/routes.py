@@ -2,9 +2,16 @@ from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 import logging
 
+from shared.helpers import json_codec
+
 router = APIRouter()
 logger = logging.getLogger("rt.api.ingest")
 
+# Maximum number of per-line errors returned by /stream
+MAX_REPORTED_ERRORS = 100
+# Longer /stream lines are rejected without being buffered
+MAX_STREAM_LINE_BYTES = 1024 * 1024
+
 # Dispatch maps per endpoint
 def get_dispatch_maps(event_sink):
     return {
@@ -44,6 +51,129 @@ async def receive_test_event(request: Request):
 async def receive_test_log_message(request: Request):
     return await handle_event_request(request, "event/log_message")
 
+@router.post("/batch")
+async def receive_batch(request: Request):
+    """
+    Accepts many events of any type in one request, as a JSON array or as
+    newline-delimited JSON (NDJSON). All events are stored in one transaction.
+    Unknown event types fall back to the /log handler, like HttpSink does.
+    """
+    event_sink = request.app.state.event_sink
+    dispatch_map = get_dispatch_maps(event_sink)
+    _, fallback_handler = dispatch_map["log"]
+
+    try:
+        events = parse_batch_body(await request.body())
+    except ValueError:
+        return JSONResponse(content={"error": "Invalid JSON"}, status_code=400)
+
+    accepted = []
+    errors = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict) or not event.get("event_type"):
+            errors.append({"index": index, "error": "Missing event_type"})
+            continue
+        handler = get_handler_by_event_type(event["event_type"], event_sink) or fallback_handler
+        accepted.append((handler, event))
+
+    logger.info(f"[BATCH] Received {len(events)} events ({len(errors)} rejected)")
+
+    try:
+        async with event_sink.transaction():
+            for handler, event in accepted:
+                await handler(event)
+    except Exception:
+        logger.error(f"[BATCH] Error handling batch of {len(accepted)} events.", exc_info=True)
+        return JSONResponse(content={"error": "Internal server error"}, status_code=500)
+
+    return {"received": len(accepted), "rejected": len(errors), "errors": errors}
+
+@router.post("/stream")
+async def receive_stream(request: Request):
+    """
+    Accepts a chunked upload of newline-delimited JSON events. Each line is
+    validated and handed to its handler as soon as it has arrived, so the body
+    is never buffered as a whole. Unknown event types fall back to the /log handler,
+    like /batch. Reports how many events were accepted and rejected.
+    """
+    event_sink = request.app.state.event_sink
+    _, fallback_handler = get_dispatch_maps(event_sink)["log"]
+
+    counts = {"accepted": 0, "rejected": 0}
+    errors = []
+    line_number = 0
+
+    def record(error):
+        nonlocal line_number
+        line_number += 1
+        if error:
+            counts["rejected"] += 1
+            # Keep the response small for large uploads; the count stays exact
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": error})
+        else:
+            counts["accepted"] += 1
+
+    async def process(line: bytes):
+        if line.strip():
+            record(await dispatch_stream_line(line, fallback_handler, event_sink))
+
+    too_long = f"Line exceeds {MAX_STREAM_LINE_BYTES} bytes"
+    # Pieces of the current line; only the new chunk is searched for the line end
+    pieces, size = [], 0
+    skipping = False  # the current line was too long and is discarded up to its end
+    async for chunk in request.stream():
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            piece = chunk[start:end]
+            if not skipping:
+                if size + len(piece) > MAX_STREAM_LINE_BYTES:
+                    record(too_long)
+                else:
+                    await process(b"".join(pieces) + piece)
+            pieces, size, skipping = [], 0, False
+            start = end + 1
+        rest = chunk[start:]
+        if rest and not skipping:
+            size += len(rest)
+            if size > MAX_STREAM_LINE_BYTES:
+                record(too_long)
+                pieces, size, skipping = [], 0, True
+            else:
+                pieces.append(rest)
+    if not skipping:
+        await process(b"".join(pieces))
+
+    logger.info(f"[STREAM] Accepted {counts['accepted']} events, rejected {counts['rejected']}")
+    return {**counts, "errors": errors}
+
+async def dispatch_stream_line(line: bytes, fallback_handler, event_sink):
+    """Parse, validate and dispatch one NDJSON line. Returns an error message, or None on success."""
+    try:
+        event = json_codec.loads(line)
+    except ValueError:
+        return "Invalid JSON"
+    if not isinstance(event, dict) or not event.get("event_type"):
+        return "Missing event_type"
+
+    event_type = event["event_type"]
+    handler = get_handler_by_event_type(event_type, event_sink) or fallback_handler
+    try:
+        await handler(event)
+    except Exception:
+        logger.error(f"[STREAM] Error handling event {event_type}.", exc_info=True)
+        return "Internal server error"
+    return None
+
+def parse_batch_body(body: bytes) -> list:
+    """Parse a JSON array or NDJSON body into a list of events. Raises ValueError on invalid JSON."""
+    body = body.strip()
+    if not body:
+        return []
+    if body.startswith(b"["):
+        return json_codec.loads(body)
+    return [json_codec.loads(line) for line in body.splitlines() if line.strip()]
+
 
 async def handle_event_request(request: Request, endpoint_name: str, allow_fallback: bool = False):
     event_sink = request.app.state.event_sink
@@ -51,7 +181,7 @@ async def handle_event_request(request: Request, endpoint_name: str, allow_fallb
     allowed_types, fallback_handler = dispatch_map.get(endpoint_name, (set(), None))
 
     try:
-        event = await request.json()
+        event = json_codec.loads(await request.body())
         logger.info(f"[{endpoint_name.upper()}] Received event: {event}")
     except Exception:
         return JSONResponse(content={"error": "Invalid JSON"}, status_code=400)
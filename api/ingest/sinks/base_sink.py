@@ -1,8 +1,14 @@
 ## realtimeresults/sinks/base.py
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import asyncio
 import json
 import logging
 
+# Queued by flush(): the writer writes what it has collected so far right away
+_FLUSH = object()
+
 class BaseIngestSink(ABC):
     """
     Base class for asynchronous event sinks.
@@ -15,10 +21,33 @@ class BaseIngestSink(ABC):
 
     Example signature:
         async def _handle_app_log(self, data: dict) -> None
+
+    Write-behind:
+        Sinks may instead hand rows to _enqueue(table, values). A single writer task
+        (started with _start_writer()) drains the queue and passes the buffered rows
+        to _write_rows() once flush_size rows are waiting or flush_interval seconds
+        have passed. Rows enqueued inside one transaction() are always written in
+        the same flush. A flush that fails (e.g. the database is locked) is retried
+        up to flush_retries times with a growing delay before its rows are dropped;
+        meanwhile the queue fills up and the ingest API refuses new work.
+
+    Runs:
+        Listener events carry a run_id. App logs and metrics are stored with the
+        run_id their producer sent, or none: several runs may ingest at the same
+        time, so the sink does not guess which one a row belongs to.
     """
 
-    def __init__(self):
+    def __init__(self, flush_size=500, flush_interval=0.2, max_queue_size=10000, flush_retries=5, flush_retry_delay=0.5):
         self.logger = logging.getLogger("rt.sink")
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = float(flush_interval)
+        self.max_queue_size = int(max_queue_size)
+        self.flush_retries = max(0, int(flush_retries))
+        self.flush_retry_delay = float(flush_retry_delay)
+        self._queue = None
+        self._writer_task = None
+        # Rows collected by the transaction() that is active in the current task, if any
+        self._transaction_rows = ContextVar("transaction_rows", default=None)
 
     @abstractmethod
     async def initialize_database(self):
@@ -44,6 +73,121 @@ class BaseIngestSink(ABC):
     async def handle_rf_log(self, data):
         """Must be implemented by async sinks."""
         pass
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Group the handler calls made inside this context into one database transaction.
+        Used by the batch ingest endpoint.
+
+        For write-behind sinks the rows are held back and enqueued as one unit when the
+        context exits, so they are written in a single flush. If the block raises,
+        nothing is enqueued.
+        """
+        rows = []
+        token = self._transaction_rows.set(rows)
+        try:
+            yield
+        finally:
+            self._transaction_rows.reset(token)
+        if rows:
+            await self._put(rows)
+
+    async def _enqueue(self, table, values):
+        """Buffer one row for the writer task."""
+        rows = self._transaction_rows.get()
+        if rows is not None:
+            rows.append((table, values))
+        else:
+            await self._put([(table, values)])
+
+    async def _put(self, unit):
+        self._start_writer()
+        # Waits when the queue is full, which slows producers down instead of growing memory
+        await self._queue.put(unit)
+
+    def _start_writer(self):
+        if self._writer_task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    def queue_depth(self) -> int:
+        """Number of units waiting for the writer task."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            unit = await self._queue.get()
+            if unit is None:
+                self._queue.task_done()
+                break
+            if unit is _FLUSH:
+                self._queue.task_done()
+                continue
+
+            units = [unit]
+            markers = 0
+            row_count = len(unit)
+            deadline = loop.time() + self.flush_interval
+            while row_count < self.flush_size:
+                try:
+                    unit = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if unit is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                if unit is _FLUSH:
+                    markers += 1
+                    break
+                units.append(unit)
+                row_count += len(unit)
+
+            await self._flush_units(units, row_count)
+            for _ in range(len(units) + markers):
+                self._queue.task_done()
+
+    async def _flush_units(self, units, row_count):
+        rows_by_table = {}
+        for unit in units:
+            for table, values in unit:
+                rows_by_table.setdefault(table, []).append(values)
+        delay = self.flush_retry_delay
+        for attempt in range(self.flush_retries + 1):
+            try:
+                await self._write_rows(rows_by_table)
+                self.logger.debug("[%s] Flushed %d rows", self.__class__.__name__, row_count)
+                return
+            except Exception as e:
+                if attempt == self.flush_retries:
+                    self.logger.error("[%s] Dropping %d buffered rows after %d attempts: %s",
+                                      self.__class__.__name__, row_count, attempt + 1, e)
+                    return
+                self.logger.warning("[%s] Failed to write %d buffered rows, retrying in %.1fs: %s",
+                                    self.__class__.__name__, row_count, delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    async def _write_rows(self, rows_by_table):
+        """Write {table: [values, ...]} in one transaction. Implemented by write-behind sinks."""
+        raise NotImplementedError
+
+    async def flush(self):
+        """Write every enqueued row now and wait until that is done."""
+        if self._queue is not None:
+            await self._queue.put(_FLUSH)
+            await self._queue.join()
+
+    async def close(self):
+        """Write what is still buffered and stop the writer task."""
+        if self._writer_task is not None:
+            await self._queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+            self._queue = None
     
     @staticmethod
     def make_sql_safe(value):
@@ -1,6 +1,7 @@
 import asyncpg
 from .base_sink import BaseIngestSink
 import shared.helpers.sql_definitions as sql_definitions
+from shared.helpers.run_counters import counter_deltas
 from shared.helpers.ensure_db_schema import async_ensure_schema
 from shared.helpers.config_loader import load_config
 
@@ -9,15 +10,28 @@ class AsyncPostgresSink(BaseIngestSink):
     Asynchronous PostgreSQL sink for application logs, metrics, and Robot Framework events.
     All dispatching is expected to be done by the ingest API.
     Each handler function corresponds to a single use case.
+
+    Handlers buffer rows per table; the writer task flushes them by size or time
+    with COPY (copy_records_to_table) in one transaction per flush. If a flush is
+    rejected, its rows are retried one by one so a single bad row does not take
+    the rest of the batch with it. run_counters is updated in the same transaction.
     """
 
-    def __init__(self, database_url=None):
-        super().__init__()
+    def __init__(self, database_url=None, flush_size=500, flush_interval=0.2, max_queue_size=10000):
+        super().__init__(flush_size=flush_size, flush_interval=flush_interval, max_queue_size=max_queue_size)
         config = load_config()
         self.database_url = database_url or config.get("database_url")
         self.logger.debug("Async sink writing to PostgreSQL: %s", self.database_url)
         self.pool = None
 
+        # table -> (columns for COPY, INSERT statement for the row-by-row fallback)
+        self.tables = {
+            "app_logs": ([col for col, _ in sql_definitions.app_log_columns], sql_definitions.INSERT_APP_LOG),
+            "metrics": ([col for col, _ in sql_definitions.metric_columns], sql_definitions.INSERT_METRIC),
+            "events": ([col for col, _ in sql_definitions.event_columns], sql_definitions.INSERT_EVENT),
+            "rf_log_messages": ([col for col, _ in sql_definitions.rf_log_columns], sql_definitions.INSERT_RF_LOG_MESSAGE),
+        }
+
     # call from ingest main.py to initialize the database schema
     async def initialize_database(self):
         try:
@@ -26,54 +40,82 @@ class AsyncPostgresSink(BaseIngestSink):
             self.pool = await asyncpg.create_pool(
                 self.database_url,
                 min_size=2,      # Minimum connections
-                max_size=10,     # Maximum connections  
+                max_size=10,     # Maximum connections
                 command_timeout=60
             )
             self.logger.info("PostgreSQL connection pool initialized")
         except Exception as e:
             self.logger.warning("[POSTGRES_ASYNC] Failed to initialize DB: %s", e)
             raise
-    
-    async def _execute_query(self, query: str, values: list, operation: str):
-        """Helper method to execute queries using connection pool."""
+        self._start_writer()
+
+    async def _write_rows(self, rows_by_table):
+        """Bulk-load buffered rows with COPY, one transaction for the whole flush."""
         if not self.pool:
             raise RuntimeError("Database pool not initialized")
-            
+
         try:
             async with self.pool.acquire() as conn:
                 async with conn.transaction():
-                    await conn.execute(query, *values)
-            self.logger.debug("[POSTGRES_ASYNC] %s completed successfully", operation)
+                    for table, rows in rows_by_table.items():
+                        columns, _ = self.tables[table]
+                        await conn.copy_records_to_table(table, records=rows, columns=columns)
+                    await self._update_run_counters(conn, rows_by_table.get("events", []))
         except Exception as e:
-            self.logger.warning("[POSTGRES_ASYNC] Failed to %s: %s", operation.lower(), e)
-            raise
-    
+            self.logger.warning("[POSTGRES_ASYNC] Bulk insert failed (%s), retrying rows one by one", e)
+            await self._write_rows_one_by_one(rows_by_table)
+
+    async def _write_rows_one_by_one(self, rows_by_table):
+        inserted_events = []
+        async with self.pool.acquire() as conn:
+            for table, rows in rows_by_table.items():
+                _, insert_statement = self.tables[table]
+                for values in rows:
+                    try:
+                        await conn.execute(insert_statement, *values)
+                    except Exception as e:
+                        self.logger.warning("[POSTGRES_ASYNC] Failed to insert into %s: %s", table, e)
+                    else:
+                        if table == "events":
+                            inserted_events.append(values)
+            # Counters only reflect the events that made it in
+            try:
+                await self._update_run_counters(conn, inserted_events)
+            except Exception as e:
+                self.logger.warning("[POSTGRES_ASYNC] Failed to update run counters: %s", e)
+
+    async def _update_run_counters(self, conn, event_rows):
+        deltas = counter_deltas(event_rows)
+        if deltas:
+            await conn.executemany(sql_definitions.UPSERT_RUN_COUNTERS, deltas)
+
     async def handle_app_log(self, data):
         """Insert app-level log data into 'app_logs' table."""
         self.logger.debug("[POSTGRES_ASYNC] Inserting app_log: %s", data)
         values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.app_log_columns]
-        await self._execute_query(sql_definitions.INSERT_APP_LOG, values, "insert app log")
-    
+        await self._enqueue("app_logs", values)
+
     async def handle_metric(self, data):
         """Insert metric data into 'metrics' table."""
         self.logger.debug("[POSTGRES_ASYNC] Inserting metric: %s", data)
         values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.metric_columns]
-        await self._execute_query(sql_definitions.INSERT_METRIC, values, "insert metric")
-    
+        await self._enqueue("metrics", values)
+
     async def handle_rf_events(self, data):
         """Insert Robot Framework event into 'rf_events' table."""
         self.logger.debug("[POSTGRES_ASYNC] Inserting RF event: %s", data)
         values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.event_columns]
-        await self._execute_query(sql_definitions.INSERT_EVENT, values, "insert RF event")
-    
+        await self._enqueue("events", values)
+
     async def handle_rf_log(self, data):
         """Insert Robot Framework log message into 'rf_log_messages' table."""
         self.logger.debug("[POSTGRES_ASYNC] Inserting RF log message: %s", data)
         values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.rf_log_columns]
-        await self._execute_query(sql_definitions.INSERT_RF_LOG_MESSAGE, values, "insert RF log message")
-    
+        await self._enqueue("rf_log_messages", values)
+
     async def close(self):
-        """Clean shutdown of connection pool."""
+        """Flush buffered rows, then shut down the connection pool."""
+        await super().close()
         if self.pool:
             await self.pool.close()
-            self.logger.info("PostgreSQL connection pool closed")
\ No newline at end of file
+            self.logger.info("PostgreSQL connection pool closed")
@@ -2,6 +2,7 @@ import aiosqlite
 from .base_sink import BaseIngestSink
 from shared.helpers.ensure_db_schema import async_ensure_schema
 import shared.helpers.sql_definitions as sql_definitions
+from shared.helpers.run_counters import counter_deltas
 
 
 class AsyncSqliteSink(BaseIngestSink):
@@ -11,10 +12,18 @@ class AsyncSqliteSink(BaseIngestSink):
     Each public handler method corresponds to a distinct event category
     and is called explicitly by the ingest API based on the event_type.
     For Robot Framework listener to DB directly, use SqliteSink instead.
+
+    Handlers do not touch the database themselves: they enqueue rows for a single
+    writer task that owns one connection and inserts each table's rows with
+    executemany, committing once per flush together with the run_counters update.
+    Concurrent requests therefore never contend for SQLite's write lock.
     """
 
-    def __init__(self, database_url="sqlite:///eventlog.db"):
-        super().__init__()
+    def __init__(self, database_url="sqlite:///eventlog.db", flush_size=500, flush_interval=0.2, max_queue_size=10000,
+                 busy_timeout=30.0):
+        super().__init__(flush_size=flush_size, flush_interval=flush_interval, max_queue_size=max_queue_size)
+        # Seconds a flush waits for the write lock held by another process (e.g. metric compaction)
+        self.busy_timeout = float(busy_timeout)
 
         # Strip 'sqlite:///' prefix if present
         if database_url.startswith("sqlite:///"):
@@ -22,59 +31,75 @@ class AsyncSqliteSink(BaseIngestSink):
         else:
             self.database_path = database_url
 
+        self.insert_statements = {
+            "app_logs": sql_definitions.INSERT_APP_LOG,
+            "metrics": sql_definitions.INSERT_METRIC,
+            "events": sql_definitions.INSERT_EVENT,
+            "rf_log_messages": sql_definitions.INSERT_RF_LOG_MESSAGE,
+        }
+        self.db = None
+
         self.logger.debug(f"[SQLITE_ASYNC] Sink writing to: {self.database_path}")
 
     # call from ingest main.py to initialize the database schema
     async def initialize_database(self):
-        """Initialize schema if not yet created."""
+        """Initialize schema if not yet created and start the writer task."""
         try:
             await async_ensure_schema(self.database_path)
         except Exception as e:
             self.logger.warning("[SQLITE_ASYNC] Failed to initialize DB: %s", e)
             raise
-    
+        self._start_writer()
+
+    async def _get_connection(self):
+        if self.db is None:
+            self.db = await aiosqlite.connect(self.database_path, timeout=self.busy_timeout)
+            await self.db.execute("PRAGMA journal_mode=WAL")
+            await self.db.execute("PRAGMA synchronous=NORMAL")
+        return self.db
+
+    async def _write_rows(self, rows_by_table):
+        db = await self._get_connection()
+        try:
+            for table, rows in rows_by_table.items():
+                await db.executemany(self.insert_statements[table], rows)
+            deltas = counter_deltas(rows_by_table.get("events", []))
+            if deltas:
+                await db.executemany(sql_definitions.UPSERT_RUN_COUNTERS, deltas)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
     async def handle_app_log(self, data):
         """Insert application log event into 'app_logs' table."""
         self.logger.debug("[SQLITE_ASYNC] Inserting app_log: %s", data)
-        try:
-            async with aiosqlite.connect(self.database_path) as db:
-                values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.app_log_columns]
-                await db.execute(sql_definitions.INSERT_APP_LOG, values)
-                await db.commit()
-        except Exception as e:
-            self.logger.warning("[SQLITE_ASYNC] Failed to insert app log: %s", e)
+        values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.app_log_columns]
+        await self._enqueue("app_logs", values)
 
     async def handle_metric(self, data):
         """Insert metric data into 'metrics' table."""
         self.logger.debug("[SQLITE_ASYNC] Inserting metric: %s", data)
-        try:
-            async with aiosqlite.connect(self.database_path) as db:
-                values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.metric_columns]
-                await db.execute(sql_definitions.INSERT_METRIC, values)
-                await db.commit()
-        except Exception as e:
-            self.logger.warning("[SQLITE_ASYNC] Failed to insert metric: %s", e)
+        values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.metric_columns]
+        await self._enqueue("metrics", values)
 
     async def handle_rf_events(self, data):
         """Insert Robot Framework test event into 'rf_events' table."""
         self.logger.debug("[SQLITE_ASYNC] Inserting RF event: %s", data)
-        try:
-            async with aiosqlite.connect(self.database_path) as db:
-                # Convert all list, dict or bool values in `data` to JSON strings 
-                # This is necessary specifically for tags
-                values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.event_columns] # e.g. col = tags, _ = "TEXT"
-                await db.execute(sql_definitions.INSERT_EVENT, values)
-                await db.commit()
-        except Exception as e:
-            self.logger.warning("[SQLITE_ASYNC] Failed to insert RF event: %s", e)
+        # Convert all list, dict or bool values in `data` to JSON strings
+        # This is necessary specifically for tags
+        values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.event_columns] # e.g. col = tags, _ = "TEXT"
+        await self._enqueue("events", values)
 
     async def handle_rf_log(self, data):
         """Insert Robot Framework log_message into 'rf_log_messages' table."""
         self.logger.debug("[SQLITE_ASYNC] Inserting RF log message: %s", data)
-        try:
-            async with aiosqlite.connect(self.database_path) as db:
-                values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.rf_log_columns]
-                await db.execute(sql_definitions.INSERT_RF_LOG_MESSAGE, values)
-                await db.commit()
-        except Exception as e:
-            self.logger.warning("[SQLITE_ASYNC] Failed to insert RF log message: %s", e)
+        values = [self.make_sql_safe(data.get(col)) for col, _ in sql_definitions.rf_log_columns]
+        await self._enqueue("rf_log_messages", values)
+
+    async def close(self):
+        """Write buffered rows and close the writer connection."""
+        await super().close()
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
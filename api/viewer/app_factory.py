@@ -1,9 +1,39 @@
 # api/viewer/app_factory.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from shared.helpers.ensure_db_schema import ensure_schema
 from api.viewer.routes import router as viewer_routes
+from api.viewer.live import LiveFeed
+from api.viewer.compression import CompressionMiddleware
+from api.viewer.readers.async_base_reader import AsyncReader
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Async readers hold a connection pool for the lifetime of the app
+    reader = getattr(app.state, "event_reader", None)
+    if isinstance(reader, AsyncReader):
+        await reader.open()
+    try:
+        yield
+    finally:
+        if isinstance(reader, AsyncReader):
+            await reader.close()
 
 def create_app(config: dict) -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.include_router(viewer_routes)
+    # gzip/brotli for JSON and event streams; a negative minimum size disables compression
+    compression_min_size = int(config.get("viewer_compression_min_size", 1024))
+    if compression_min_size >= 0:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=compression_min_size,
+            gzip_level=int(config.get("viewer_compression_level", 6)),
+        )
+    # Shared poller behind GET /live; it reads from app.state.event_reader once clients connect
+    app.state.live_feed = LiveFeed(
+        poll_interval=float(config.get("viewer_live_poll_interval_ms", 500)) / 1000,
+        backlog=int(config.get("viewer_live_backlog", 500)),
+    )
+    app.state.live_heartbeat = float(config.get("viewer_live_heartbeat", 15))
     return app
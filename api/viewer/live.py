@@ -0,0 +1,240 @@
+# api/viewer/live.py
+# Server-Sent Events support for the viewer API.
+#
+# One LiveFeed per app polls the reader incrementally (since_id cursors) and fans
+# new rows out to every connected client, so the database is queried once per
+# poll interval no matter how many dashboards are open.
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from api.viewer.readers.async_base_reader import call_reader
+from shared.helpers import json_codec
+
+logger = logging.getLogger("rt.api.viewer")
+
+SUMMARY_STATUSES = ("PASS", "FAIL", "SKIP")
+
+
+def parse_last_event_id(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Parse a Last-Event-ID of the form '<event_id>-<applog_id>'.
+    Returns (None, None) when missing or malformed, meaning 'send everything'.
+    """
+    if not value:
+        return None, None
+    try:
+        event_id, applog_id = value.split("-", 1)
+        return int(event_id), int(applog_id)
+    except ValueError:
+        return None, None
+
+
+def format_event_id(event_id: Optional[int], applog_id: Optional[int]) -> str:
+    return f"{event_id or 0}-{applog_id or 0}"
+
+
+def summarize(events: List[Dict]) -> Dict[str, int]:
+    """Count finished tests per status; used as a summary delta for a batch of new events."""
+    counts = {status: 0 for status in SUMMARY_STATUSES}
+    for event in events:
+        if event.get("event_type") == "end_test":
+            status = event.get("status")
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def max_id(rows: List[Dict], current: Optional[int]) -> Optional[int]:
+    for row in rows:
+        if current is None or row["id"] > current:
+            current = row["id"]
+    return current
+
+
+async def newest_ids(reader) -> Tuple[Optional[int], Optional[int]]:
+    """Highest event and app log ids, from the reader's change token (two index probes)."""
+    token = await call_reader(reader.get_change_token)
+    return token[0], token[1]
+
+
+def backlog_start(resume_id: Optional[int], newest_id: Optional[int], backlog: int) -> Optional[int]:
+    """
+    since_id for replaying rows to a client: after resume_id, but never more than
+    backlog ids before newest_id, so a replay reads at most backlog rows.
+    """
+    if newest_id is None:
+        return resume_id
+    floor = max(newest_id - backlog, 0)
+    return floor if resume_id is None else max(resume_id, floor)
+
+
+def format_sse(event: str, data, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json_codec.dumps(data).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+
+class LiveFeed:
+    """
+    Shared poller that broadcasts new events and app logs to SSE subscribers.
+
+    The poll task only runs while at least one client is connected. Each subscriber
+    gets its own bounded queue; a client that stops reading is disconnected rather
+    than allowed to hold memory (it resumes with Last-Event-ID on reconnect).
+
+    The feed starts at the newest rows (see start()) instead of reading the tables
+    from the beginning; clients get at most backlog older rows of each kind.
+    """
+
+    def __init__(self, poll_interval=0.5, subscriber_queue_size=100, backlog=500):
+        self.poll_interval = float(poll_interval)
+        self.subscriber_queue_size = int(subscriber_queue_size)
+        self.backlog = int(backlog)
+        self.subscribers: List[asyncio.Queue] = []
+        self.last_event_id: Optional[int] = None
+        self.last_applog_id: Optional[int] = None
+        self._reader = None
+        self._task: Optional[asyncio.Task] = None
+        self._started = False
+
+    def subscribe(self, reader) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self.subscribers.append(queue)
+        self._reader = reader
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def start(self, reader):
+        """Point the cursors at the newest rows, once; later polls only read what is written after."""
+        if self._started:
+            return
+        event_id, applog_id = await newest_ids(reader)
+        if not self._started:
+            self.last_event_id, self.last_applog_id = event_id, applog_id
+            self._started = True
+
+    def reset(self):
+        """Called after the events table is cleared: ids may start over, so restart the cursor."""
+        self.last_event_id = None
+        self._broadcast({"reset": True})
+
+    async def poll_once(self):
+        """Fetch rows newer than the feed's cursors and broadcast them. Returns True if anything was new."""
+        reader = self._reader
+        await self.start(reader)
+        events = await call_reader(reader.get_events, since_id=self.last_event_id)
+        app_logs = await call_reader(reader.get_app_logs, since_id=self.last_applog_id)
+        if not events and not app_logs:
+            return False
+        self.last_event_id = max_id(events, self.last_event_id)
+        self.last_applog_id = max_id(app_logs, self.last_applog_id)
+        self._broadcast({"events": events, "app_logs": app_logs})
+        return True
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[LIVE] Poll failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    def _broadcast(self, message: Dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Replace the backlog with a close marker; the client reconnects with Last-Event-ID
+                logger.info("[LIVE] Disconnecting slow subscriber")
+                self.subscribers.remove(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"closed": True})
+
+
+class LiveSubscription:
+    """Per-client state: the ids this client has already received."""
+
+    def __init__(self, event_id: Optional[int] = None, applog_id: Optional[int] = None):
+        self.event_id = event_id
+        self.applog_id = applog_id
+
+    @property
+    def sse_id(self) -> str:
+        return format_event_id(self.event_id, self.applog_id)
+
+    def render(self, events: List[Dict], app_logs: List[Dict]) -> List[str]:
+        """Turn a batch into SSE messages, skipping rows this client has already seen."""
+        if self.event_id is not None:
+            events = [e for e in events if e["id"] > self.event_id]
+        if self.applog_id is not None:
+            app_logs = [log for log in app_logs if log["id"] > self.applog_id]
+        if not events and not app_logs:
+            return []
+
+        self.event_id = max_id(events, self.event_id)
+        self.applog_id = max_id(app_logs, self.applog_id)
+        messages = []
+        if events:
+            messages.append(format_sse("events", events, self.sse_id))
+            messages.append(format_sse("summary", summarize(events), self.sse_id))
+        if app_logs:
+            messages.append(format_sse("applog", app_logs, self.sse_id))
+        return messages
+
+    def render_reset(self) -> List[str]:
+        self.event_id = None
+        return [format_sse("reset", {}, self.sse_id)]
+
+
+async def stream_live_updates(request, reader, feed: LiveFeed, last_event_id: Optional[str] = None, heartbeat=15.0):
+    """
+    SSE body for GET /live: first the rows the client has not seen yet (the gap
+    since Last-Event-ID for a reconnecting client, the newest rows for a new one;
+    at most feed.backlog of each), then whatever the shared feed broadcasts. The
+    feed's cursors are set before the backlog query so nothing written in between
+    is missed; duplicates are filtered by id.
+    """
+    subscription = LiveSubscription(*parse_last_event_id(last_event_id))
+    queue = feed.subscribe(reader)
+    try:
+        yield "retry: 2000\n\n"
+        await feed.start(reader)
+        newest_event, newest_applog = await newest_ids(reader)
+        subscription.event_id = backlog_start(subscription.event_id, newest_event, feed.backlog)
+        subscription.applog_id = backlog_start(subscription.applog_id, newest_applog, feed.backlog)
+        events = await call_reader(reader.get_events, since_id=subscription.event_id)
+        app_logs = await call_reader(reader.get_app_logs, since_id=subscription.applog_id)
+        for message in subscription.render(events, app_logs):
+            yield message
+
+        while not await request.is_disconnected():
+            try:
+                update = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if update.get("closed"):
+                break
+            if update.get("reset"):
+                messages = subscription.render_reset()
+            else:
+                messages = subscription.render(update["events"], update["app_logs"])
+            for message in messages:
+                yield message
+    finally:
+        feed.unsubscribe(queue)
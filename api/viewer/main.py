@@ -6,13 +6,13 @@ from shared.helpers.config_loader import load_config
 from shared.helpers.ensure_db_schema import ensure_schema
 from shared.helpers.logger import setup_root_logging
 
-from api.viewer.readers.sqlite_reader import SqliteReader
-from api.viewer.readers.postgres_reader import PostgresReader
+from api.viewer.readers.sqlite_async_reader import AsyncSqliteReader
+from api.viewer.readers.postgres_async_reader import AsyncPostgresReader
 from api.viewer.app_factory import create_app
+from api.viewer.static import DashboardFiles
 
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from datetime import datetime, timezone
 
 from api.viewer.app_factory import create_app
@@ -34,14 +34,29 @@ except Exception as e:
     logger.error("Failed to start viewer API.", exc_info=e)
     sys.exit(1)
 
-app.mount("/dashboard", StaticFiles(directory="dashboard", html=True), name="dashboard")
+# Fingerprinted, precompressed assets with long-lived cache headers; index.html is revalidated
+app.mount("/dashboard", DashboardFiles(directory="dashboard", prefix="/dashboard"), name="dashboard")
 
 database_url = config.get("database_url", "sqlite:///eventlog.db")
 
+# Async readers with a connection pool; opened and closed by the app lifespan
 if database_url.startswith("sqlite:///"):
-    event_reader = SqliteReader(database_url=database_url)
+    event_reader = AsyncSqliteReader(
+        database_url=database_url,
+        pool_size=int(config.get("viewer_db_pool_size", 4)),
+        cache_size=int(config.get("viewer_cache_size", 256)),
+    )
 elif database_url.startswith(("postgresql://", "postgres://")):
-    event_reader = PostgresReader(database_url=database_url)
+    event_reader = AsyncPostgresReader(
+        database_url=database_url,
+        pool_size=int(config.get("viewer_db_pool_size", 10)),
+        min_pool_size=int(config.get("viewer_db_pool_min_size", 1)),
+        max_idle=float(config.get("viewer_db_pool_max_idle", 300)),
+        pool_timeout=float(config.get("viewer_db_pool_timeout", 10)),
+        max_lifetime=float(config.get("viewer_db_pool_max_lifetime", 1800)),
+        health_check_interval=float(config.get("viewer_db_pool_health_check_interval", 30)),
+        cache_size=int(config.get("viewer_cache_size", 256)),
+    )
 else:
     raise ValueError("Unsupported databasetype")
 
@@ -0,0 +1,182 @@
+# api/viewer/readers/async_base_reader.py
+
+import inspect
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from .base_reader import Rows, build_metric_series, build_runs, build_summary, metric_buckets
+from .cache import ResponseCache
+from . import queries
+
+
+async def call_reader(method, *args, **kwargs):
+    """
+    Call a reader method from async code: coroutine methods of an AsyncReader are
+    awaited, methods of a blocking Reader run in the threadpool.
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
+
+
+class AsyncReader(ABC):
+    """
+    Base class for readers on an async driver, so the viewer routes do not need
+    a worker thread per request. Same methods and return values as Reader, but
+    coroutines.
+
+    All queries come from queries.py; a subclass provides a connection pool
+    (open/close), _fetch_rows and _clear_events. open() is called from
+    the app lifespan; the first query opens the pool when that did not happen.
+    Results are cached per change token like in Reader.
+    """
+
+    # Placeholder style of the database driver, used by the query builders
+    param = "?"
+    # SQL dialect for the queries that differ per database (full-text search, metric buckets)
+    dialect = "sqlite"
+
+    def __init__(self, database_url=None, pool_size=4, cache_size=256):
+        self.logger = logging.getLogger(self.__class__.__module__)
+        self.pool_size = pool_size
+        self.cache = ResponseCache(cache_size)
+
+    async def get_change_token(self):
+        """Cheap token that changes whenever the rows the viewer reads change."""
+        row = (await self._fetch_all_as_dicts(queries.SELECT_CHANGE_TOKEN))[0]
+        return row["events"], row["app_logs"], row["rf_logs"], row["metrics"], row["metric_compactions"]
+
+    async def _cached(self, key, fetch):
+        """Result of await fetch(), reused for as long as the change token stays the same."""
+        if not self.cache.enabled:
+            return await fetch()
+        token = await self.get_change_token()
+        hit, value = self.cache.get(token, key)
+        if not hit:
+            value = await fetch()
+            self.cache.put(token, key, value)
+        return value
+
+    async def get_events(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                         limit: Optional[int] = None, columnar: bool = False, **filters):
+        self.logger.debug("Fetching events using %s (since_id=%s, run_id=%s, limit=%s, filters=%s)",
+                          self.__class__.__name__, since_id, run_id, limit, filters)
+        key = ("events", since_id, run_id, limit, columnar, tuple(sorted(filters.items())))
+        query = queries.select_events(self.param, since_id, run_id, limit, **filters)
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return await self._cached(key, lambda: fetch(*query))
+
+    async def get_app_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                           limit: Optional[int] = None, columnar: bool = False, **filters):
+        self.logger.debug("Fetching app logs using %s (since_id=%s, run_id=%s, limit=%s, filters=%s)",
+                          self.__class__.__name__, since_id, run_id, limit, filters)
+        key = ("app_logs", since_id, run_id, limit, columnar, tuple(sorted(filters.items())))
+        query = queries.select_app_logs(self.param, since_id, run_id, limit, **filters)
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return await self._cached(key, lambda: fetch(*query))
+
+    async def get_rf_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                          limit: Optional[int] = None, columnar: bool = False, **filters):
+        self.logger.debug("Fetching RF log messages using %s (since_id=%s, run_id=%s, limit=%s, filters=%s)",
+                          self.__class__.__name__, since_id, run_id, limit, filters)
+        key = ("rf_logs", since_id, run_id, limit, columnar, tuple(sorted(filters.items())))
+        query = queries.select_rf_logs(self.param, since_id, run_id, limit, **filters)
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return await self._cached(key, lambda: fetch(*query))
+
+    async def get_runs(self) -> List[Dict]:
+        """All runs in insert order: top-level suite, start time, totaltests and status totals."""
+        self.logger.debug("Fetching runs using %s", self.__class__.__name__)
+        return build_runs(*await self._cached(("runs",), self._get_runs))
+
+    async def get_summary(self, run_id: Optional[str] = None) -> Dict:
+        """Aggregated state of a run (by default the most recently started one), see Reader.get_summary."""
+        if run_id is None:
+            run_id = await self._cached(("latest_run_id",), self._get_latest_run_id)
+        self.logger.debug("Fetching run summary using %s (run_id=%s)", self.__class__.__name__, run_id)
+        # The query results are cached, the summary is built per call so elapsed stays current
+        return build_summary(run_id, *await self._cached(("summary", run_id), lambda: self._get_summary(run_id)))
+
+    async def search_logs(self, table: str, text: str, limit: int = 100, offset: int = 0, **filters) -> List[Dict]:
+        """Full-text search in the messages of one log table, see Reader.search_logs."""
+        self.logger.debug("Searching %s using %s (text=%r, limit=%s, offset=%s, filters=%s)",
+                          table, self.__class__.__name__, text, limit, offset, filters)
+        if not queries.fts5_query(text):
+            return []  # FTS5 rejects an empty MATCH
+        key = ("search", table, text, limit, offset, tuple(sorted(filters.items())))
+        query = queries.search_logs(self.dialect, self.param, table, text, limit, offset, **filters)
+        return await self._cached(key, lambda: self._fetch_all_as_dicts(*query))
+
+    async def get_metrics(self, bucket_seconds: int = 60, max_points: int = 500, **filters) -> Dict:
+        """Metric samples aggregated into time buckets, see Reader.get_metrics."""
+        self.logger.debug("Fetching metrics using %s (bucket_seconds=%s, max_points=%s, filters=%s)",
+                          self.__class__.__name__, bucket_seconds, max_points, filters)
+        key = ("metrics", bucket_seconds, max_points, tuple(sorted(filters.items())))
+        return build_metric_series(*await self._cached(key, lambda: self._get_metrics(bucket_seconds, max_points, **filters)))
+
+    async def clear_events(self):
+        self.logger.debug("Clearing events using %s", self.__class__.__name__)
+        try:
+            return await self._clear_events()
+        finally:
+            self.cache.clear()
+
+    def pool_stats(self) -> Optional[Dict]:
+        """Connection pool statistics for GET /stats; None while the pool is not open."""
+        return None
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the response cache for GET /stats."""
+        return self.cache.stats()
+
+    async def _fetch_all_as_dicts(self, query: str, params=()) -> List[Dict]:
+        columns, rows = await self._fetch_rows(query, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def _get_runs(self):
+        run_starts = await self._fetch_all_as_dicts(queries.SELECT_RUN_STARTS)
+        run_totals = await self._fetch_all_as_dicts(queries.SELECT_RUN_COUNTER_TOTALS_PER_RUN)
+        return run_starts, run_totals
+
+    async def _get_latest_run_id(self) -> Optional[str]:
+        rows = await self._fetch_all_as_dicts(queries.SELECT_LATEST_RUN_ID)
+        return rows[0]["run_id"] if rows else None
+
+    async def _get_summary(self, run_id: Optional[str] = None):
+        totals = (await self._fetch_all_as_dicts(*queries.select_counter_totals(self.param, run_id)))[0]
+        failures = await self._fetch_all_as_dicts(*queries.select_failures(self.param, run_id))
+        starts = await self._fetch_all_as_dicts(*queries.select_run_start(self.param, run_id))
+        run_start = starts[0] if starts else None
+        run_end = None
+        if run_start:
+            ends = await self._fetch_all_as_dicts(*queries.select_run_end(self.param, run_start))
+            run_end = ends[0] if ends else None
+        return totals, failures, run_start, run_end
+
+    async def _get_metrics(self, bucket_seconds: int, max_points: int, **filters):
+        bounds = (await self._fetch_all_as_dicts(*queries.select_metric_range(self.param, **filters)))[0]
+        origin, step = metric_buckets(bounds, bucket_seconds, max_points)
+        return step, await self._fetch_rows(*queries.select_metric_buckets(self.dialect, self.param, origin, step, **filters))
+
+    @abstractmethod
+    async def open(self) -> None:
+        """Create the connection pool."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the connection pool."""
+        pass
+
+    @abstractmethod
+    async def _fetch_rows(self, query: str, params=()) -> Rows:
+        """Internal method implemented by subclass. Column names and row tuples of a query."""
+        pass
+
+    @abstractmethod
+    async def _clear_events(self) -> None:
+        """Internal method implemented by subclass"""
+        pass
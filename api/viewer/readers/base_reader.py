@@ -1,36 +1,339 @@
 # backend/event_reader.py
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from collections import namedtuple
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
 import logging
 
+from .cache import ResponseCache
+from .queries import fts5_query
+
+
+# Columnar query result: column names and the row tuples as the driver returned them
+Rows = namedtuple("Rows", ["columns", "rows"])
+
+
+def build_runs(run_starts: List[Dict], run_totals: List[Dict]) -> List[Dict]:
+    """Combine the start_suite rows and run_counters totals of all runs into the /runs response."""
+    totals_by_run = {row["run_id"]: row for row in run_totals}
+    runs = {}
+    for start in run_starts:
+        if start["run_id"] in runs:
+            continue  # only the first start_suite of a run is its top-level suite
+        totals = totals_by_run.get(start["run_id"], {})
+        runs[start["run_id"]] = {
+            "run_id": start["run_id"],
+            "name": start["longname"],
+            "starttime": start["starttime"],
+            "last_endtime": totals.get("last_endtime"),
+            "totaltests": start["totaltests"] or 0,
+            "counts": {
+                "PASS": totals.get("passed") or 0,
+                "FAIL": totals.get("failed") or 0,
+                "SKIP": totals.get("skipped") or 0,
+            },
+        }
+    return list(runs.values())
+
+
+def build_summary(run_id, totals: Dict, failures: List[Dict], run_start: Optional[Dict], run_end: Optional[Dict]) -> Dict:
+    """Turn the raw summary query results into the /summary response."""
+    counts = {"PASS": totals["passed"], "FAIL": totals["failed"], "SKIP": totals["skipped"]}
+    done = sum(counts.values())
+    totaltests = (run_start or {}).get("totaltests") or 0
+
+    starttime = (run_start or {}).get("starttime")
+    endtime = (run_end or {}).get("endtime")
+    return {
+        "run_id": run_id,
+        "counts": counts,
+        "done": done,
+        "running": totals["running"],
+        "totaltests": totaltests,
+        "progress": round(done / totaltests, 4) if totaltests else None,
+        "failures": failures,
+        "starttime": starttime,
+        "endtime": endtime,
+        "finished": run_end is not None,
+        "elapsed": format_elapsed(starttime, endtime),
+    }
+
+
+# Columns of each point in a metric series, see build_metric_series
+METRIC_POINT_COLUMNS = ["time", "min", "avg", "max", "last", "samples"]
+
+
+def _epoch_seconds(timestamp: str) -> int:
+    value = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    # Naive timestamps are stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def metric_resolution(bounds: Dict) -> int:
+    """
+    Finest bucket width in seconds the stored metrics allow, from the
+    queries.select_metric_range row: 1 while everything is raw, 60 once minute
+    rollups exist, 3600 once the minute rollups of the oldest hours were deleted.
+    """
+    if bounds["first_1h"] and (not bounds["first_1m"] or
+                               _epoch_seconds(bounds["first_1m"]) >= _epoch_seconds(bounds["first_1h"]) + 3600):
+        return 3600
+    if bounds["first_1m"]:
+        return 60
+    return 1
+
+
+def metric_buckets(bounds: Dict, bucket_seconds: int, max_points: int):
+    """
+    (origin, width) of the buckets for the samples described by the
+    queries.select_metric_range row. The width is bucket_seconds (rounded up to
+    the metric_resolution), or the smallest multiple of it that gives at most
+    max_points buckets. Buckets start at origin + n * width, with origin the
+    first sample rounded down to that rounded bucket_seconds.
+    """
+    firsts = [_epoch_seconds(value) for key, value in bounds.items() if key.startswith("first_") and value]
+    lasts = [_epoch_seconds(value) for key, value in bounds.items() if key.startswith("last_") and value]
+    if not firsts:
+        return 0, bucket_seconds
+    resolution = metric_resolution(bounds)
+    bucket_seconds = -(-bucket_seconds // resolution) * resolution
+    start, end = min(firsts), max(lasts)
+    origin = start - start % bucket_seconds
+    multiple = max(0, end - origin) // (bucket_seconds * max_points) + 1
+    return origin, bucket_seconds * multiple
+
+
+def build_metric_series(bucket_seconds: int, rows: Rows) -> Dict:
+    """Group the bucket rows of queries.select_metric_buckets into one series per metric_name and source."""
+    index = {name: position for position, name in enumerate(rows.columns)}
+    series = {}
+    for row in rows.rows:
+        key = (row[index["metric_name"]], row[index["source"]])
+        if key not in series:
+            series[key] = {"metric_name": key[0], "source": key[1], "unit": row[index["unit"]], "points": []}
+        series[key]["points"].append([
+            datetime.fromtimestamp(int(row[index["bucket"]]), timezone.utc).isoformat(),
+            row[index["min"]],
+            row[index["avg"]],
+            row[index["max"]],
+            row[index["last"]],
+            row[index["samples"]],
+        ])
+    return {"bucket_seconds": bucket_seconds, "columns": METRIC_POINT_COLUMNS, "series": list(series.values())}
+
+
+def format_elapsed(starttime: Optional[str], endtime: Optional[str]) -> str:
+    if not starttime:
+        return "00:00:00"
+    start = datetime.fromisoformat(starttime)
+    end = datetime.fromisoformat(endtime) if endtime else datetime.now(timezone.utc)
+    # Naive timestamps are stored as UTC
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return str(end - start).split('.')[0]
+
 
 class Reader(ABC):
-    def __init__(self, database_url=None):
+    """
+    Base class for viewer readers.
+
+    get_events() and get_app_logs() accept a since_id cursor: when given, only rows
+    inserted after that id are returned, in insert order. Every row carries its
+    'id', so clients can poll incrementally with the highest id they have seen.
+    This is gap-free because one writer task per ingest process commits the rows
+    in id order. With several writers (e.g. more than one ingest worker on
+    PostgreSQL, where a SERIAL id is taken before its transaction commits) a row
+    that commits late can land below a cursor that was already handed out.
+
+    Rows carry the run_id of the test run they belong to. Passing run_id limits a
+    query to that run; without it all runs are returned.
+
+    Both also take a limit (page size) and filters, which are translated into
+    indexed SQL by the query builders in queries.py:
+      events:   event_type, status, suite, tag, start, end
+      app logs: event_type, level, source, start, end
+      RF logs:  testid, level, start, end (get_rf_logs)
+    start/end bound the event time (app log timestamp) as ISO strings, end exclusive.
+    Together with since_id this gives keyset pagination in insert order.
+    With columnar=True they return Rows(columns, rows) instead of a list of dicts.
+
+    Results are cached (LRU, cache_size entries) per change token: each call
+    first reads the highest event, log, metric and metric compaction ids, and reuses
+    the previous result for the same arguments as long as those have not moved.
+    """
+
+    # Placeholder style of the database driver, used by the query builders
+    param = "?"
+    # SQL dialect for the queries that differ per database (full-text search, metric buckets)
+    dialect = "sqlite"
+
+    def __init__(self, database_url=None, cache_size=256):
         self.logger = logging.getLogger(self.__class__.__module__)
+        self.cache = ResponseCache(cache_size)
+
+    def get_change_token(self):
+        """Cheap token that changes whenever the rows the viewer reads change."""
+        return self._get_change_token()
 
-    def get_events(self):
-        self.logger.debug("Fetching events using %s", self.__class__.__name__)
-        return self._get_events()
+    def _cached(self, key, fetch):
+        """Result of fetch(), reused for as long as the change token stays the same."""
+        if not self.cache.enabled:
+            return fetch()
+        token = self._get_change_token()
+        hit, value = self.cache.get(token, key)
+        if not hit:
+            value = fetch()
+            self.cache.put(token, key, value)
+        return value
+
+    def get_events(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                   limit: Optional[int] = None, columnar: bool = False, **filters):
+        self.logger.debug("Fetching events using %s (since_id=%s, run_id=%s, limit=%s, filters=%s)",
+                          self.__class__.__name__, since_id, run_id, limit, filters)
+        key = ("events", since_id, run_id, limit, columnar, tuple(sorted(filters.items())))
+        return self._cached(key, lambda: self._get_events(since_id, run_id, limit, columnar, **filters))
     
-    def get_app_logs(self):
-        self.logger.debug("Clearing events using %s", self.__class__.__name__)
-        return self._get_app_logs()
+    def get_app_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                     limit: Optional[int] = None, columnar: bool = False, **filters):
+        self.logger.debug("Fetching app logs using %s (since_id=%s, run_id=%s, limit=%s, filters=%s)",
+                          self.__class__.__name__, since_id, run_id, limit, filters)
+        key = ("app_logs", since_id, run_id, limit, columnar, tuple(sorted(filters.items())))
+        return self._cached(key, lambda: self._get_app_logs(since_id, run_id, limit, columnar, **filters))
+
+    def get_rf_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                    limit: Optional[int] = None, columnar: bool = False, **filters):
+        """Robot Framework log messages, paged like get_events. Filters: testid, level, start, end."""
+        self.logger.debug("Fetching RF log messages using %s (since_id=%s, run_id=%s, limit=%s, filters=%s)",
+                          self.__class__.__name__, since_id, run_id, limit, filters)
+        key = ("rf_logs", since_id, run_id, limit, columnar, tuple(sorted(filters.items())))
+        return self._cached(key, lambda: self._get_rf_logs(since_id, run_id, limit, columnar, **filters))
+
+    def get_runs(self) -> List[Dict]:
+        """All runs in insert order: top-level suite, start time, totaltests and status totals."""
+        self.logger.debug("Fetching runs using %s", self.__class__.__name__)
+        return build_runs(*self._cached(("runs",), self._get_runs))
     
+    def get_summary(self, run_id: Optional[str] = None) -> Dict:
+        """
+        Aggregated state of a run (by default the most recently started one):
+        status counts, failures, progress against totaltests and elapsed time.
+        Counts come from the run_counters table kept up to date by the sinks; the
+        rest from indexed lookups, so the cost does not grow with the number of
+        log messages, passed tests or earlier runs.
+        Databases written before runs were tracked have no run_id; those are
+        summarized as a whole.
+        """
+        if run_id is None:
+            run_id = self._cached(("latest_run_id",), self._get_latest_run_id)
+        self.logger.debug("Fetching run summary using %s (run_id=%s)", self.__class__.__name__, run_id)
+        # The query results are cached, the summary is built per call so elapsed stays current
+        return build_summary(run_id, *self._cached(("summary", run_id), lambda: self._get_summary(run_id)))
+
+    def search_logs(self, table: str, text: str, limit: int = 100, offset: int = 0, **filters) -> List[Dict]:
+        """
+        Full-text search in the messages of one log table ('rf_log' or 'applog', see
+        queries.SEARCH_TABLES), best match first. Filters: level, run_id, start, end,
+        and testid (rf_log) or source (applog). Text without search terms matches nothing.
+        """
+        self.logger.debug("Searching %s using %s (text=%r, limit=%s, offset=%s, filters=%s)",
+                          table, self.__class__.__name__, text, limit, offset, filters)
+        if not fts5_query(text):
+            return []  # FTS5 rejects an empty MATCH
+        key = ("search", table, text, limit, offset, tuple(sorted(filters.items())))
+        return self._cached(key, lambda: self._search_logs(table, text, limit, offset, **filters))
+
+    def get_metrics(self, bucket_seconds: int = 60, max_points: int = 500, **filters) -> Dict:
+        """
+        Metric samples aggregated per metric_name and source into time buckets:
+        min, avg, max, last value and sample count per bucket, computed in SQL.
+        Buckets are bucket_seconds wide, widened to a multiple of that when the
+        samples would otherwise give more than max_points buckets per series.
+        Periods whose samples were compacted into rollups are answered from
+        those, so the buckets are then at least a minute (or an hour) wide.
+        Filters: metric_name, source, run_id, start, end.
+        """
+        self.logger.debug("Fetching metrics using %s (bucket_seconds=%s, max_points=%s, filters=%s)",
+                          self.__class__.__name__, bucket_seconds, max_points, filters)
+        key = ("metrics", bucket_seconds, max_points, tuple(sorted(filters.items())))
+        return build_metric_series(*self._cached(key, lambda: self._get_metrics(bucket_seconds, max_points, **filters)))
+
     def clear_events(self):
         self.logger.debug("Clearing events using %s", self.__class__.__name__)
-        return self._clear_events()
+        try:
+            return self._clear_events()
+        finally:
+            self.cache.clear()
+
+    def pool_stats(self) -> Optional[Dict]:
+        """Connection pool statistics for GET /stats; None for readers without a pool."""
+        return None
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the response cache for GET /stats."""
+        return self.cache.stats()
 
     @abstractmethod
-    def _get_events(self) -> List[Dict]:
+    def _get_events(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                    limit: Optional[int] = None, columnar: bool = False, **filters):
         """Internal method implemented by subclass"""
         pass
 
     @abstractmethod
-    def _get_app_logs(self) -> List[Dict]:
+    def _get_app_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                      limit: Optional[int] = None, columnar: bool = False, **filters):
         """Internal method implemented by subclass"""
         pass
 
+    @abstractmethod
+    def _get_rf_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                     limit: Optional[int] = None, columnar: bool = False, **filters):
+        """Internal method implemented by subclass"""
+        pass
+
+    @abstractmethod
+    def _get_runs(self):
+        """
+        Internal method implemented by subclass.
+        Returns (start_suite rows of all runs in insert order, run_counters totals per run)
+        """
+        pass
+
+    @abstractmethod
+    def _get_latest_run_id(self) -> Optional[str]:
+        """Internal method implemented by subclass. run_id of the most recent start_suite, if any."""
+        pass
+
+    @abstractmethod
+    def _get_summary(self, run_id: Optional[str] = None):
+        """
+        Internal method implemented by subclass.
+        Returns (run_counters totals row, failure rows, first start_suite row or None, closing end_suite row or None)
+        """
+        pass
+
+    @abstractmethod
+    def _search_logs(self, table: str, text: str, limit: int, offset: int, **filters) -> List[Dict]:
+        """Internal method implemented by subclass"""
+        pass
+
+    @abstractmethod
+    def _get_metrics(self, bucket_seconds: int, max_points: int, **filters):
+        """
+        Internal method implemented by subclass.
+        Returns (chosen bucket width in seconds, Rows of queries.select_metric_buckets)
+        """
+        pass
+
+    @abstractmethod
+    def _get_change_token(self):
+        """Internal method implemented by subclass. Row of queries.SELECT_CHANGE_TOKEN as a tuple."""
+        pass
+
     @abstractmethod
     def _clear_events(self) -> None:
         """Internal method implemented by subclass"""
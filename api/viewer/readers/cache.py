@@ -0,0 +1,63 @@
+# api/viewer/readers/cache.py
+# Response cache for the viewer readers, invalidated by a database change token.
+
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU cache of reader results, valid for one change token.
+
+    The token identifies the database contents (the highest event, log and metric ids,
+    plus the highest metric compaction id, because compaction deletes single rows;
+    see queries.SELECT_CHANGE_TOKEN). Any lookup with a different token than the
+    cached entries were stored under drops them all, so no entry outlives a change. A max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._token = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, token, key):
+        """Returns (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            self._switch_token(token)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, self._entries[key]
+            self._stats["misses"] += 1
+            return False, None
+
+    def put(self, token, key, value):
+        with self._lock:
+            self._switch_token(token)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._token = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, **self._stats}
+
+    def _switch_token(self, token):
+        if token != self._token:
+            if self._entries:
+                self._stats["invalidations"] += 1
+                self._entries.clear()
+            self._token = token
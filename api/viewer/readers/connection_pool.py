@@ -0,0 +1,192 @@
+# api/viewer/readers/connection_pool.py
+# Thread-safe psycopg2 connection pool for the blocking PostgresReader.
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+logger = logging.getLogger("rt.api.viewer")
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """No connection became available within the acquire timeout."""
+
+
+class ConnectionPool:
+    """
+    Pool of psycopg2 connections shared by the threads serving viewer requests.
+
+    Connections are created on demand up to max_size and kept for reuse; when all
+    are in use, acquire() waits up to `timeout` seconds. A connection that has been
+    idle longer than health_check_interval is checked with SELECT 1 before it is
+    handed out, one older than max_lifetime is closed and replaced (so server-side
+    memory and stale sessions do not pile up), and idle connections beyond min_size
+    are closed after max_idle seconds.
+    """
+
+    def __init__(self, database_url, min_size=1, max_size=10, max_lifetime=1800.0,
+                 max_idle=300.0, health_check_interval=30.0, timeout=10.0, connect=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.database_url = database_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._connect = connect or (lambda: psycopg2.connect(database_url))
+
+        self._lock = threading.Condition()
+        self._idle = []        # [(conn, created_at, last_used)], most recently used last
+        self._created_at = {}  # id(conn) -> created_at, for every open connection
+        self._closed = False
+        self._stats = {"created": 0, "recycled": 0, "failed_health_checks": 0, "waits": 0, "timeouts": 0}
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is returned to the pool (or discarded when broken) afterwards."""
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._created_at)
+            return {
+                "size": size,
+                "idle": len(self._idle),
+                "in_use": size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for conn, _, _ in idle:
+                self._discard(conn)
+            self._lock.notify_all()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                entry = self._take_idle(deadline)
+                if entry is None:
+                    # Reserve the slot before connecting outside the lock
+                    placeholder = object()
+                    self._created_at[id(placeholder)] = None
+                    break
+            # Checked outside the lock: a slow server must not hold up the other threads.
+            # The popped connection still counts as open, so its slot stays taken meanwhile.
+            if self._usable(*entry):
+                return entry[0]
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                del self._created_at[id(placeholder)]
+                self._lock.notify()
+            raise
+        with self._lock:
+            del self._created_at[id(placeholder)]
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        logger.debug("[PG_POOL] Opened connection (%d open)", len(self._created_at))
+        return conn
+
+    def _take_idle(self, deadline):
+        """
+        Called with the lock held. Pops the most recently used idle connection, or
+        returns None when there is room to open a new one; waits until either is
+        possible or the deadline passes.
+        """
+        while True:
+            if self._closed:
+                raise psycopg2.pool.PoolError("Connection pool is closed")
+            # Also done here, so a pool that no longer releases connections shrinks too
+            self._trim_idle(time.monotonic())
+            if self._idle:
+                return self._idle.pop()
+            if len(self._created_at) < self.max_size:
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats["timeouts"] += 1
+                raise PoolTimeout(f"No PostgreSQL connection available within {self.timeout}s")
+            self._stats["waits"] += 1
+            self._lock.wait(remaining)
+
+    def _usable(self, conn, created_at, last_used) -> bool:
+        """Called without the lock for an idle connection about to be handed out; discards it when unusable."""
+        now = time.monotonic()
+        failure = None
+        if conn.closed:
+            pass
+        elif now - created_at >= self.max_lifetime:
+            failure = "recycled"
+        elif now - last_used >= self.health_check_interval:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+                return True
+            except psycopg2.Error as e:
+                logger.warning("[PG_POOL] Dropping connection that failed its health check: %s", e)
+                failure = "failed_health_checks"
+        else:
+            return True
+        with self._lock:
+            if failure:
+                self._stats[failure] += 1
+            self._discard(conn)
+            self._lock.notify()
+        return False
+
+    def _release(self, conn, broken=False):
+        if not broken and not conn.closed:
+            try:
+                # End the read transaction so the connection does not sit idle in transaction
+                if conn.status != psycopg2.extensions.STATUS_READY:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        now = time.monotonic()
+        with self._lock:
+            if broken or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, self._created_at[id(conn)], now))
+                self._trim_idle(now)
+            self._lock.notify()
+
+    def _trim_idle(self, now):
+        """Close connections idle for longer than max_idle, keeping at least min_size open."""
+        for entry in list(self._idle):
+            if len(self._created_at) <= self.min_size:
+                break
+            conn, _, last_used = entry
+            if now - last_used >= self.max_idle:
+                self._idle.remove(entry)
+                self._discard(conn)
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,143 @@
+# api/viewer/readers/postgres_async_reader.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+import asyncpg
+from .async_base_reader import AsyncReader
+from .base_reader import Rows
+from shared.helpers.config_loader import load_config
+import shared.helpers.sql_definitions as sql_definitions
+
+from typing import Dict, Optional
+
+
+def number_placeholders(query: str) -> str:
+    """Rewrite the '?' placeholders of the query builders to asyncpg's $1, $2, ..."""
+    parts = query.split("?")
+    numbered = [parts[0]]
+    for index, part in enumerate(parts[1:], start=1):
+        numbered.append(f"${index}{part}")
+    return "".join(numbered)
+
+
+class AsyncPostgresReader(AsyncReader):
+    """
+    Reader on an asyncpg connection pool. asyncpg resets connections when they are
+    released and drops broken ones itself; connections idle for max_idle seconds
+    are closed down to min_pool_size.
+
+    On top of that, the same rules as the blocking ConnectionPool apply when a
+    connection is handed out: one older than max_lifetime is closed and replaced,
+    and one idle for longer than health_check_interval must answer SELECT 1 first.
+    """
+
+    dialect = "postgres"
+
+    def __init__(self, database_url=None, pool_size=10, min_pool_size=1, max_idle=300.0, pool_timeout=10.0,
+                 max_lifetime=1800.0, health_check_interval=30.0, cache_size=256):
+        super().__init__(pool_size=pool_size, cache_size=cache_size)
+        config = load_config()
+        self.database_url = database_url or config.get("database_url")
+        self.min_pool_size = min_pool_size
+        self.max_idle = max_idle
+        self.pool_timeout = pool_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.pool = None
+        self._open_lock = asyncio.Lock()
+        # Backend pid -> [created_at, last_used] of every connection the pool opened
+        self._connection_times = {}
+        self._stats = {"recycled": 0, "failed_health_checks": 0}
+
+    async def open(self) -> None:
+        async with self._open_lock:
+            if self.pool is not None:
+                return
+            try:
+                self.pool = await asyncpg.create_pool(
+                    self.database_url,
+                    min_size=min(self.min_pool_size, max(1, self.pool_size)),
+                    max_size=max(1, self.pool_size),
+                    max_inactive_connection_lifetime=self.max_idle,
+                    command_timeout=60,
+                    init=self._init_connection,
+                )
+            except (OSError, asyncpg.PostgresError) as e:
+                self.logger.error("Failed to connect to PostgreSQL is the service running? %s", e)
+                raise
+            self.logger.info("PostgreSQL reader pool initialized")
+
+    async def close(self) -> None:
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            await pool.close()
+        self._connection_times.clear()
+
+    async def _init_connection(self, conn) -> None:
+        now = time.monotonic()
+        self._connection_times[conn.get_server_pid()] = [now, now]
+
+    async def _usable(self, conn) -> bool:
+        now = time.monotonic()
+        created_at, last_used = self._connection_times.get(conn.get_server_pid(), (now, now))
+        if now - created_at >= self.max_lifetime:
+            self._stats["recycled"] += 1
+            return False
+        if now - last_used >= self.health_check_interval:
+            try:
+                await conn.fetchval("SELECT 1", timeout=self.pool_timeout)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                self.logger.warning("Dropping PostgreSQL connection that failed its health check: %s", e)
+                self._stats["failed_health_checks"] += 1
+                return False
+        return True
+
+    @asynccontextmanager
+    async def _connection(self):
+        """Borrow a pool connection that passes the lifetime and health checks."""
+        if self.pool is None:
+            await self.open()
+        # Every idle connection may be rejected once; by then the pool hands out fresh ones
+        attempts = self.pool_size + 1
+        for attempt in range(attempts):
+            conn = await self.pool.acquire(timeout=self.pool_timeout)
+            if attempt == attempts - 1 or await self._usable(conn):
+                break
+            self._connection_times.pop(conn.get_server_pid(), None)
+            conn.terminate()
+            await self.pool.release(conn)
+        pid = conn.get_server_pid()
+        try:
+            yield conn
+        finally:
+            if pid in self._connection_times:
+                self._connection_times[pid][1] = time.monotonic()
+            await self.pool.release(conn)
+
+    def pool_stats(self) -> Optional[Dict]:
+        if self.pool is None:
+            return None
+        size, idle = self.pool.get_size(), self.pool.get_idle_size()
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+            **self._stats,
+        }
+
+    async def _fetch_rows(self, query: str, params=()) -> Rows:
+        self.logger.debug("Executing SQL -> %s", query)
+        async with self._connection() as conn:
+            statement = await conn.prepare(number_placeholders(query))
+            columns = [attribute.name for attribute in statement.get_attributes()]
+            rows = await statement.fetch(*params)
+        # Records are converted to plain tuples so they serialize like the other drivers' rows
+        return Rows(columns, [tuple(row) for row in rows])
+
+    async def _clear_events(self) -> None:
+        async with self._connection() as conn:
+            async with conn.transaction():
+                await conn.execute(sql_definitions.DELETE_ALL_EVENTS)
+                await conn.execute(sql_definitions.DELETE_ALL_RUN_COUNTERS)
@@ -1,55 +1,129 @@
 # api/viewer/readers/postgres_reader.py
 
+from contextlib import contextmanager
 import psycopg2
-from .base_reader import Reader
+from .base_reader import Reader, Rows, metric_buckets
+from .connection_pool import ConnectionPool
 from shared.helpers.config_loader import load_config
 import shared.helpers.sql_definitions as sql_definitions
+from . import queries
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class PostgresReader(Reader):
-    def __init__(self, database_url=None, conn=None):
-        super().__init__()
+    """
+    Reader on psycopg2. Connections come from a ConnectionPool, so requests reuse
+    authenticated backends instead of connecting per query; pass conn to use a
+    single existing connection instead.
+    """
+    param = "%s"
+    dialect = "postgres"
+
+    def __init__(self, database_url=None, conn=None, pool_size=None, min_pool_size=None,
+                 max_lifetime=None, health_check_interval=None, pool_timeout=None,
+                 cache_size=256):
+        super().__init__(cache_size=cache_size)
         config = load_config()
         self.database_url = database_url or config.get("database_url")
         self.conn = conn
+        self.pool = None
+        if conn is None:
+            # Arguments override the viewer_db_pool_* options
+            self.pool = ConnectionPool(
+                self.database_url,
+                min_size=int(min_pool_size if min_pool_size is not None else config.get("viewer_db_pool_min_size", 1)),
+                max_size=int(pool_size if pool_size is not None else config.get("viewer_db_pool_size", 10)),
+                max_lifetime=float(max_lifetime if max_lifetime is not None else config.get("viewer_db_pool_max_lifetime", 1800)),
+                max_idle=float(config.get("viewer_db_pool_max_idle", 300)),
+                health_check_interval=float(
+                    health_check_interval if health_check_interval is not None
+                    else config.get("viewer_db_pool_health_check_interval", 30)
+                ),
+                timeout=float(pool_timeout if pool_timeout is not None else config.get("viewer_db_pool_timeout", 10)),
+            )
 
-    def _get_connection(self):
-        self.logger.debug("Connecting to PostgreSQL at %s", self.database_url)
+    @contextmanager
+    def _connection(self):
         if self.conn is not None:
-            return self.conn, False
-        else:
-            try:
-                return psycopg2.connect(self.database_url), True
-            except psycopg2.OperationalError as e:
-                self.logger.error("Failed to connect to PostgreSQL is the service running? %s", e)
-                raise
-
-    def _fetch_all_as_dicts(self, query: str) -> List[Dict]:
-        self.logger.debug("Executing SQL -> %s", query)
-        conn, should_close = self._get_connection()
+            yield self.conn
+            return
         try:
+            with self.pool.connection() as conn:
+                yield conn
+        except psycopg2.OperationalError as e:
+            self.logger.error("Failed to connect to PostgreSQL is the service running? %s", e)
+            raise
+
+    def _fetch_rows(self, query: str, params=()) -> Rows:
+        self.logger.debug("Executing SQL -> %s", query)
+        with self._connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(query)
+                cursor.execute(query, params)
                 rows = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
-        finally:
-            if should_close:
-                conn.close()
+                return Rows(columns, rows)
+
+    def _fetch_all_as_dicts(self, query: str, params=()) -> List[Dict]:
+        columns, rows = self._fetch_rows(query, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def pool_stats(self) -> Optional[Dict]:
+        return self.pool.stats() if self.pool is not None else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+    def _get_events(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                    limit: Optional[int] = None, columnar: bool = False, **filters):
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return fetch(*queries.select_events(self.param, since_id, run_id, limit, **filters))
 
-    def _get_events(self) -> List[Dict]:
-        return self._fetch_all_as_dicts(sql_definitions.SELECT_ALL_EVENTS)
+    def _get_app_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                      limit: Optional[int] = None, columnar: bool = False, **filters):
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return fetch(*queries.select_app_logs(self.param, since_id, run_id, limit, **filters))
 
-    def _get_app_logs(self) -> List[Dict]:
-        return self._fetch_all_as_dicts(sql_definitions.SELECT_ALL_APP_LOGS)
+    def _get_rf_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                     limit: Optional[int] = None, columnar: bool = False, **filters):
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return fetch(*queries.select_rf_logs(self.param, since_id, run_id, limit, **filters))
+
+    def _get_runs(self):
+        run_starts = self._fetch_all_as_dicts(queries.SELECT_RUN_STARTS)
+        run_totals = self._fetch_all_as_dicts(queries.SELECT_RUN_COUNTER_TOTALS_PER_RUN)
+        return run_starts, run_totals
+
+    def _get_latest_run_id(self) -> Optional[str]:
+        rows = self._fetch_all_as_dicts(queries.SELECT_LATEST_RUN_ID)
+        return rows[0]["run_id"] if rows else None
+
+    def _get_summary(self, run_id: Optional[str] = None):
+        totals = self._fetch_all_as_dicts(*queries.select_counter_totals(self.param, run_id))[0]
+        failures = self._fetch_all_as_dicts(*queries.select_failures(self.param, run_id))
+        starts = self._fetch_all_as_dicts(*queries.select_run_start(self.param, run_id))
+        run_start = starts[0] if starts else None
+        run_end = None
+        if run_start:
+            ends = self._fetch_all_as_dicts(*queries.select_run_end(self.param, run_start))
+            run_end = ends[0] if ends else None
+        return totals, failures, run_start, run_end
+
+    def _search_logs(self, table: str, text: str, limit: int, offset: int, **filters) -> List[Dict]:
+        return self._fetch_all_as_dicts(*queries.search_logs(self.dialect, self.param, table, text, limit, offset, **filters))
+
+    def _get_metrics(self, bucket_seconds: int, max_points: int, **filters):
+        bounds = self._fetch_all_as_dicts(*queries.select_metric_range(self.param, **filters))[0]
+        origin, step = metric_buckets(bounds, bucket_seconds, max_points)
+        return step, self._fetch_rows(*queries.select_metric_buckets(self.dialect, self.param, origin, step, **filters))
+
+    def _get_change_token(self):
+        row = self._fetch_all_as_dicts(queries.SELECT_CHANGE_TOKEN)[0]
+        return row["events"], row["app_logs"], row["rf_logs"], row["metrics"], row["metric_compactions"]
 
     def _clear_events(self) -> None:
-        conn, should_close = self._get_connection()
-        try:
+        with self._connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(sql_definitions.DELETE_ALL_EVENTS)
+                cursor.execute(sql_definitions.DELETE_ALL_RUN_COUNTERS)
                 conn.commit()
-        finally:
-            if should_close:
-                conn.close()
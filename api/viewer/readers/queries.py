@@ -0,0 +1,416 @@
+# api/viewer/readers/queries.py
+# SQL builders shared by the viewer readers.
+# Each builder returns (query, params). `param` is the placeholder style of the
+# driver that runs the query: '?' for sqlite3, '%s' for psycopg2.
+# A run_id of None means "all runs"; given a run_id, the queries use the run indexes.
+
+import json
+import re
+import shared.helpers.sql_definitions as sql_definitions
+
+EVENT_FIELDS = ", ".join(name for name, _ in sql_definitions.event_columns)
+APP_LOG_FIELDS = ", ".join(name for name, _ in sql_definitions.app_log_columns)
+RF_LOG_FIELDS = ", ".join(name for name, _ in sql_definitions.rf_log_columns)
+
+
+def _where(param: str, conditions, extra=None):
+    """
+    Build a WHERE clause from (sql, value) pairs, skipping pairs whose value is None.
+    `extra` is a fixed condition without parameters that is always included.
+    """
+    clauses = [sql.format(param=param) for sql, value in conditions if value is not None]
+    params = [value for _, value in conditions if value is not None]
+    if extra:
+        clauses.append(extra)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _like_tag(tag):
+    """LIKE pattern matching one tag inside the JSON-encoded tags column."""
+    if tag is None:
+        return None
+    escaped = json.dumps(tag).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _limit(limit):
+    return f"LIMIT {int(limit)}" if limit is not None else ""
+
+
+def select_events(param: str, since_id=None, run_id=None, limit=None,
+                  event_type=None, status=None, suite=None, tag=None, start=None, end=None):
+    """
+    Events in insert order. since_id is the keyset cursor (only rows with a larger id),
+    limit the page size; the other arguments filter. Without any argument all events
+    are returned in time order.
+    """
+    conditions = [
+        ("run_id = {param}", run_id),
+        ("id > {param}", since_id),
+        ("event_type = {param}", event_type),
+        ("status = {param}", status),
+        ("suite = {param}", suite),
+        ("tags LIKE {param} ESCAPE '\\'", _like_tag(tag)),
+        ("COALESCE(starttime, endtime) >= {param}", start),
+        ("COALESCE(starttime, endtime) < {param}", end),
+    ]
+    if limit is None and all(value is None for _, value in conditions):
+        return sql_definitions.SELECT_ALL_EVENTS, []
+    where, params = _where(param, conditions)
+    query = f"""
+SELECT id, {EVENT_FIELDS}
+FROM events
+{where}
+ORDER BY id ASC
+{_limit(limit)}
+"""
+    return query, params
+
+
+def select_app_logs(param: str, since_id=None, run_id=None, limit=None,
+                    event_type=None, level=None, source=None, start=None, end=None):
+    """App logs in insert order, with the same cursor, limit and filter semantics as select_events."""
+    conditions = [
+        ("run_id = {param}", run_id),
+        ("id > {param}", since_id),
+        ("event_type = {param}", event_type),
+        ("level = {param}", level),
+        ("source = {param}", source),
+        ("timestamp >= {param}", start),
+        ("timestamp < {param}", end),
+    ]
+    if limit is None and all(value is None for _, value in conditions):
+        return sql_definitions.SELECT_ALL_APP_LOGS, []
+    where, params = _where(param, conditions)
+    query = f"""
+SELECT id, {APP_LOG_FIELDS}
+FROM app_logs
+{where}
+ORDER BY id ASC
+{_limit(limit)}
+"""
+    return query, params
+
+
+def select_rf_logs(param: str, since_id=None, run_id=None, limit=None,
+                   testid=None, level=None, start=None, end=None):
+    """
+    Robot Framework log messages in insert order, with the same cursor, limit and
+    filter semantics as select_events. Given a testid, the (testid, timestamp)
+    index finds the messages of that test without scanning the others.
+    """
+    # Written as an expression for a test's messages, so the planner picks the testid
+    # index over (run_id, id), which would walk every message of the run
+    run_condition = "run_id || '' = {param}" if testid is not None else "run_id = {param}"
+    conditions = [
+        ("testid = {param}", testid),
+        (run_condition, run_id),
+        ("id > {param}", since_id),
+        ("level = {param}", level),
+        ("timestamp >= {param}", start),
+        ("timestamp < {param}", end),
+    ]
+    if limit is None and all(value is None for _, value in conditions):
+        return sql_definitions.SELECT_ALL_RF_LOGS, []
+    where, params = _where(param, conditions)
+    query = f"""
+SELECT id, {RF_LOG_FIELDS}
+FROM rf_log_messages
+{where}
+ORDER BY id ASC
+{_limit(limit)}
+"""
+    return query, params
+
+
+# --- Runs ---
+
+# Top-level suites are started first, so the first start_suite per run names the run
+SELECT_RUN_STARTS = """
+SELECT id, run_id, longname, starttime, totaltests
+FROM events
+WHERE event_type = 'start_suite' AND run_id IS NOT NULL
+ORDER BY id ASC
+"""
+
+SELECT_LATEST_RUN_ID = """
+SELECT run_id
+FROM events
+WHERE event_type = 'start_suite'
+ORDER BY id DESC
+LIMIT 1
+"""
+
+SELECT_RUN_COUNTER_TOTALS_PER_RUN = """
+SELECT
+    run_id,
+    SUM(passed) AS passed,
+    SUM(failed) AS failed,
+    SUM(skipped) AS skipped,
+    SUM(running) AS running,
+    MAX(last_endtime) AS last_endtime
+FROM run_counters
+GROUP BY run_id
+"""
+
+
+# --- Run summary ---
+# Status totals come from the run_counters table; the other queries are answered
+# from the (event_type, status) and (run_id, event_type, status) indexes.
+
+def select_counter_totals(param: str, run_id=None):
+    if run_id is None:
+        return sql_definitions.SELECT_RUN_COUNTER_TOTALS, []
+    query = f"""
+SELECT
+    COALESCE(SUM(passed), 0) AS passed,
+    COALESCE(SUM(failed), 0) AS failed,
+    COALESCE(SUM(skipped), 0) AS skipped,
+    COALESCE(SUM(running), 0) AS running
+FROM run_counters
+WHERE run_id = {param}
+"""
+    return query, [run_id]
+
+
+def select_failures(param: str, run_id=None):
+    where, params = _where(param, [("run_id = {param}", run_id)], extra="event_type = 'end_test' AND status = 'FAIL'")
+    query = f"""
+SELECT id, testid, name, suite, message, endtime
+FROM events
+{where}
+ORDER BY id ASC
+"""
+    return query, params
+
+
+def select_run_start(param: str, run_id=None):
+    """The first start_suite (of one run, or of all events), i.e. the top-level suite."""
+    where, params = _where(param, [("run_id = {param}", run_id)], extra="event_type = 'start_suite'")
+    query = f"""
+SELECT id, run_id, longname, starttime, totaltests
+FROM events
+{where}
+ORDER BY id ASC
+LIMIT 1
+"""
+    return query, params
+
+
+def select_run_end(param: str, run_start: dict):
+    """The end_suite that closes the top-level suite opened by run_start, if it has finished."""
+    where, params = _where(param, [
+        ("run_id = {param}", run_start.get("run_id")),
+        ("longname = {param}", run_start["longname"]),
+        ("id > {param}", run_start["id"]),
+    ], extra="event_type = 'end_suite'")
+    query = f"""
+SELECT endtime
+FROM events
+{where}
+ORDER BY id DESC
+LIMIT 1
+"""
+    return query, params
+
+
+# --- Full-text search ---
+# Searchable log tables by API name, with the filters (column names) each supports
+SEARCH_TABLES = {
+    "rf_log": ("rf_log_messages", RF_LOG_FIELDS, ("level", "testid", "run_id")),
+    "applog": ("app_logs", APP_LOG_FIELDS, ("level", "source", "run_id")),
+}
+
+_SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts5_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query that cannot be a syntax error: every word
+    becomes a quoted term and "quoted text" a phrase, all of which must match.
+    Returns "" when the text has nothing to search for.
+    """
+    terms = []
+    for phrase, word in _SEARCH_TERM.findall(text):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    return " ".join(terms)
+
+
+def search_logs(dialect: str, param: str, table: str, text: str, limit: int, offset: int = 0,
+                start=None, end=None, **filters):
+    """
+    Log rows of one table whose message matches `text`, best match first, as
+    (query, params); score is higher for better matches.
+
+    SQLite matches against the FTS5 table (ranked by bm25), PostgreSQL against the
+    GIN-indexed tsvector with websearch syntax (ranked by ts_rank). `filters` are
+    equality filters from SEARCH_TABLES, start/end bound the timestamp.
+    """
+    name, fields, filter_columns = SEARCH_TABLES[table]
+    unknown = set(filters) - set(filter_columns)
+    if unknown:
+        raise ValueError(f"Unsupported filter(s) for {table}: {', '.join(sorted(unknown))}")
+    conditions = [(f"t.{column} = {{param}}", filters.get(column)) for column in filter_columns]
+    conditions += [("t.timestamp >= {param}", start), ("t.timestamp < {param}", end)]
+    columns = ", ".join(f"t.{field.strip()}" for field in fields.split(","))
+
+    if dialect == "postgres":
+        vector = sql_definitions.LOG_SEARCH_VECTOR.replace("message", "t.message")
+        where, params = _where(param, conditions, extra=f"{vector} @@ websearch_to_tsquery('simple', {param})")
+        query = f"""
+SELECT t.id, {columns}, ts_rank({vector}, websearch_to_tsquery('simple', {param})) AS score
+FROM {name} t
+{where}
+ORDER BY score DESC, t.id ASC
+LIMIT {int(limit)} OFFSET {int(offset)}
+"""
+        # The match placeholder comes after the filters in WHERE, the rank one first in SELECT
+        return query, [text] + params + [text]
+
+    fts = f"{name}_fts"
+    where, params = _where(param, conditions, extra=f"{fts} MATCH {param}")
+    query = f"""
+SELECT t.id, {columns}, -bm25({fts}) AS score
+FROM {fts}
+JOIN {name} t ON t.id = {fts}.rowid
+{where}
+ORDER BY score DESC, t.id ASC
+LIMIT {int(limit)} OFFSET {int(offset)}
+"""
+    return query, params + [fts5_query(text)]
+
+
+# --- Metrics ---
+# Samples are aggregated per (metric_name, source) into fixed time buckets in SQL,
+# so a chart of a long run costs one row per bucket instead of one per sample.
+# Older samples live in the rollup tables (sql_definitions.METRIC_ROLLUP_TABLES)
+# instead of the metrics table; a query reads the raw rows plus the coarsest
+# rollup table whose buckets fit in its own.
+
+def _metric_conditions(metric_name=None, source=None, run_id=None, start=None, end=None):
+    return [
+        ("metric_name = {param}", metric_name),
+        ("source = {param}", source),
+        ("run_id = {param}", run_id),
+        ("timestamp >= {param}", start),
+        ("timestamp < {param}", end),
+    ]
+
+
+def _bucket_start(dialect: str, column: str, origin: int, step: int) -> str:
+    """
+    SQL expression for the start (Unix seconds) of the bucket of an ISO timestamp
+    column, for buckets of step seconds starting at origin.
+    """
+    if dialect == "postgres":
+        seconds = f"EXTRACT(EPOCH FROM CAST({column} AS timestamptz))"
+        return f"{origin} + CAST(FLOOR(({seconds} - {origin}) / {step}) AS BIGINT) * {step}"
+    seconds = f"CAST(strftime('%s', {column}) AS INTEGER)"
+    return f"{origin} + (({seconds} - {origin}) / {step}) * {step}"
+
+
+def select_metric_range(param: str, **filters):
+    """
+    First and last timestamp matching the filters in the raw table (first_raw,
+    last_raw) and in each rollup table (first_1m, ..., last_1h), to size the buckets.
+    """
+    where, params = _where(param, _metric_conditions(**filters))
+    tables = [("raw", "metrics")] + [(table.split("_", 1)[1], table) for table in sql_definitions.METRIC_ROLLUP_TABLES]
+    columns = []
+    for suffix, table in tables:
+        columns.append(f"(SELECT MIN(timestamp) FROM {table} {where}) AS first_{suffix}")
+        columns.append(f"(SELECT MAX(timestamp) FROM {table} {where}) AS last_{suffix}")
+    query = "SELECT\n    " + ",\n    ".join(columns) + "\n"
+    return query, params * len(columns)
+
+
+def metric_rollup_table(origin: int, bucket_seconds: int):
+    """The coarsest rollup table whose buckets each fall inside one bucket, or None."""
+    for table, seconds in sorted(sql_definitions.METRIC_ROLLUP_TABLES.items(), key=lambda item: -item[1]):
+        if bucket_seconds % seconds == 0 and origin % seconds == 0:
+            return table
+    return None
+
+
+def select_metric_buckets(dialect: str, param: str, origin: int, bucket_seconds: int, **filters):
+    """
+    Min, avg, max, last value and sample count per metric_name, source and bucket,
+    in time order. bucket is the bucket start in Unix seconds (origin plus a
+    multiple of bucket_seconds); last is the value of the latest sample.
+
+    Raw samples are aggregated per bucket first; the result is merged with the
+    rollup rows as partial aggregates (samples, total, min, max, last), so it is
+    the same as over the raw samples alone.
+    """
+    where, params = _where(param, _metric_conditions(**filters))
+    bucket = _bucket_start(dialect, "timestamp", int(origin), int(bucket_seconds))
+    parts = f"""
+    SELECT b.metric_name, b.source, b.unit, b.bucket, b.samples, b.total, b.min_value, b.max_value,
+        m.value AS last_value, m.timestamp AS last_time
+    FROM (
+        SELECT
+            metric_name,
+            source,
+            MAX(unit) AS unit,
+            {bucket} AS bucket,
+            COUNT(*) AS samples,
+            SUM(value) AS total,
+            MIN(value) AS min_value,
+            MAX(value) AS max_value,
+            MAX(id) AS last_id
+        FROM metrics
+        {where}
+        GROUP BY metric_name, source, {bucket}
+    ) b
+    JOIN metrics m ON m.id = b.last_id"""
+    rollup = metric_rollup_table(int(origin), int(bucket_seconds))
+    if rollup is not None:
+        parts += f"""
+    UNION ALL
+    SELECT metric_name, source, unit, {bucket} AS bucket, samples, total, min_value, max_value,
+        last_value, timestamp AS last_time
+    FROM {rollup}
+    {where}"""
+        params = params * 2
+    # The cast keeps samples an integer: PostgreSQL sums bigints to numeric (a Decimal, sent as a string)
+    query = f"""
+WITH parts AS ({parts}
+),
+ranked AS (
+    SELECT parts.*,
+        ROW_NUMBER() OVER (PARTITION BY metric_name, source, bucket ORDER BY last_time DESC) AS recency
+    FROM parts
+)
+SELECT
+    metric_name,
+    source,
+    MAX(unit) AS unit,
+    bucket,
+    MIN(min_value) AS min,
+    SUM(total) / SUM(samples) AS avg,
+    MAX(max_value) AS max,
+    MAX(CASE WHEN recency = 1 THEN last_value END) AS last,
+    CAST(SUM(samples) AS BIGINT) AS samples
+FROM ranked
+GROUP BY metric_name, source, bucket
+ORDER BY metric_name, source, bucket
+"""
+    return query, params
+
+
+# --- Change token ---
+# Rows are inserted, or all deleted, and ids are never reused, so the highest ids
+# identify the contents the viewer reads. Metric compaction is the exception: it
+# deletes individual samples and rollups, and logs every such transaction in
+# metric_compactions, whose highest id covers those changes. Each lookup is a
+# single index probe.
+SELECT_CHANGE_TOKEN = """
+SELECT
+    (SELECT MAX(id) FROM events) AS events,
+    (SELECT MAX(id) FROM app_logs) AS app_logs,
+    (SELECT MAX(id) FROM rf_log_messages) AS rf_logs,
+    (SELECT MAX(id) FROM metrics) AS metrics,
+    (SELECT MAX(id) FROM metric_compactions) AS metric_compactions
+"""
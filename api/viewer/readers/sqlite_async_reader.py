@@ -0,0 +1,87 @@
+# api/viewer/readers/sqlite_async_reader.py
+import asyncio
+from contextlib import asynccontextmanager
+import aiosqlite
+from .async_base_reader import AsyncReader
+from .base_reader import Rows
+from shared.helpers.config_loader import load_config
+import shared.helpers.sql_definitions as sql_definitions
+
+from typing import Dict, Optional
+
+class AsyncSqliteReader(AsyncReader):
+    """
+    Reader on aiosqlite with a small pool of read-only connections.
+
+    The connections are opened once with mode=ro, so requests neither pay for a
+    connect per query nor can take the write lock the ingest sinks need; in WAL
+    mode they read concurrently with the writer. Only clear_events writes, on a
+    connection of its own.
+    """
+
+    def __init__(self, database_url=None, pool_size=4, cache_size=256):
+        super().__init__(pool_size=pool_size, cache_size=cache_size)
+        config = load_config()
+        raw_path = database_url or config.get("database_url", "sqlite:///eventlog.db")
+
+        # Strip 'sqlite:///' prefix if present
+        if raw_path.startswith("sqlite:///"):
+            self.database_url = raw_path.replace("sqlite:///", "", 1)
+        else:
+            self.database_url = raw_path
+
+        self._pool = None
+        self._connections = []
+        self._open_lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        async with self._open_lock:
+            if self._pool is not None:
+                return
+            self.logger.debug("Opening %d read-only connections to Sqlite at %s", self.pool_size, self.database_url)
+            pool = asyncio.Queue()
+            try:
+                for _ in range(max(1, self.pool_size)):
+                    conn = await aiosqlite.connect(f"file:{self.database_url}?mode=ro", uri=True)
+                    self._connections.append(conn)
+                    pool.put_nowait(conn)
+            except Exception:
+                await self.close()
+                raise
+            self._pool = pool
+
+    async def close(self) -> None:
+        connections, self._connections, self._pool = self._connections, [], None
+        for conn in connections:
+            await conn.close()
+
+    def pool_stats(self) -> Optional[Dict]:
+        if self._pool is None:
+            return None
+        size = len(self._connections)
+        return {"size": size, "idle": self._pool.qsize(), "in_use": size - self._pool.qsize(), "max_size": self.pool_size}
+
+    @asynccontextmanager
+    async def _connection(self):
+        if self._pool is None:
+            await self.open()
+        pool = self._pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+
+    async def _fetch_rows(self, query: str, params=()) -> Rows:
+        self.logger.debug("Executing SQL -> %s", query)
+        async with self._connection() as conn:
+            async with conn.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+                columns = [col[0] for col in cursor.description]
+        return Rows(columns, rows)
+
+    async def _clear_events(self) -> None:
+        async with aiosqlite.connect(self.database_url) as conn:
+            await conn.execute(sql_definitions.DELETE_ALL_EVENTS)
+            await conn.execute(sql_definitions.DELETE_ALL_RUN_COUNTERS)
+            await conn.commit()
@@ -1,14 +1,15 @@
 # backend/sqlite_reader.py
 import sqlite3
-from .base_reader import Reader
+from .base_reader import Reader, Rows, metric_buckets
 from shared.helpers.config_loader import load_config
 import shared.helpers.sql_definitions as sql_definitions
+from . import queries
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class SqliteReader(Reader):
-    def __init__(self, database_url=None, conn=None):
-        super().__init__()
+    def __init__(self, database_url=None, conn=None, cache_size=256):
+        super().__init__(cache_size=cache_size)
         config = load_config()
         raw_path = database_url or config.get("database_url", "sqlite:///eventlog.db")
 
@@ -27,29 +28,75 @@ class SqliteReader(Reader):
         else:
             return sqlite3.connect(self.database_url), True  # True = close the connection
 
-    def _fetch_all_as_dicts(self, query: str) -> List[Dict]:
+    def _fetch_rows(self, query: str, params=()) -> Rows:
         self.logger.debug("Executing SQL -> %s", query)
         conn, should_close = self._get_connection()
         try:
             cursor = conn.cursor()
-            rows = cursor.execute(query).fetchall()
+            rows = cursor.execute(query, params).fetchall()
             columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
+            return Rows(columns, rows)
         finally:
             if should_close:
                 conn.close()
 
-    def _get_events(self) -> List[Dict]:
-        return self._fetch_all_as_dicts(sql_definitions.SELECT_ALL_EVENTS)
+    def _fetch_all_as_dicts(self, query: str, params=()) -> List[Dict]:
+        columns, rows = self._fetch_rows(query, params)
+        return [dict(zip(columns, row)) for row in rows]
 
-    def _get_app_logs(self) -> List[Dict]:
-        return self._fetch_all_as_dicts(sql_definitions.SELECT_ALL_APP_LOGS)
+    def _get_events(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                    limit: Optional[int] = None, columnar: bool = False, **filters):
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return fetch(*queries.select_events(self.param, since_id, run_id, limit, **filters))
+
+    def _get_app_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                      limit: Optional[int] = None, columnar: bool = False, **filters):
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return fetch(*queries.select_app_logs(self.param, since_id, run_id, limit, **filters))
+
+    def _get_rf_logs(self, since_id: Optional[int] = None, run_id: Optional[str] = None,
+                     limit: Optional[int] = None, columnar: bool = False, **filters):
+        fetch = self._fetch_rows if columnar else self._fetch_all_as_dicts
+        return fetch(*queries.select_rf_logs(self.param, since_id, run_id, limit, **filters))
+
+    def _get_runs(self):
+        run_starts = self._fetch_all_as_dicts(queries.SELECT_RUN_STARTS)
+        run_totals = self._fetch_all_as_dicts(queries.SELECT_RUN_COUNTER_TOTALS_PER_RUN)
+        return run_starts, run_totals
+
+    def _get_latest_run_id(self) -> Optional[str]:
+        rows = self._fetch_all_as_dicts(queries.SELECT_LATEST_RUN_ID)
+        return rows[0]["run_id"] if rows else None
+
+    def _get_summary(self, run_id: Optional[str] = None):
+        totals = self._fetch_all_as_dicts(*queries.select_counter_totals(self.param, run_id))[0]
+        failures = self._fetch_all_as_dicts(*queries.select_failures(self.param, run_id))
+        starts = self._fetch_all_as_dicts(*queries.select_run_start(self.param, run_id))
+        run_start = starts[0] if starts else None
+        run_end = None
+        if run_start:
+            ends = self._fetch_all_as_dicts(*queries.select_run_end(self.param, run_start))
+            run_end = ends[0] if ends else None
+        return totals, failures, run_start, run_end
+
+    def _search_logs(self, table: str, text: str, limit: int, offset: int, **filters) -> List[Dict]:
+        return self._fetch_all_as_dicts(*queries.search_logs(self.dialect, self.param, table, text, limit, offset, **filters))
+
+    def _get_metrics(self, bucket_seconds: int, max_points: int, **filters):
+        bounds = self._fetch_all_as_dicts(*queries.select_metric_range(self.param, **filters))[0]
+        origin, step = metric_buckets(bounds, bucket_seconds, max_points)
+        return step, self._fetch_rows(*queries.select_metric_buckets(self.dialect, self.param, origin, step, **filters))
+
+    def _get_change_token(self):
+        row = self._fetch_all_as_dicts(queries.SELECT_CHANGE_TOKEN)[0]
+        return row["events"], row["app_logs"], row["rf_logs"], row["metrics"], row["metric_compactions"]
 
     def _clear_events(self) -> None:
         conn, should_close = self._get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute(sql_definitions.DELETE_ALL_EVENTS)
+            cursor.execute(sql_definitions.DELETE_ALL_RUN_COUNTERS)
             conn.commit()
         finally:
             if should_close:
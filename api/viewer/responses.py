@@ -0,0 +1,18 @@
+# api/viewer/responses.py
+from starlette.responses import Response
+
+from shared.helpers import json_codec
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response serialized with json_codec (orjson when installed).
+
+    Returning it from a route skips FastAPI's jsonable_encoder, which walks every
+    value of every row in Python before the actual encoding.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return json_codec.dumps(content)
@@ -1,52 +1,319 @@
 # api/viewer/routes.py
-from fastapi import Depends, APIRouter, Request, Response
-from fastapi.responses import RedirectResponse
-from datetime import datetime, timezone
+from fastapi import Depends, APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from typing import Optional
+import hashlib
 import logging
 
+from api.viewer.live import stream_live_updates
+from api.viewer.readers.async_base_reader import call_reader
+from api.viewer.responses import FastJSONResponse
+
 router = APIRouter()
 logger = logging.getLogger("rt.api.viewer")
 
-def get_event_reader(request: Request):
+# Page size of the list endpoints when no limit is given, and the largest allowed
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+# Search results are ranked, so pages are offsets; deep pages get slower, hence the caps
+MAX_SEARCH_PAGE_SIZE = 1000
+MAX_SEARCH_OFFSET = 10000
+# Points per metric series: the bucket width grows until a series fits
+DEFAULT_METRIC_POINTS = 500
+MAX_METRIC_POINTS = 5000
+
+async def get_event_reader(request: Request):
     return request.app.state.event_reader
 
+async def event_filters(
+    event_type: Optional[str] = None,
+    status: Optional[str] = None,
+    suite: Optional[str] = None,
+    tag: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    return {k: v for k, v in locals().items() if v is not None}
+
+async def app_log_filters(
+    event_type: Optional[str] = None,
+    level: Optional[str] = None,
+    source: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    return {k: v for k, v in locals().items() if v is not None}
+
+async def change_token(reader):
+    """The reader's change token, or None for readers that do not provide one."""
+    get_token = getattr(reader, "get_change_token", None)
+    return await call_reader(get_token) if get_token is not None else None
+
+def make_etag(token, request: Request, *extra) -> Optional[str]:
+    """Weak ETag of a response: the same URL over unchanged data gives the same tag."""
+    if token is None:
+        return None
+    digest = hashlib.sha1(repr((token, request.url.path, request.url.query, extra)).encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+def cache_headers(etag: Optional[str]) -> dict:
+    return {"ETag": etag, "Cache-Control": "no-cache"} if etag is not None else {}
+
+def not_modified(request: Request, etag: Optional[str]) -> bool:
+    """True if the client's If-None-Match already has this ETag."""
+    if etag is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+async def paginate(fetch, request: Request, reader, after: Optional[int], since_id: Optional[int],
+                   limit: int, row_format: str):
+    """
+    Keyset pagination on id. One row more than the page is fetched to learn whether
+    another page exists; if so its cursor is sent in the X-Next-Cursor header and is
+    passed back as ?after=. since_id is the older name of after.
+
+    The response carries an ETag derived from the reader's change token; a poll
+    with a matching If-None-Match gets a 304 after that single token query.
+
+    format=columns returns {"columns": [...], "rows": [[...], ...]}: the row tuples
+    from the driver are serialized as they are, without a dict per row.
+    """
+    etag = make_etag(await change_token(reader), request)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    headers = cache_headers(etag)
+    cursor = after if after is not None else since_id
+    if row_format == "columns":
+        page = await fetch(since_id=cursor, limit=limit + 1, columnar=True)
+        rows = page.rows
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = str(rows[-1][page.columns.index("id")])
+        return FastJSONResponse({"columns": list(page.columns), "rows": rows}, headers=headers)
+    rows = await fetch(since_id=cursor, limit=limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = str(rows[-1]["id"])
+    return FastJSONResponse(rows, headers=headers)
+
+# Pass after (or since_id): the highest 'id' already received, to get only newer rows
 @router.get("/applog")
-def get_applog(reader = Depends(get_event_reader)):
-    return reader.get_app_logs()
+async def get_applog(
+    request: Request,
+    after: Optional[int] = None,
+    since_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    row_format: str = Query("rows", alias="format", pattern="^(rows|columns)$"),
+    filters: dict = Depends(app_log_filters),
+    reader = Depends(get_event_reader),
+):
+    fetch = lambda **page: call_reader(reader.get_app_logs, **page, **filters)
+    return await paginate(fetch, request, reader, after, since_id, limit, row_format)
 
 @router.get("/events")
-def get_events(reader = Depends(get_event_reader)):
-    return reader.get_events()
+async def get_events(
+    request: Request,
+    after: Optional[int] = None,
+    since_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    row_format: str = Query("rows", alias="format", pattern="^(rows|columns)$"),
+    filters: dict = Depends(event_filters),
+    reader = Depends(get_event_reader),
+):
+    fetch = lambda **page: call_reader(reader.get_events, **page, **filters)
+    return await paginate(fetch, request, reader, after, since_id, limit, row_format)
+
+# Server-Sent Events: 'events', 'applog' and 'summary' (per-status delta) messages as rows
+# are written. Every message id is '<event_id>-<applog_id>'; browsers send it back as
+# Last-Event-ID on reconnect and only the rows after it are replayed.
+@router.get("/live")
+async def live(request: Request, last_event_id: Optional[str] = Header(None), reader = Depends(get_event_reader)):
+    stream = stream_live_updates(
+        request, reader, request.app.state.live_feed,
+        last_event_id=last_event_id,
+        heartbeat=request.app.state.live_heartbeat,
+    )
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/events/clear")
-def clear_events(reader = Depends(get_event_reader)):
+async def clear_events(request: Request, reader = Depends(get_event_reader)):
     logger.debug("Initiating clear_events() via GET /events/clear")
 
     try:
-        reader.clear_events()
+        await call_reader(reader.clear_events)
         logger.info("Successfully cleared all events using %s", reader.__class__.__name__)
+        live_feed = getattr(request.app.state, "live_feed", None)
+        if live_feed is not None:
+            live_feed.reset()
     except Exception as e:
         logger.error("Failed to clear events: %s", str(e))
         raise
 
     return RedirectResponse(url="/events", status_code=303)
 
+# Summary of one run; defaults to the most recently started run
+@router.get("/summary")
+async def get_summary(request: Request, run_id: Optional[str] = None, reader = Depends(get_event_reader)):
+    return await conditional_summary(request, reader, run_id)
+
+async def conditional_summary(request: Request, reader, run_id: Optional[str]):
+    # The ETag depends on the stored rows only and is checked before the summary is built.
+    # elapsed keeps moving during a run without new rows; clients tick it locally or use /elapsed.
+    etag = make_etag(await change_token(reader), request)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    summary = await call_reader(reader.get_summary, run_id=run_id)
+    return FastJSONResponse(summary, headers=cache_headers(etag))
+
+@router.get("/runs")
+async def get_runs(request: Request, reader = Depends(get_event_reader)):
+    etag = make_etag(await change_token(reader), request)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    return FastJSONResponse(await call_reader(reader.get_runs), headers=cache_headers(etag))
+
+@router.get("/runs/{run_id}/events")
+async def get_run_events(
+    request: Request,
+    run_id: str,
+    after: Optional[int] = None,
+    since_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    row_format: str = Query("rows", alias="format", pattern="^(rows|columns)$"),
+    filters: dict = Depends(event_filters),
+    reader = Depends(get_event_reader),
+):
+    fetch = lambda **page: call_reader(reader.get_events, run_id=run_id, **page, **filters)
+    return await paginate(fetch, request, reader, after, since_id, limit, row_format)
+
+@router.get("/runs/{run_id}/applog")
+async def get_run_applog(
+    request: Request,
+    run_id: str,
+    after: Optional[int] = None,
+    since_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    row_format: str = Query("rows", alias="format", pattern="^(rows|columns)$"),
+    filters: dict = Depends(app_log_filters),
+    reader = Depends(get_event_reader),
+):
+    fetch = lambda **page: call_reader(reader.get_app_logs, run_id=run_id, **page, **filters)
+    return await paginate(fetch, request, reader, after, since_id, limit, row_format)
+
+@router.get("/runs/{run_id}/summary")
+async def get_run_summary(run_id: str, request: Request, reader = Depends(get_event_reader)):
+    return await conditional_summary(request, reader, run_id)
+
+# Robot Framework log messages of one test, loaded on demand (e.g. when the dashboard
+# expands a failure). Paged like /events; run_id picks the run, as testids repeat.
+# testid is a path parameter because listener testids may contain "/" (suite paths).
+@router.get("/tests/{testid:path}/logs")
+async def get_test_logs(
+    request: Request,
+    testid: str,
+    run_id: Optional[str] = None,
+    level: Optional[str] = None,
+    after: Optional[int] = None,
+    since_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    row_format: str = Query("rows", alias="format", pattern="^(rows|columns)$"),
+    reader = Depends(get_event_reader),
+):
+    filters = {k: v for k, v in {"run_id": run_id, "level": level}.items() if v is not None}
+    fetch = lambda **page: call_reader(reader.get_rf_logs, testid=testid, **page, **filters)
+    return await paginate(fetch, request, reader, after, since_id, limit, row_format)
+
+# Full-text search in log messages, best match first. q accepts words (all must
+# match) and "quoted phrases"; table is rf_log (Robot Framework log messages) or applog.
+@router.get("/search")
+async def search_logs(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=500),
+    table: str = Query("rf_log", pattern="^(rf_log|applog)$"),
+    limit: int = Query(100, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    level: Optional[str] = None,
+    source: Optional[str] = None,
+    testid: Optional[str] = None,
+    run_id: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    reader = Depends(get_event_reader),
+):
+    filters = {k: v for k, v in {
+        "level": level, "source": source, "testid": testid, "run_id": run_id, "start": start, "end": end,
+    }.items() if v is not None}
+    if table == "rf_log" and source is not None:
+        raise HTTPException(status_code=400, detail="The rf_log table has no source; filter on testid instead")
+    if table == "applog" and testid is not None:
+        raise HTTPException(status_code=400, detail="The applog table has no testid; filter on source instead")
+
+    etag = make_etag(await change_token(reader), request)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    headers = cache_headers(etag)
+    # Ranked results are paged by offset; one extra row tells whether there is a next page
+    rows = await call_reader(reader.search_logs, table, q, limit=limit + 1, offset=offset, **filters)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Offset"] = str(offset + limit)
+    return FastJSONResponse(rows, headers=headers)
+
+# Metric samples aggregated in SQL per metric_name and source into time buckets of
+# `bucket` seconds (widened when a series would exceed max_points); each point is
+# [time, min, avg, max, last, samples].
+@router.get("/metrics")
+async def get_metrics(
+    request: Request,
+    bucket: int = Query(60, ge=1, le=86400),
+    max_points: int = Query(DEFAULT_METRIC_POINTS, ge=1, le=MAX_METRIC_POINTS),
+    metric_name: Optional[str] = None,
+    source: Optional[str] = None,
+    run_id: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    reader = Depends(get_event_reader),
+):
+    filters = {k: v for k, v in {
+        "metric_name": metric_name, "source": source, "run_id": run_id, "start": start, "end": end,
+    }.items() if v is not None}
+    etag = make_etag(await change_token(reader), request)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    metrics = await call_reader(reader.get_metrics, bucket_seconds=bucket, max_points=max_points, **filters)
+    return FastJSONResponse(metrics, headers=cache_headers(etag))
+
 @router.get("/elapsed")
-def get_elapsed_time(reader = Depends(get_event_reader)):
-    start_event = next((e for e in reader.get_events() if e['event_type'] == 'start_suite'), None)
-    if not start_event:
-        return {"elapsed": "00:00:00"}
+async def get_elapsed_time(reader = Depends(get_event_reader)):
+    summary = await call_reader(reader.get_summary)
+    return {"elapsed": summary["elapsed"]}
 
-    start_ts = datetime.fromisoformat(start_event["starttime"])
-    now = datetime.now(timezone.utc)
-    elapsed = now - start_ts
-    return {"elapsed": str(elapsed).split('.')[0]}
+# Connection pool and response cache statistics of the reader (null where the reader has none)
+@router.get("/stats")
+async def get_stats(reader = Depends(get_event_reader)):
+    pool_stats = getattr(reader, "pool_stats", None)
+    cache_stats = getattr(reader, "cache_stats", None)
+    return {
+        "reader": reader.__class__.__name__,
+        "pool": pool_stats() if pool_stats is not None else None,
+        "cache": cache_stats() if cache_stats is not None else None,
+    }
 
 @router.get("/")
-def index():
+async def index():
     return {"message": "RealtimeResults API is running", "endpoints": ["/events", "/event (POST)"]}
 
 @router.get("/favicon.ico")
-def favicon():
+async def favicon():
     return Response(status_code=204)
 
@@ -0,0 +1,106 @@
+# api/viewer/static.py
+# Serves the dashboard with fingerprinted, precompressed assets.
+
+import hashlib
+import mimetypes
+import os
+from collections import namedtuple
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.staticfiles import StaticFiles
+
+from api.viewer.compression import SUPPORTED_ENCODINGS, compress_bytes, negotiate_encoding
+
+# Served from memory: content type, ETag, Cache-Control and the body per content coding
+Asset = namedtuple("Asset", ["media_type", "etag", "cache_control", "bodies"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Compressing tiny files only costs the client a decode
+MIN_COMPRESS_SIZE = 256
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    """dashboard.js -> dashboard.<hash>.js, with a hash of the content."""
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+class DashboardFiles(StaticFiles):
+    """
+    StaticFiles for the dashboard that loads the directory once at startup.
+
+    Every asset except the HTML pages gets a content-hashed name (dashboard.js ->
+    dashboard.<hash>.js) and the pages are rewritten to reference those names, so
+    the assets can be cached for a year while a new release is still picked up:
+    pages are served with no-cache and an ETag. Each file is also gzip- (and, when
+    installed, brotli-) compressed once, and the best variant for the client's
+    Accept-Encoding is sent. Unknown paths fall back to regular StaticFiles.
+    """
+
+    def __init__(self, *, directory: str, prefix: str = "/dashboard", html: bool = True):
+        super().__init__(directory=directory, html=html)
+        self.prefix = prefix.rstrip("/")
+        self.assets = self._load(directory)
+
+    def _load(self, directory):
+        files = {}
+        for entry in sorted(os.listdir(directory)):
+            path = os.path.join(directory, entry)
+            if os.path.isfile(path) and not entry.endswith((".py", ".pyc")):
+                with open(path, "rb") as f:
+                    files[entry] = f.read()
+
+        renamed = {name: fingerprint(name, content) for name, content in files.items()
+                   if not name.endswith(".html")}
+        assets = {}
+        for name, content in files.items():
+            if name.endswith(".html"):
+                for original, hashed in renamed.items():
+                    content = content.replace(
+                        f'"{self.prefix}/{original}"'.encode(), f'"{self.prefix}/{hashed}"'.encode()
+                    )
+                assets[name] = self._asset(name, content, REVALIDATE)
+            else:
+                # The original name stays available (revalidated) for anything linking to it directly
+                assets[renamed[name]] = self._asset(name, content, IMMUTABLE)
+                assets[name] = self._asset(name, content, REVALIDATE)
+        return assets
+
+    @staticmethod
+    def _asset(name, content, cache_control):
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        bodies = {"identity": content}
+        if len(content) >= MIN_COMPRESS_SIZE:
+            for encoding in SUPPORTED_ENCODINGS:
+                compressed = compress_bytes(content, encoding)
+                if len(compressed) < len(content):
+                    bodies[encoding] = compressed
+        etag = '"' + hashlib.sha256(content).hexdigest()[:20] + '"'
+        return Asset(media_type, etag, cache_control, bodies)
+
+    async def get_response(self, path: str, scope) -> Response:
+        name = path.replace(os.sep, "/").strip("/")
+        if name in ("", ".") and self.html:
+            name = "index.html"
+        asset = self.assets.get(name)
+        if asset is None:
+            return await super().get_response(path, scope)
+        if scope["method"] not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405)
+
+        request_headers = Headers(scope=scope)
+        headers = {"ETag": asset.etag, "Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+        if asset.etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        encoding = negotiate_encoding(
+            request_headers.get("accept-encoding", ""),
+            [coding for coding in SUPPORTED_ENCODINGS if coding in asset.bodies],
+        )
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(asset.bodies[encoding or "identity"], media_type=asset.media_type, headers=headers)
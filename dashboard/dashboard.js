@@ -0,0 +1,272 @@
+let chart;
+
+function updateLogMessages(events) {
+    const logContainer = document.getElementById("logMessages");
+
+    const logs = events.map(e => {
+        const date = e.endtime ?? "";
+        const level = e.level ?? "";
+        const type = e.event_type ?? "";
+        const msg = e.message ?? "";
+        return `${date} | ${level} | ${type} | ${msg}`;
+    }).join('\n');
+
+    logContainer.textContent = logs;
+}
+
+// App logs received so far over the /live stream. Counts, failures, progress
+// and elapsed time come from the server-side /summary.
+let allAppLogs = [];
+let summaryPending = false;
+let summaryStale = false;
+
+async function clearEvents() {
+    const response = await fetch("/events/clear");
+    if (response.ok) {
+        // The server answers with a 'reset' message on the live stream
+        console.log("Events cleared");
+    } else {
+        console.error("Failed to clear events");
+    }
+}
+
+function updateChartData(data) {
+    const counts = Object.values(data);
+    const maxCount = Math.max(...counts);
+    const newMax = Math.ceil((maxCount + 1) / 5) * 5;
+
+    chart.data.labels = Object.keys(data);
+    chart.data.datasets[0].data = counts;
+
+    chart.options.scales.y = {
+        min: 0,
+        max: newMax,
+        ticks: {
+            precision: 0,
+            stepSize: 1
+        }
+    };
+
+    chart.update();
+}
+
+// Log messages of failed tests, fetched from /tests/{testid}/logs only when a
+// failure row is expanded, and kept per run and test: a failed test is finished,
+// so its messages do not change.
+const TEST_LOG_PAGE_SIZE = 200;
+const testLogs = new Map();
+const expandedTests = new Set();
+let summaryRunId = null;
+let currentFailures = [];
+
+function testLogKey(testid) {
+    return `${summaryRunId ?? ""}|${testid}`;
+}
+
+async function loadTestLogs(testid, after) {
+    const key = testLogKey(testid);
+    const entry = testLogs.get(key) ?? { rows: [], next: null, loading: false, error: false };
+    if (entry.loading) return;
+    entry.loading = true;
+    entry.error = false;
+    testLogs.set(key, entry);
+
+    const params = new URLSearchParams({ limit: TEST_LOG_PAGE_SIZE });
+    if (summaryRunId) params.set("run_id", summaryRunId);
+    if (after) params.set("after", after);
+    try {
+        const response = await fetch(`/tests/${encodeURIComponent(testid)}/logs?${params}`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        entry.rows = entry.rows.concat(await response.json());
+        entry.next = response.headers.get("X-Next-Cursor");
+    } catch (error) {
+        console.error("Failed to load log messages", error);
+        entry.error = true;
+    } finally {
+        entry.loading = false;
+        updateFailTable(currentFailures);
+    }
+}
+
+function toggleTestLogs(testid) {
+    const key = testLogKey(testid);
+    if (expandedTests.has(key)) {
+        expandedTests.delete(key);
+    } else {
+        expandedTests.add(key);
+        const entry = testLogs.get(key);
+        if (!entry || entry.error) loadTestLogs(testid);
+    }
+    updateFailTable(currentFailures);
+}
+
+function testLogCell(testid) {
+    const cell = document.createElement("td");
+    cell.colSpan = 4;
+    const entry = testLogs.get(testLogKey(testid));
+    if (!entry || (entry.loading && entry.rows.length === 0)) {
+        cell.textContent = "Logberichten laden…";
+        return cell;
+    }
+    if (entry.error && entry.rows.length === 0) {
+        cell.textContent = "(logberichten konden niet worden geladen)";
+        return cell;
+    }
+
+    const log = document.createElement("pre");
+    log.className = "test-log";
+    log.textContent = entry.rows.length
+        ? entry.rows.map(l => `${l.timestamp ?? ""} | ${l.level ?? ""} | ${l.message ?? ""}`).join("\n")
+        : "(geen logberichten)";
+    cell.appendChild(log);
+
+    if (entry.next) {
+        const more = document.createElement("button");
+        more.className = "test-log-more";
+        more.textContent = entry.loading ? "Laden…" : "Meer laden";
+        more.disabled = entry.loading;
+        more.addEventListener("click", () => loadTestLogs(testid, entry.next));
+        cell.appendChild(more);
+    }
+    return cell;
+}
+
+function updateFailTable(failures) {
+    currentFailures = failures;
+    const tableBody = document.querySelector("#failTable tbody");
+    tableBody.innerHTML = "";
+
+    for (const fail of failures) {
+        const row = document.createElement("tr");
+        row.className = "fail-row";
+        row.title = "Klik voor de logberichten van deze test";
+        row.addEventListener("click", () => toggleTestLogs(fail.testid));
+
+        const timeCell = document.createElement("td");
+        timeCell.textContent = fail.endtime || "(geen tijd)";
+
+        const nameCell = document.createElement("td");
+        nameCell.textContent = fail.name;
+
+        const suiteCell = document.createElement("td");
+        suiteCell.textContent = fail.suite || "(onbekend)";
+
+        const msgCell = document.createElement("td");
+        msgCell.textContent = fail.message || "(geen foutmelding)";
+
+        row.appendChild(timeCell);
+        row.appendChild(nameCell);
+        row.appendChild(suiteCell);
+        row.appendChild(msgCell);
+        tableBody.appendChild(row);
+
+        if (fail.testid && expandedTests.has(testLogKey(fail.testid))) {
+            const logRow = document.createElement("tr");
+            logRow.className = "test-log-row";
+            logRow.appendChild(testLogCell(fail.testid));
+            tableBody.appendChild(logRow);
+        }
+    }
+}
+
+function initChart() {
+    const data = { PASS: 0, FAIL: 0, SKIP: 0 };
+
+    const ctx = document.getElementById("statusChart").getContext("2d");
+    chart = new Chart(ctx, {
+        type: "bar",
+        data: {
+            labels: Object.keys(data),
+            datasets: [{
+                label: "Aantal tests per status",
+                data: Object.values(data),
+                backgroundColor: ["green", "red", "gray"]
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,  // <- cruciaal
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    ticks: {
+                        precision: 0,
+                        stepSize: 1
+                    }
+                }
+            }
+        }
+    });
+}
+
+let suiteStartTime = null;
+let suiteEndTime = null;
+
+function updateProgress(summary) {
+    const display = document.getElementById("progress-display");
+    display.textContent = summary.totaltests
+        ? `${summary.done} / ${summary.totaltests} (${Math.round(summary.progress * 100)}%)`
+        : `${summary.done}`;
+}
+
+async function refreshSummary() {
+    // Several stream messages can arrive at once: keep one request in
+    // flight and fetch once more afterwards if anything changed meanwhile
+    if (summaryPending) {
+        summaryStale = true;
+        return;
+    }
+    summaryPending = true;
+    summaryStale = false;
+    try {
+        const response = await fetch("/summary");
+        const summary = await response.json();
+        updateChartData(summary.counts);
+        summaryRunId = summary.run_id;
+        updateFailTable(summary.failures);
+        updateProgress(summary);
+        suiteStartTime = summary.starttime ? new Date(summary.starttime) : null;
+        suiteEndTime = summary.finished ? new Date(summary.endtime) : null;
+        updateElapsedTime();
+    } finally {
+        summaryPending = false;
+        if (summaryStale) refreshSummary();
+    }
+}
+
+function updateElapsedTime() {
+    const display = document.getElementById("elapsed-display");
+    if (!suiteStartTime) {
+        display.textContent = "—";
+        return;
+    }
+
+    const now = suiteEndTime ? suiteEndTime : new Date();
+    const seconds = Math.floor((now - suiteStartTime) / 1000);
+    display.textContent = `${seconds}s`;
+}
+
+function connectLiveStream() {
+    // EventSource reconnects by itself and sends Last-Event-ID,
+    // so only rows written while disconnected are replayed.
+    const source = new EventSource("/live");
+
+    // Sent along with every batch of new events
+    source.addEventListener("summary", refreshSummary);
+
+    source.addEventListener("applog", (msg) => {
+        allAppLogs = allAppLogs.concat(JSON.parse(msg.data));
+        updateLogMessages(allAppLogs);
+    });
+
+    source.addEventListener("reset", () => {
+        testLogs.clear();
+        expandedTests.clear();
+        refreshSummary();
+    });
+}
+
+initChart();
+refreshSummary();
+connectLiveStream();
+setInterval(updateElapsedTime, 1000);
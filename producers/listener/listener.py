@@ -1,10 +1,13 @@
 ## realtimeresults/listener.py
 import logging
+import uuid
 from shared.helpers.config_loader import load_config
 from shared.helpers.logger import setup_root_logging
 from shared.sinks.http import HttpSink
 from shared.sinks.loki import LokiSink
 from shared.sinks.sqlite import SqliteSink
+from shared.sinks.queued import QueuedSink
+from shared.sinks.spool import DiskSpool
 from datetime import datetime, timezone
 
 config = load_config()
@@ -48,6 +51,8 @@ class RealTimeResults:
 
         self.listener_sink_type = self.config.get("listener_sink_type", "none").lower()
         self.total_tests = int(cli_config.get("totaltests", 0))
+        # Identifies this test run on every event; pass run_id=... to the listener to choose one (e.g. a CI build id)
+        self.run_id = cli_config.get("run_id") or uuid.uuid4().hex
         self.current_test_id = None
         endpoint = ""
         try:
@@ -55,12 +60,31 @@ class RealTimeResults:
                 host = self.config.get("ingest_client_host", self.config.get("ingest_backend_host", "127.0.0.1"))
                 port = self.config.get("ingest_client_port", self.config.get("ingest_backend_port", "8001"))
                 endpoint = f"http://{host}:{port}"
-                self.sink = HttpSink(endpoint=endpoint)
+                # Optional on-disk spool, so events survive an ingest restart
+                spool = None
+                if self.config.get("listener_spool_dir"):
+                    spool = DiskSpool(
+                        self.config["listener_spool_dir"],
+                        max_bytes=float(self.config.get("listener_spool_max_mb", 100)) * 1024 * 1024,
+                        segment_bytes=float(self.config.get("listener_spool_segment_mb", 4)) * 1024 * 1024,
+                    )
+                self.sink = HttpSink(
+                    endpoint=endpoint,
+                    batch_size=int(self.config.get("listener_batch_size", 200)),
+                    batch_linger=float(self.config.get("listener_batch_linger_ms", 50)) / 1000,
+                    pool_size=int(self.config.get("http_pool_size", 10)),
+                    spool=spool,
+                    health_check_interval=float(self.config.get("listener_spool_health_interval", 5.0)),
+                )
 
             elif self.listener_sink_type == "sqlite":
                 database_url = self.config.get("database_url", "none")
                 if database_url.startswith("sqlite:///"):
-                    self.sink = SqliteSink(database_url=database_url)
+                    self.sink = SqliteSink(
+                        database_url=database_url,
+                        batch_size=int(self.config.get("sqlite_batch_size", 200)),
+                        flush_interval=float(self.config.get("sqlite_flush_interval_ms", 250)) / 1000,
+                    )
                 else:
                     raise ValueError(f"Unsupported database_url for sync: {database_url}")
 
@@ -76,9 +100,24 @@ class RealTimeResults:
             self.logger.warning(f"[Sink initialisatie failed ({e}), no sink selected.")
             self.sink = None
 
+        # Hand events to the sink from a background thread so the test run never waits on I/O.
+        # A queue size of 0 disables the queue and sends events inline.
+        queue_size = int(self.config.get("listener_queue_size", 10000))
+        if self.sink is not None and queue_size > 0:
+            try:
+                self.sink = QueuedSink(
+                    self.sink,
+                    max_size=queue_size,
+                    overflow_policy=self.config.get("listener_queue_overflow_policy", "drop_oldest"),
+                    flush_timeout=float(self.config.get("listener_queue_flush_timeout", 10.0)),
+                )
+            except ValueError as e:
+                self.logger.warning(f"Invalid listener queue configuration ({e}), sending events inline.")
+
     def _send_event(self, event_type, **kwargs):
         event = {
             "event_type": event_type,
+            "run_id": self.run_id,
             **kwargs
             }
          
@@ -110,7 +149,7 @@ class RealTimeResults:
             endtime=to_iso_utc(result.endtime),
             name=data.name,
             longname=data.longname,
-            suite=data.longname.split('.')[0],
+            suite=".".join(data.longname.split(".")[:-1]),
             tags=[str(tag) for tag in data.tags]
         )
 
@@ -153,6 +192,14 @@ class RealTimeResults:
             statistics=str(result.statistics)
         )
 
+    def close(self):
+        # Called by Robot Framework when the whole execution ends: deliver the last queued events
+        if self.sink is not None:
+            try:
+                self.sink.close()
+            except Exception as e:
+                self.logger.error(f"Closing sink failed: {e}")
+
     def _parse_config(self, config_str):
         # Simple string parsing: ":key1=value1;key2=value2"
         config = {}
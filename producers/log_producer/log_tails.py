@@ -40,25 +40,42 @@ def group_log_lines(lines: list[str], tz_info: str) -> list[tuple[str, str]]:
 
     return grouped
 
+def build_log_payload(message: str, source_label: str, event_type: str, tz_info: str, timestamp_override: str) -> dict:
+    _, log_level, cleaned_message = extract_timestamp_and_clean_message(message, tz_info=tz_info)
+    if isinstance(cleaned_message, tuple):
+        cleaned_message = " ".join(cleaned_message)
+
+    return {
+        "timestamp": timestamp_override,
+        "event_type": event_type,
+        "message": cleaned_message,
+        "source": source_label,
+        "level": log_level
+    }
+
 async def post_log(message: str, source_label: str, event_type: str, tz_info: str, sink: AsyncHttpSink, timestamp_override: str):
     try:
-        _, log_level, cleaned_message = extract_timestamp_and_clean_message(message, tz_info=tz_info)
-        if isinstance(cleaned_message, tuple):
-            cleaned_message = " ".join(cleaned_message)
-
-        payload = {
-            "timestamp": timestamp_override,
-            "event_type": event_type,
-            "message": cleaned_message,
-            "source": source_label,
-            "level": log_level
-        }
-
+        payload = build_log_payload(message, source_label, event_type, tz_info, timestamp_override)
         logger.debug(f"[{source_label}] Payload: {payload}")
         await sink.async_handle_event(payload)
     except Exception as e:
         logger.exception(f"[{source_label}] Failed to send log: {e}")
 
+async def post_logs(grouped: list[tuple[str, str]], source_label: str, event_type: str, tz_info: str, sink: AsyncHttpSink):
+    """Send all log groups found in one poll; a backlog goes out as a single streamed request."""
+    payloads = []
+    for message, timestamp in grouped:
+        if not timestamp:
+            logger.warning(f"[{source_label}] Skipping group without timestamp:\n{message}")
+            continue
+        try:
+            payloads.append(build_log_payload(message, source_label, event_type, tz_info, timestamp))
+        except Exception as e:
+            logger.exception(f"[{source_label}] Failed to parse log: {e}")
+
+    logger.debug(f"[{source_label}] Sending {len(payloads)} payloads")
+    await sink.async_handle_events(payloads)
+
 async def tail_log_file(source: dict, sink: AsyncHttpSink):
     log_path = Path(source["path"])
     label = source.get("label", "unknown")
@@ -94,11 +111,7 @@ async def tail_log_file(source: dict, sink: AsyncHttpSink):
                     grouped = group_log_lines(new_lines, tz_info=tz_info)
                     logger.debug(f"[{label}] Grouped {len(grouped)} events from {len(new_lines)} lines")
 
-                    for message, timestamp in grouped:
-                        if not timestamp:
-                            logger.warning(f"[{label}] Skipping group without timestamp:\n{message}")
-                            continue
-                        await post_log(message, label, event_type, tz_info, sink, timestamp_override=timestamp)
+                    await post_logs(grouped, label, event_type, tz_info, sink)
 
             else:
                 logger.debug(f"[{label}] No new data (size={size})")
@@ -118,22 +131,26 @@ async def main():
     ingest_endpoint = f"http://{ingest_host}:{ingest_port}"
     logger.info(f"Using ingest endpoint: {ingest_endpoint}")
 
-    # Create one sink instance; reuse it for all events
-    sink = AsyncHttpSink(endpoint=ingest_endpoint)
-
     sources = config.get("source_log_tails", [])
     if not sources:
         logger.error("No 'source_log_tails' defined in config.")
         sys.exit(10)
 
-    async def safe_tail(source):
-        try:
-            await tail_log_file(source, sink)
-        except Exception as e:
-            logger.exception(f"Error in source '{source.get('label', 'unknown')}': {e}")
-
-    tasks = [asyncio.create_task(safe_tail(source)) for source in sources]
-    await asyncio.gather(*tasks, return_exceptions=True)
+    # Create one sink instance; all sources share its connection pool for the whole run
+    async with AsyncHttpSink(
+        endpoint=ingest_endpoint,
+        pool_size=int(config.get("http_pool_size", 10)),
+        http2=str(config.get("http2", False)).lower() in ("1", "true", "yes"),
+    ) as sink:
+
+        async def safe_tail(source):
+            try:
+                await tail_log_file(source, sink)
+            except Exception as e:
+                logger.exception(f"Error in source '{source.get('label', 'unknown')}': {e}")
+
+        tasks = [asyncio.create_task(safe_tail(source)) for source in sources]
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 if __name__ == "__main__":
     try:
@@ -64,18 +64,22 @@ async def main():
 
     logger.info("Starting metric scraper. Ingest endpoint: %s", endpoint)
 
-    # Create one sink instance; reuse it for all events
-    sink = AsyncHttpSink(endpoint=endpoint, timeout=2.0)
-
-    while True:
-        metrics = collect_metrics()
-
-        # Dispatch each metric via the sink (await to keep back‑pressure)
-        for metric in metrics:
-            await sink._async_handle_event(metric)  # uses dispatch_map internally
-
-        logger.info("Sent metrics: %s", metrics)
-        await asyncio.sleep(INTERVAL)
+    # Create one sink instance; reuse its connection pool for all events
+    async with AsyncHttpSink(
+        endpoint=endpoint,
+        timeout=2.0,
+        pool_size=int(config.get("http_pool_size", 10)),
+        http2=str(config.get("http2", False)).lower() in ("1", "true", "yes"),
+    ) as sink:
+        while True:
+            metrics = collect_metrics()
+
+            # Dispatch each metric via the sink (await to keep back‑pressure)
+            for metric in metrics:
+                await sink.async_handle_event(metric)  # uses route_map internally
+
+            logger.info("Sent metrics: %s", metrics)
+            await asyncio.sleep(INTERVAL)
 
 
 if __name__ == "__main__":
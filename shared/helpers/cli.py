@@ -44,6 +44,8 @@ def parse_args():
             "  --runservice NAME    Start a single backend service (viewer, ingest, combined)\n"
             "  --config PATH        Use a custom config file\n"
             "  --killbackend        Stop all backend services\n"
+            "  --rebuild-counters   Recompute the run counters from the stored events\n"
+            "  --compact-metrics    Fold old metric samples into the 1m/1h rollup tables\n"
             "\n"
             "All other arguments are passed to Robot Framework.\n"
             "Examples:\n"
@@ -223,6 +225,30 @@ def main():
         logger.setLevel(getattr(logging, lvl.upper(), logging.INFO))
 
 
+    # The database helpers are imported here, not at the top: importing them loads
+    # sql_definitions, which caches the config, and that must be the one from --config
+    if "--rebuild-counters" in sys.argv:
+        from shared.helpers.ensure_db_schema import ensure_schema
+        from shared.helpers.run_counters import rebuild_run_counters
+        database_url = config.get("database_url", "sqlite:///eventlog.db")
+        ensure_schema(database_url)
+        count = rebuild_run_counters(database_url)
+        logger.info(f"Rebuilt run counters for {count} suite(s) in {database_url}")
+        sys.exit(0)
+
+    if "--compact-metrics" in sys.argv:
+        from shared.helpers.ensure_db_schema import ensure_schema
+        from shared.helpers.metric_rollups import compact_metrics
+        database_url = config.get("database_url", "sqlite:///eventlog.db")
+        ensure_schema(database_url)
+        counts = compact_metrics(
+            database_url,
+            raw_retention_hours=float(config.get("metrics_raw_retention_hours", 24)),
+            minute_retention_days=float(config.get("metrics_minute_retention_days", 7)),
+        )
+        logger.info(f"Compacted {counts['raw_deleted']} metric sample(s) in {database_url}")
+        sys.exit(0)
+
     # set up environment variable for config path
     env = os.environ.copy()
     env["REALTIME_RESULTS_CONFIG"] = str(config_path)
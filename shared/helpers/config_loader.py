@@ -50,7 +50,21 @@ def load_config(path: Union[str, Path, None] = None, override_with_env: bool = T
             "ingest_backend_host", "ingest_backend_port", 
             "ingest_client_host", "ingest_client_port", 
             "enable_autoservices", "log_level", "log_level_cli", 
-            "log_level_listener", "loki_endpoint"
+            "log_level_listener", "loki_endpoint",
+            "listener_queue_size", "listener_queue_overflow_policy", "listener_queue_flush_timeout",
+            "listener_batch_size", "listener_batch_linger_ms",
+            "http_pool_size", "http2",
+            "listener_spool_dir", "listener_spool_max_mb", "listener_spool_segment_mb",
+            "listener_spool_health_interval",
+            "sqlite_batch_size", "sqlite_flush_interval_ms",
+            "ingest_flush_size", "ingest_flush_interval_ms", "ingest_max_queue_size",
+            "ingest_max_in_flight", "ingest_max_waiting", "ingest_admission_timeout",
+            "ingest_max_queue_depth", "ingest_retry_after",
+            "viewer_live_poll_interval_ms", "viewer_live_heartbeat", "viewer_live_backlog",
+            "viewer_db_pool_size", "viewer_db_pool_min_size", "viewer_db_pool_max_idle",
+            "viewer_db_pool_max_lifetime", "viewer_db_pool_health_check_interval", "viewer_db_pool_timeout",
+            "viewer_cache_size", "viewer_compression_min_size", "viewer_compression_level",
+            "metrics_compaction_interval", "metrics_raw_retention_hours", "metrics_minute_retention_days",
         ]
         
         # Check ALL known keys + any existing config keys
@@ -1,49 +1,128 @@
-import inspect
+import asyncio
+import logging
 import sqlite3
-import aiosqlite
+from datetime import datetime, timezone
 import psycopg2
-import asyncpg
-from shared.helpers.config_loader import load_config
 import shared.helpers.sql_definitions as sql_definitions
+from shared.helpers.migrations import MIGRATIONS, LATEST_VERSION, AddColumns, PerDialect
+
+logger = logging.getLogger("rt.schema")
+
+# Key for pg_advisory_xact_lock, so the viewer and ingest API never migrate concurrently
+POSTGRES_MIGRATION_LOCK = 7_301_001
+
+
+def is_postgres_url(database_url: str) -> bool:
+    return database_url.startswith(("postgresql://", "postgres://"))
 
-def get_create_statements():
-    """
-    Extracts all SQL CREATE statements from the sql_definitions module.
-    This function assumes that all CREATE statements are defined as string constants
-    and prefixed with 'CREATE_'.
-    """
-    return [
-        value for name, value in inspect.getmembers(sql_definitions)
-        if name.startswith("CREATE_") and isinstance(value, str)
-    ]
 
 def ensure_schema(database_url):
-    if database_url.startswith("postgresql://"):
-        conn = psycopg2.connect(database_url)
-        try:
-            with conn:
-                with conn.cursor() as cursor:
-                    for statement in get_create_statements():
-                        cursor.execute(statement)
-        finally:
-            conn.close()
+    """
+    Bring the database up to the latest schema version.
+
+    The current version is read from schema_version first; when it is already
+    current, no DDL runs at all. Otherwise each pending migration is applied in its
+    own transaction together with its schema_version row, under a lock, so two
+    processes starting at the same time do not both migrate.
+    """
+    if is_postgres_url(database_url):
+        _ensure_postgres_schema(database_url)
     else:
-        with sqlite3.connect(database_url.replace("sqlite:///", "")) as conn:
-            cursor = conn.cursor()
-            for statement in get_create_statements():
-                cursor.execute(statement)
-            conn.commit()
+        _ensure_sqlite_schema(database_url.replace("sqlite:///", "", 1))
+
 
 async def async_ensure_schema(database_url):
-    if database_url.startswith("postgresql://"):
-        conn = await asyncpg.connect(database_url)
+    """ensure_schema for async callers; migrations run rarely, so a worker thread is fine."""
+    await asyncio.to_thread(ensure_schema, database_url)
+
+
+def _pending(version):
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def _record(cursor, migration, param):
+    cursor.execute(
+        f"INSERT INTO schema_version (version, description, applied_at) VALUES ({param}, {param}, {param})",
+        (migration.version, migration.description, datetime.now(timezone.utc).isoformat()),
+    )
+    logger.info("Applied schema migration %d: %s", migration.version, migration.description)
+
+
+# --- SQLite ---
+
+def _sqlite_version(conn) -> int:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def _ensure_sqlite_schema(database_path):
+    conn = sqlite3.connect(database_path)
+    conn.isolation_level = None  # explicit transactions, so DDL is transactional too
+    try:
+        if _sqlite_version(conn) >= LATEST_VERSION:
+            return
+        # BEGIN IMMEDIATE takes the write lock; re-read the version once we hold it
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            for statement in get_create_statements():
-                await conn.execute(statement)
-        finally:
-            await conn.close()
-    else:
-        async with aiosqlite.connect(database_url) as db:
-            for statement in get_create_statements():
-                await db.execute(statement)
-            await db.commit()
+            conn.execute(sql_definitions.CREATE_SCHEMA_VERSION_TABLE)
+            for migration in _pending(_sqlite_version(conn)):
+                for step in migration.steps:
+                    if isinstance(step, AddColumns):
+                        existing = {row[1].lower() for row in conn.execute(f"PRAGMA table_info({step.table})")}
+                        for name, dtype in step.columns:
+                            if name.lower() not in existing:
+                                conn.execute(f"ALTER TABLE {step.table} ADD COLUMN {name} {dtype}")
+                    elif isinstance(step, PerDialect):
+                        for statement in step.sqlite:
+                            conn.execute(statement)
+                    else:
+                        conn.execute(step)
+                _record(conn.cursor(), migration, "?")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+# --- PostgreSQL ---
+
+def _postgres_version(cursor) -> int:
+    cursor.execute("SELECT to_regclass('schema_version')")
+    if cursor.fetchone()[0] is None:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def _ensure_postgres_schema(database_url):
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                if _postgres_version(cursor) >= LATEST_VERSION:
+                    return
+        for migration in MIGRATIONS:
+            with conn:  # one transaction per migration
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (POSTGRES_MIGRATION_LOCK,))
+                    cursor.execute(sql_definitions.CREATE_SCHEMA_VERSION_TABLE)
+                    if _postgres_version(cursor) >= migration.version:
+                        continue  # applied by us earlier or by another process meanwhile
+                    for step in migration.steps:
+                        if isinstance(step, AddColumns):
+                            for name, dtype in step.columns:
+                                cursor.execute(f"ALTER TABLE {step.table} ADD COLUMN IF NOT EXISTS {name} {dtype}")
+                        elif isinstance(step, PerDialect):
+                            for statement in step.postgres:
+                                cursor.execute(statement)
+                        else:
+                            cursor.execute(step)
+                    _record(cursor, migration, "%s")
+    finally:
+        conn.close()
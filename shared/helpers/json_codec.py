@@ -0,0 +1,38 @@
+# shared/helpers/json_codec.py
+# JSON encoding/decoding for the hot paths (ingest request bodies, viewer responses).
+#
+# Uses orjson when it is installed (pip install robotframework-realtimeresults[fast-json]),
+# which parses and serializes several times faster than the standard library;
+# otherwise falls back to the json module with the same behaviour.
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    # Values the encoders do not know natively (e.g. Decimal from PostgreSQL) are sent as strings
+    return str(value)
+
+
+if orjson is not None:
+    def loads(data):
+        """Parse JSON from bytes or str. Raises ValueError on invalid input."""
+        return orjson.loads(data)
+
+    def dumps(value) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes."""
+        return orjson.dumps(value, default=_default)
+else:
+    def loads(data):
+        """Parse JSON from bytes or str. Raises ValueError on invalid input."""
+        return json.loads(data)
+
+    def dumps(value) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes."""
+        return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,205 @@
+# shared/helpers/metric_rollups.py
+# Compaction of the metrics table into the rollup tables (see
+# sql_definitions.METRIC_ROLLUP_TABLES).
+#
+# Raw samples older than the raw retention are aggregated into metrics_1m and
+# metrics_1h and deleted in the same transaction, so the viewer can add the raw
+# rows and one rollup table together without counting a sample twice. Per-minute
+# rollups older than their own retention are deleted too; hourly ones are kept.
+#
+# The work is split into one short transaction per hour of raw samples (and per
+# batch of expired minute rollups), so the ingest writer never waits long for
+# SQLite's write lock. Every transaction that changes the tables also adds a row
+# to metric_compactions, which the viewer's change token watches.
+
+import asyncio
+import logging
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import psycopg2
+import shared.helpers.sql_definitions as sql_definitions
+from shared.helpers.ensure_db_schema import is_postgres_url
+
+logger = logging.getLogger("rt.metrics")
+
+ROLLUP_COLUMNS = ", ".join(name for name, _ in sql_definitions.metric_rollup_columns)
+
+
+def _bucket_start(dialect: str, seconds: int) -> str:
+    """SQL expression for the UTC start of the minute or hour of the timestamp column, as ISO text."""
+    if dialect == "postgres":
+        unit = "hour" if seconds == 3600 else "minute"
+        return (f"to_char(date_trunc('{unit}', CAST(timestamp AS timestamptz) AT TIME ZONE 'UTC'), "
+                f"'YYYY-MM-DD\"T\"HH24:MI:SS\"+00:00\"')")
+    pattern = "%Y-%m-%dT%H:00:00+00:00" if seconds == 3600 else "%Y-%m-%dT%H:%M:00+00:00"
+    return f"strftime('{pattern}', timestamp)"
+
+
+def rollup_query(dialect: str, param: str, table: str) -> str:
+    """INSERT ... SELECT aggregating the raw samples before the cutoff (the only parameter) into table."""
+    bucket = _bucket_start(dialect, sql_definitions.METRIC_ROLLUP_TABLES[table])
+    return f"""
+INSERT INTO {table} ({ROLLUP_COLUMNS})
+SELECT b.bucket, b.metric_name, b.source, b.unit, b.run_id, b.samples, b.total, b.min_value, b.max_value, m.value
+FROM (
+    SELECT
+        {bucket} AS bucket,
+        metric_name,
+        source,
+        MAX(unit) AS unit,
+        run_id,
+        COUNT(*) AS samples,
+        SUM(value) AS total,
+        MIN(value) AS min_value,
+        MAX(value) AS max_value,
+        MAX(id) AS last_id
+    FROM metrics
+    WHERE timestamp < {param}
+    GROUP BY {bucket}, metric_name, source, run_id
+) b
+JOIN metrics m ON m.id = b.last_id
+"""
+
+
+def _cutoffs(now, raw_retention_hours, minute_retention_days):
+    # Cutoffs are whole hours, so no minute or hour bucket is split between two compactions
+    hour = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    raw_cutoff = hour - timedelta(hours=raw_retention_hours)
+    minute_cutoff = hour - timedelta(days=minute_retention_days)
+    return raw_cutoff.isoformat(), minute_cutoff.isoformat()
+
+
+# Expired per-minute rollups are deleted this many rows per transaction
+MINUTE_DELETE_BATCH = 5000
+
+
+def _hour_after(timestamp, limit):
+    """The whole UTC hour following the hour timestamp falls in, but no later than limit."""
+    try:
+        start = datetime.fromisoformat(timestamp).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    except (TypeError, ValueError):
+        return limit
+    return min((start + timedelta(hours=1)).isoformat(), limit)
+
+
+def _log_compaction(cursor, param, bucket_end, written, deleted):
+    cursor.execute(
+        "INSERT INTO metric_compactions (compacted_at, bucket_end, rows_written, rows_deleted) "
+        f"VALUES ({param}, {param}, {param}, {param})",
+        (datetime.now(timezone.utc).isoformat(), bucket_end, written, deleted),
+    )
+
+
+def _fold_oldest_hour(cursor, dialect, param, raw_cutoff, counts):
+    """Fold and delete the raw samples of the oldest hour before raw_cutoff. Returns False when there are none."""
+    cursor.execute(f"SELECT MIN(timestamp) FROM metrics WHERE timestamp < {param}", (raw_cutoff,))
+    oldest = cursor.fetchone()[0]
+    if oldest is None:
+        return False
+    bucket_end = _hour_after(oldest, raw_cutoff)
+    written = 0
+    for table in sql_definitions.METRIC_ROLLUP_TABLES:
+        cursor.execute(rollup_query(dialect, param, table), (bucket_end,))
+        counts[table] += cursor.rowcount
+        written += cursor.rowcount
+    cursor.execute(f"DELETE FROM metrics WHERE timestamp < {param}", (bucket_end,))
+    deleted = cursor.rowcount
+    if not deleted:
+        # The oldest timestamp does not compare like UTC ISO text; fold everything up to the cutoff at once
+        if bucket_end == raw_cutoff:
+            return False
+        return _fold_until(cursor, dialect, param, raw_cutoff, counts)
+    counts["raw_deleted"] += deleted
+    _log_compaction(cursor, param, bucket_end, written, deleted)
+    return True
+
+
+def _fold_until(cursor, dialect, param, raw_cutoff, counts):
+    written = 0
+    for table in sql_definitions.METRIC_ROLLUP_TABLES:
+        cursor.execute(rollup_query(dialect, param, table), (raw_cutoff,))
+        counts[table] += cursor.rowcount
+        written += cursor.rowcount
+    cursor.execute(f"DELETE FROM metrics WHERE timestamp < {param}", (raw_cutoff,))
+    counts["raw_deleted"] += cursor.rowcount
+    _log_compaction(cursor, param, raw_cutoff, written, cursor.rowcount)
+    return False
+
+
+def _delete_expired_minutes(cursor, param, minute_cutoff, counts):
+    """Delete one batch of per-minute rollups before minute_cutoff. Returns False when the last batch is done."""
+    cursor.execute(
+        f"DELETE FROM metrics_1m WHERE id IN "
+        f"(SELECT id FROM metrics_1m WHERE timestamp < {param} ORDER BY id LIMIT {MINUTE_DELETE_BATCH})",
+        (minute_cutoff,),
+    )
+    deleted = cursor.rowcount
+    if deleted:
+        counts["metrics_1m_deleted"] += deleted
+        _log_compaction(cursor, param, minute_cutoff, 0, deleted)
+    return deleted == MINUTE_DELETE_BATCH
+
+
+def _run_steps(transaction, step):
+    """Run step in its own transaction until it returns False."""
+    while True:
+        with transaction() as cursor:
+            if not step(cursor):
+                return
+
+
+def compact_metrics(database_url, raw_retention_hours=24, minute_retention_days=7, now=None):
+    """
+    Fold raw metric samples older than raw_retention_hours into the rollup tables,
+    delete them, and delete per-minute rollups older than minute_retention_days.
+    Runs one transaction per hour of samples. Returns the number of rows written and deleted per table.
+    """
+    raw_cutoff, minute_cutoff = _cutoffs(now, raw_retention_hours, minute_retention_days)
+    logger.info("Compacting metrics in %s before %s", database_url, raw_cutoff)
+    counts = {**{table: 0 for table in sql_definitions.METRIC_ROLLUP_TABLES}, "raw_deleted": 0, "metrics_1m_deleted": 0}
+    if is_postgres_url(database_url):
+        dialect, param = "postgres", "%s"
+        conn = psycopg2.connect(database_url)
+        # One snapshot for the rollups and the delete: a sample committed in between is left for next time
+        conn.set_session(isolation_level="REPEATABLE READ")
+
+        @contextmanager
+        def transaction():
+            with conn:
+                with conn.cursor() as cursor:
+                    yield cursor
+    else:
+        dialect, param = "sqlite", "?"
+        conn = sqlite3.connect(database_url.replace("sqlite:///", "", 1), timeout=30)
+        conn.isolation_level = None
+
+        @contextmanager
+        def transaction():
+            # Take the write lock up front, so no sample is inserted between the rollups and the delete
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn.cursor()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    try:
+        _run_steps(transaction, lambda cursor: _fold_oldest_hour(cursor, dialect, param, raw_cutoff, counts))
+        _run_steps(transaction, lambda cursor: _delete_expired_minutes(cursor, param, minute_cutoff, counts))
+    finally:
+        conn.close()
+    logger.info("Compacted metrics: %s", counts)
+    return counts
+
+
+async def compact_metrics_periodically(database_url, interval, raw_retention_hours=24, minute_retention_days=7):
+    """Run compact_metrics every interval seconds until cancelled; failures are logged and retried next time."""
+    while True:
+        try:
+            await asyncio.to_thread(compact_metrics, database_url, raw_retention_hours, minute_retention_days)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Metric compaction failed: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,67 @@
+# shared/helpers/migrations.py
+# Ordered schema migrations, applied by shared.helpers.ensure_db_schema.
+#
+# Each migration has a version, a description and a list of steps. A step is a
+# SQL string, an AddColumns (SQLite has no ADD COLUMN IF NOT EXISTS, so the
+# runner checks which columns exist first) or a PerDialect with separate
+# statement lists for SQLite and PostgreSQL. Steps must be safe to run against a
+# database that was created before versioning existed, hence IF NOT EXISTS.
+#
+# Never edit a released migration; append a new one with the next version.
+
+from collections import namedtuple
+import shared.helpers.sql_definitions as sql_definitions
+
+Migration = namedtuple("Migration", ["version", "description", "steps"])
+AddColumns = namedtuple("AddColumns", ["table", "columns"])
+PerDialect = namedtuple("PerDialect", ["sqlite", "postgres"])
+
+MIGRATIONS = [
+    Migration(1, "Create tables", [
+        sql_definitions.CREATE_EVENTS_TABLE,
+        sql_definitions.CREATE_RF_LOG_MESSAGE_TABLE,
+        sql_definitions.CREATE_APP_LOG_TABLE,
+        sql_definitions.CREATE_METRIC_TABLE,
+        sql_definitions.CREATE_RUN_COUNTERS_TABLE,
+    ]),
+    Migration(2, "Add totaltests and run_id columns to databases created before them", [
+        AddColumns("events", [("totaltests", "INTEGER"), ("run_id", "TEXT")]),
+        AddColumns("rf_log_messages", [("run_id", "TEXT")]),
+        AddColumns("app_logs", [("run_id", "TEXT")]),
+        AddColumns("metrics", [("run_id", "TEXT")]),
+    ]),
+    Migration(3, "Indexes for the reader queries", [
+        sql_definitions.CREATE_EVENTS_ORDER_INDEX,
+        sql_definitions.CREATE_EVENTS_TYPE_STATUS_INDEX,
+        sql_definitions.CREATE_EVENTS_TESTID_INDEX,
+        sql_definitions.CREATE_EVENTS_RUN_INDEX,
+        sql_definitions.CREATE_EVENTS_RUN_TYPE_STATUS_INDEX,
+        sql_definitions.CREATE_RF_LOG_TESTID_INDEX,
+        sql_definitions.CREATE_RF_LOG_TIMESTAMP_INDEX,
+        sql_definitions.CREATE_RF_LOG_RUN_INDEX,
+        sql_definitions.CREATE_APP_LOG_TIMESTAMP_INDEX,
+        sql_definitions.CREATE_APP_LOG_RUN_INDEX,
+        sql_definitions.CREATE_METRIC_NAME_INDEX,
+        sql_definitions.CREATE_METRIC_TIMESTAMP_INDEX,
+        sql_definitions.CREATE_METRIC_RUN_INDEX,
+        # Refresh planner statistics so the new indexes are used right away
+        "ANALYZE",
+    ]),
+    Migration(4, "Indexes for filtered list pages", [
+        sql_definitions.CREATE_EVENTS_SUITE_INDEX,
+        sql_definitions.CREATE_APP_LOG_LEVEL_INDEX,
+        sql_definitions.CREATE_APP_LOG_SOURCE_INDEX,
+    ]),
+    Migration(5, "Full-text search over log messages", [
+        PerDialect(
+            sqlite=sql_definitions.SQLITE_CREATE_LOG_SEARCH,
+            postgres=sql_definitions.POSTGRES_CREATE_LOG_SEARCH,
+        ),
+    ]),
+    Migration(6, "Per-minute and per-hour metric rollups", sql_definitions.CREATE_METRIC_ROLLUP_TABLES),
+    Migration(7, "Log of metric compactions for the viewer change token", [
+        sql_definitions.CREATE_METRIC_COMPACTIONS_TABLE,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
@@ -0,0 +1,72 @@
+# shared/helpers/run_counters.py
+# Maintenance of the run_counters table (see sql_definitions.CREATE_RUN_COUNTERS_TABLE).
+#
+# Sinks call counter_deltas() on the event rows of a flush and execute
+# UPSERT_RUN_COUNTERS with the result inside the same transaction as the inserts,
+# so the counters never disagree with the events they summarize.
+
+import sqlite3
+import logging
+import psycopg2
+import shared.helpers.sql_definitions as sql_definitions
+
+logger = logging.getLogger("rt.counters")
+
+EVENT_COLUMN_NAMES = [name for name, _ in sql_definitions.event_columns]
+STATUS_FIELDS = {"PASS": 0, "FAIL": 1, "SKIP": 2}
+
+
+def counter_deltas(event_rows):
+    """
+    Aggregate event rows (value lists in event_columns order) into one upsert row
+    per (run_id, suite): [run_id, suite, passed, failed, skipped, running, last_endtime].
+    Events that do not affect the counters are ignored.
+    """
+    deltas = {}
+    for values in event_rows:
+        event = dict(zip(EVENT_COLUMN_NAMES, values))
+        event_type = event.get("event_type")
+        if event_type == "end_suite":
+            suite = event.get("longname")
+        elif event_type in ("start_test", "end_test"):
+            suite = event.get("suite")
+        else:
+            continue
+
+        key = (event.get("run_id") or "", suite or "")
+        counts = deltas.setdefault(key, [0, 0, 0, 0, None])
+        if event_type == "start_test":
+            counts[3] += 1
+        else:
+            if event_type == "end_test":
+                counts[3] -= 1
+                if event.get("status") in STATUS_FIELDS:
+                    counts[STATUS_FIELDS[event["status"]]] += 1
+            endtime = event.get("endtime")
+            if endtime and (counts[4] is None or endtime > counts[4]):
+                counts[4] = endtime
+
+    return [[run_id, suite, *counts] for (run_id, suite), counts in deltas.items()]
+
+
+def rebuild_run_counters(database_url):
+    """Recompute run_counters from the events table in one transaction. Returns the number of counter rows."""
+    logger.info("Rebuilding run counters in %s", database_url)
+    if database_url.startswith(("postgresql://", "postgres://")):
+        conn = psycopg2.connect(database_url)
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql_definitions.DELETE_ALL_RUN_COUNTERS)
+                    cursor.execute(sql_definitions.REBUILD_RUN_COUNTERS)
+                    return cursor.rowcount
+        finally:
+            conn.close()
+    else:
+        conn = sqlite3.connect(database_url.replace("sqlite:///", "", 1))
+        try:
+            with conn:
+                conn.execute(sql_definitions.DELETE_ALL_RUN_COUNTERS)
+                return conn.execute(sql_definitions.REBUILD_RUN_COUNTERS).rowcount
+        finally:
+            conn.close()
@@ -41,6 +41,8 @@ event_columns = [
     ("elapsed", "INTEGER"),
     ("statistics", "TEXT"),
     ("tags", "TEXT"),
+    ("totaltests", "INTEGER"),
+    ("run_id", "TEXT"),
 ]
 
 CREATE_EVENTS_TABLE = f"""
@@ -56,11 +58,39 @@ VALUES ({placeholders(len(event_columns))})
 """
 
 SELECT_ALL_EVENTS = f"""
-SELECT {', '.join(name for name, _ in event_columns)}
+SELECT id, {', '.join(name for name, _ in event_columns)}
 FROM events
 ORDER BY COALESCE(starttime, endtime) ASC
 """
 
+# Backs the ORDER BY of SELECT_ALL_EVENTS
+CREATE_EVENTS_ORDER_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_events_order ON events (COALESCE(starttime, endtime))
+"""
+
+# Backs the aggregate queries of the run summary (status counts, failures, first start_suite)
+CREATE_EVENTS_TYPE_STATUS_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_events_type_status ON events (event_type, status)
+"""
+
+CREATE_EVENTS_TESTID_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_events_testid ON events (testid)
+"""
+
+# Filtered, id-ordered pages (/events?suite=...)
+CREATE_EVENTS_SUITE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_events_suite ON events (suite, id)
+"""
+
+# Per-run queries: incremental reads (run_id, id) and run summaries (run_id, event_type, status)
+CREATE_EVENTS_RUN_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_events_run ON events (run_id, id)
+"""
+
+CREATE_EVENTS_RUN_TYPE_STATUS_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_events_run_type_status ON events (run_id, event_type, status)
+"""
+
 DELETE_ALL_EVENTS = "DELETE FROM events"
 
 # === RF Log Messages Table ===
@@ -71,6 +101,7 @@ rf_log_columns = [
     ("level", "TEXT"),
     ("message", "TEXT"),
     ("html", "TEXT"),
+    ("run_id", "TEXT"),
 ]
 
 CREATE_RF_LOG_MESSAGE_TABLE = f"""
@@ -85,8 +116,20 @@ INSERT INTO rf_log_messages ({', '.join(name for name, _ in rf_log_columns)})
 VALUES ({placeholders(len(rf_log_columns))})
 """
 
+CREATE_RF_LOG_TESTID_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_rf_log_messages_testid ON rf_log_messages (testid, timestamp)
+"""
+
+CREATE_RF_LOG_TIMESTAMP_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_rf_log_messages_timestamp ON rf_log_messages (timestamp)
+"""
+
+CREATE_RF_LOG_RUN_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_rf_log_messages_run ON rf_log_messages (run_id, id)
+"""
+
 SELECT_ALL_RF_LOGS = f"""
-SELECT {', '.join(name for name, _ in rf_log_columns)}
+SELECT id, {', '.join(name for name, _ in rf_log_columns)}
 FROM rf_log_messages
 ORDER BY timestamp ASC
 """
@@ -98,6 +141,7 @@ app_log_columns = [
     ("source", "TEXT"),
     ("message", "TEXT"),
     ("level", "TEXT"),
+    ("run_id", "TEXT"),
 ]
 
 CREATE_APP_LOG_TABLE = f"""
@@ -113,11 +157,27 @@ VALUES ({placeholders(len(app_log_columns))})
 """
 
 SELECT_ALL_APP_LOGS = f"""
-SELECT {', '.join(name for name, _ in app_log_columns)}
+SELECT id, {', '.join(name for name, _ in app_log_columns)}
 FROM app_logs
 ORDER BY timestamp ASC
 """
 
+CREATE_APP_LOG_TIMESTAMP_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_app_logs_timestamp ON app_logs (timestamp)
+"""
+
+CREATE_APP_LOG_LEVEL_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_app_logs_level ON app_logs (level, id)
+"""
+
+CREATE_APP_LOG_SOURCE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_app_logs_source ON app_logs (source, id)
+"""
+
+CREATE_APP_LOG_RUN_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_app_logs_run ON app_logs (run_id, id)
+"""
+
 DELETE_ALL_APP_LOGS = "DELETE FROM app_logs"
 
 # === Metrics Table ===
@@ -127,6 +187,7 @@ metric_columns = [
     ("value", "REAL"),
     ("unit", "TEXT"),
     ("source", "TEXT"),
+    ("run_id", "TEXT"),
 ]
 
 CREATE_METRIC_TABLE = f"""
@@ -141,8 +202,181 @@ INSERT INTO metrics ({', '.join(name for name, _ in metric_columns)})
 VALUES ({placeholders(len(metric_columns))})
 """
 
+CREATE_METRIC_NAME_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_metrics_name_timestamp ON metrics (metric_name, timestamp)
+"""
+
+CREATE_METRIC_TIMESTAMP_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics (timestamp)
+"""
+
+CREATE_METRIC_RUN_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics (run_id, id)
+"""
+
 SELECT_ALL_METRICS = f"""
 SELECT {', '.join(name for name, _ in metric_columns)}
 FROM metrics
 ORDER BY timestamp ASC
 """
+
+# === Metric Rollup Tables ===
+# Raw samples older than the raw retention are folded into per-minute and per-hour
+# aggregates (see shared.helpers.metric_rollups) and then deleted, so a sample is
+# counted in the raw table or in the rollups, never in both. timestamp is the UTC
+# start of the bucket; total / samples is the average.
+METRIC_ROLLUP_TABLES = {"metrics_1m": 60, "metrics_1h": 3600}
+
+metric_rollup_columns = [
+    ("timestamp", "TEXT"),
+    ("metric_name", "TEXT"),
+    ("source", "TEXT"),
+    ("unit", "TEXT"),
+    ("run_id", "TEXT"),
+    ("samples", "INTEGER"),
+    ("total", "DOUBLE PRECISION"),
+    ("min_value", "REAL"),
+    ("max_value", "REAL"),
+    ("last_value", "REAL"),
+]
+
+
+def _metric_rollup_statements(table):
+    return [
+        f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    {ID_FIELD},
+    {', '.join(f"{name} {dtype}" for name, dtype in metric_rollup_columns)}
+)
+""",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_name_timestamp ON {table} (metric_name, timestamp)",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)",
+    ]
+
+
+CREATE_METRIC_ROLLUP_TABLES = [statement for table in METRIC_ROLLUP_TABLES for statement in _metric_rollup_statements(table)]
+
+# One row per compaction transaction that changed the metric tables. Compaction
+# deletes individual rows, which the highest metric id does not reveal, so the
+# viewer's change token includes the highest id of this table as well.
+CREATE_METRIC_COMPACTIONS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS metric_compactions (
+    {ID_FIELD},
+    compacted_at TEXT,
+    bucket_end TEXT,
+    rows_written INTEGER,
+    rows_deleted INTEGER
+)
+"""
+
+# === Run Counters Table ===
+# Materialized per-suite totals, updated by the sinks in the same transaction as
+# the start_test / end_test / end_suite rows they are derived from. Reading
+# progress from here does not get slower as the events table grows.
+run_counter_columns = [
+    ("run_id", "TEXT NOT NULL DEFAULT ''"),
+    ("suite", "TEXT NOT NULL"),
+    ("passed", "INTEGER NOT NULL DEFAULT 0"),
+    ("failed", "INTEGER NOT NULL DEFAULT 0"),
+    ("skipped", "INTEGER NOT NULL DEFAULT 0"),
+    ("running", "INTEGER NOT NULL DEFAULT 0"),
+    ("last_endtime", "TEXT"),
+]
+
+CREATE_RUN_COUNTERS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS run_counters (
+    {', '.join(f"{name} {dtype}" for name, dtype in run_counter_columns)},
+    PRIMARY KEY (run_id, suite)
+)
+"""
+
+# Adds deltas to an existing row; last_endtime only moves forward (ISO timestamps sort as text)
+UPSERT_RUN_COUNTERS = f"""
+INSERT INTO run_counters ({', '.join(name for name, _ in run_counter_columns)})
+VALUES ({placeholders(len(run_counter_columns))})
+ON CONFLICT (run_id, suite) DO UPDATE SET
+    passed = run_counters.passed + excluded.passed,
+    failed = run_counters.failed + excluded.failed,
+    skipped = run_counters.skipped + excluded.skipped,
+    running = run_counters.running + excluded.running,
+    last_endtime = CASE
+        WHEN excluded.last_endtime IS NULL THEN run_counters.last_endtime
+        WHEN run_counters.last_endtime IS NULL OR excluded.last_endtime > run_counters.last_endtime
+            THEN excluded.last_endtime
+        ELSE run_counters.last_endtime
+    END
+"""
+
+# Recomputes all counters from the events table (run after DELETE_ALL_RUN_COUNTERS)
+REBUILD_RUN_COUNTERS = f"""
+INSERT INTO run_counters ({', '.join(name for name, _ in run_counter_columns)})
+SELECT
+    COALESCE(run_id, '') AS counter_run_id,
+    COALESCE(CASE WHEN event_type = 'end_suite' THEN longname ELSE suite END, '') AS counter_suite,
+    SUM(CASE WHEN event_type = 'end_test' AND status = 'PASS' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN event_type = 'end_test' AND status = 'FAIL' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN event_type = 'end_test' AND status = 'SKIP' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN event_type = 'start_test' THEN 1 WHEN event_type = 'end_test' THEN -1 ELSE 0 END),
+    MAX(CASE WHEN event_type IN ('end_test', 'end_suite') THEN endtime END)
+FROM events
+WHERE event_type IN ('start_test', 'end_test', 'end_suite')
+GROUP BY counter_run_id, counter_suite
+"""
+
+SELECT_RUN_COUNTER_TOTALS = """
+SELECT
+    COALESCE(SUM(passed), 0) AS passed,
+    COALESCE(SUM(failed), 0) AS failed,
+    COALESCE(SUM(skipped), 0) AS skipped,
+    COALESCE(SUM(running), 0) AS running
+FROM run_counters
+"""
+
+DELETE_ALL_RUN_COUNTERS = "DELETE FROM run_counters"
+
+# === Schema Version Table ===
+# One row per applied migration (see shared/helpers/migrations.py)
+CREATE_SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT,
+    applied_at TEXT
+)
+"""
+
+# === Full-text search over log messages ===
+# SQLite: an FTS5 table per log table, indexing its message column as external
+# content (the text is not stored twice) and kept in sync by triggers.
+# PostgreSQL: a GIN index on the tsvector of the message; queries must use the
+# same expression (LOG_SEARCH_VECTOR) for the index to apply.
+# Both tokenize without stemming, which suits log lines better than a language.
+LOG_SEARCH_TABLES = ("rf_log_messages", "app_logs")
+
+LOG_SEARCH_VECTOR = "to_tsvector('simple', COALESCE(message, ''))"
+
+
+def _fts5_statements(table):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(message, content='{table}', content_rowid='id')",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {fts} (rowid, message) VALUES (new.id, new.message);
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {fts} ({fts}, rowid, message) VALUES ('delete', old.id, old.message);
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF message ON {table} BEGIN
+    INSERT INTO {fts} ({fts}, rowid, message) VALUES ('delete', old.id, old.message);
+    INSERT INTO {fts} (rowid, message) VALUES (new.id, new.message);
+END""",
+        # Index the rows written before the table existed
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+
+SQLITE_CREATE_LOG_SEARCH = [statement for table in LOG_SEARCH_TABLES for statement in _fts5_statements(table)]
+
+POSTGRES_CREATE_LOG_SEARCH = [
+    f"CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN ({LOG_SEARCH_VECTOR})"
+    for table in LOG_SEARCH_TABLES
+]
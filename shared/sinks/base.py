@@ -29,6 +29,20 @@ class EventSink(ABC):
         self.logger.debug("[%s] Handling event: %s", self.__class__.__name__, data.get("event_type"))
         self._handle_event(data)
 
+    def flush(self):
+        """Deliver anything the sink still buffers. No-op for unbuffered sinks."""
+        pass
+
+    def close(self):
+        """Flush and release resources held by the sink. No-op by default."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     @abstractmethod
     def _handle_event(self, data):
         """Must be implemented by sync sinks."""
@@ -58,6 +72,26 @@ class AsyncEventSink(ABC):
         self.logger.debug("[%s] Handling async event: %s", self.__class__.__name__, data.get("event_type"))
         await self._async_handle_event(data)
 
+    async def async_handle_events(self, events):
+        """Send several events. Sinks that can send them in one go override this."""
+        for data in events:
+            await self.async_handle_event(data)
+
+    async def open(self):
+        """Acquire long-lived resources (e.g. a connection pool). No-op by default."""
+        pass
+
+    async def aclose(self):
+        """Release resources acquired by open(). No-op by default."""
+        pass
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
     @abstractmethod
     async def _async_handle_event(self, data):
         """Must be implemented by async sinks."""
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+
+class EventBatcher:
+    """
+    Collects items and hands them to `flush_fn` as a list, either as soon as
+    `max_batch_size` items are buffered or `linger` seconds after the first item
+    of a batch arrived, whichever comes first.
+
+    Size and time based flushes run on a background thread. flush() and close()
+    flush from the calling thread. Batches are always delivered in order.
+    """
+
+    def __init__(self, flush_fn, max_batch_size=200, linger=0.05, name="rt-batcher"):
+        self.logger = logging.getLogger("rt.sink")
+        self.flush_fn = flush_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.linger = max(0.0, float(linger))
+
+        self._buffer = []
+        self._first_added = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # keeps batches ordered between worker and explicit flushes
+
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def add(self, item):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EventBatcher is closed")
+            self._buffer.append(item)
+            if len(self._buffer) == 1:
+                self._first_added = time.monotonic()
+                self._cond.notify()
+            elif len(self._buffer) >= self.max_batch_size:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            batch = self._buffer[:self.max_batch_size]
+            del self._buffer[:self.max_batch_size]
+            if not self._buffer:
+                self._first_added = None
+            return batch
+
+    def _deliver(self, drain=False):
+        """Deliver one batch, or every buffered item in batches when drain is set."""
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return
+                try:
+                    self.flush_fn(batch)
+                except Exception as e:
+                    self.logger.error("[EventBatcher] Failed to flush batch of %d items: %s", len(batch), e)
+                if not drain:
+                    return
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return  # close() delivers what is left
+                # The buffer may be emptied by an explicit flush() while we wait
+                while self._buffer and len(self._buffer) < self.max_batch_size and not self._closed:
+                    remaining = self._first_added + self.linger - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self._deliver()
+
+    def flush(self):
+        """Deliver everything buffered so far."""
+        self._deliver(drain=True)
+
+    def close(self):
+        """Stop the background thread and deliver what is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self._deliver(drain=True)
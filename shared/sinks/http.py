@@ -1,20 +1,67 @@
+import asyncio
+import json
+import threading
+import time
 import requests
 import httpx
+from requests.adapters import HTTPAdapter
 from .base import EventSink
 from .base import AsyncEventSink
+from .batching import EventBatcher
+
+# Status codes the ingest API answers with when it is overloaded
+BACKPRESSURE_STATUS_CODES = (429, 503)
+# Upper bound for a single back-off, whatever Retry-After asks for
+MAX_BACKOFF = 5.0
+
+def retry_after_seconds(response, default=1.0) -> float:
+    """Seconds to wait according to the Retry-After header (delta-seconds form only)."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
 
 class HttpSink(EventSink):
     """
     Routes events to /metric, /log, or /event based on their event_type.
     Falls back to /log for unknown or missing event_type values.
 
+    With batch_size > 1, events are collected and posted as one JSON array to /batch
+    once batch_size events are buffered or batch_linger seconds have passed.
+
+    When the ingest API answers 429/503, the sink honours Retry-After: it waits and
+    retries once, or spools the events when a spool is configured.
+
+    When a DiskSpool is given, events the ingest API cannot accept are written to
+    disk instead of being dropped. While the spool holds events, new events are
+    spooled straight away (no network wait) and /health is polled every
+    health_check_interval seconds; once it answers, the spool is replayed in bulk.
+
+    All requests share one keep-alive session, so connections are reused
+    instead of paying a TCP handshake per event. Call close() when done.
+
     Intended for use in synchronous contexts like the Robot Framework listener.
     """
 
-    def __init__(self, endpoint="http://localhost:8001", timeout=0.5):
+    def __init__(self, endpoint="http://localhost:8001", timeout=0.5, batch_size=1, batch_linger=0.05, pool_size=10,
+                 spool=None, health_check_interval=5.0, replay_batch_size=500):
         super().__init__()
         self.endpoint = endpoint
         self.timeout = timeout
+        self.spool = spool
+        self.health_check_interval = float(health_check_interval)
+        self.replay_batch_size = int(replay_batch_size)
+        self._next_health_check = 0.0
+        self._retry_after = None
+        self._send_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.batcher = None
+        if int(batch_size) > 1:
+            self.batcher = EventBatcher(self._post_batch, max_batch_size=batch_size, linger=batch_linger,
+                                        name="rt-http-batcher")
 
         self.route_map = {
             # METRICS
@@ -39,20 +86,107 @@ class HttpSink(EventSink):
         }
 
     def _handle_event(self, data):
-        event_type = data.get("event_type")
-        path = self.route_map.get(event_type)
+        if self.batcher is not None:
+            self.batcher.add(data)
+        else:
+            self._send([data])
 
-        if not path:
-            self.logger.warning(
-                "[HttpSink] Unknown event_type '%s'. Defaulting to /log.", event_type
-            )
-            path = "/log"
+    def _send(self, events):
+        """Deliver events, or spool them to disk while the ingest API is unreachable."""
+        with self._send_lock:
+            if self.spool is not None and self.spool.pending() and not self._replay_spool():
+                # Keep the order: nothing new goes out while older events are still spooled
+                self.spool.append(events)
+                return
+
+            delivered = self._post(events)
+            if not delivered and self._retry_after is not None and self.spool is None:
+                # Ingest asked us to back off: slow down and try once more instead of dropping right away
+                time.sleep(min(self._retry_after, MAX_BACKOFF))
+                delivered = self._post(events)
+
+            if not delivered and self.spool is not None:
+                self.logger.warning("[HttpSink] Ingest unavailable, spooling events to %s", self.spool.directory)
+                self.spool.append(events)
+                wait = max(self.health_check_interval, self._retry_after or 0.0)
+                self._next_health_check = time.monotonic() + wait
+
+    def _post(self, events, timeout=None) -> bool:
+        """
+        Post a single event to its route, or several events to /batch.
+        Returns False when the ingest API could not accept them (connection error, 429 or 5xx).
+        On 429/503 the requested back-off is stored in self._retry_after.
+        """
+        self._retry_after = None
+        if len(events) == 1:
+            event_type = events[0].get("event_type")
+            path = self.route_map.get(event_type)
+            if not path:
+                self.logger.warning(
+                    "[HttpSink] Unknown event_type '%s'. Defaulting to /log.", event_type
+                )
+                path = "/log"
+            payload = events[0]
+        else:
+            event_type = f"batch of {len(events)} events"
+            path = "/batch"
+            payload = events
 
         try:
-            requests.post(f"{self.endpoint}{path}", json=data, timeout=self.timeout)
+            response = self.session.post(f"{self.endpoint}{path}", json=payload, timeout=timeout or self.timeout)
         except requests.RequestException as e:
             self.logger.warning("[HttpSink] Failed to send %s to %s", event_type, path)
             self.logger.debug(f"Error details: {e}")
+            return False
+
+        if response.status_code in BACKPRESSURE_STATUS_CODES:
+            self._retry_after = retry_after_seconds(response)
+            self.logger.warning("[HttpSink] Ingest overloaded (%s) for %s to %s, retry after %.1fs",
+                                response.status_code, event_type, path, self._retry_after)
+            return False
+        if response.status_code >= 500:
+            self.logger.warning("[HttpSink] Ingest returned %s for %s to %s", response.status_code, event_type, path)
+            return False
+        return True
+
+    def _post_batch(self, events):
+        self._send(events)
+
+    def _replay_spool(self) -> bool:
+        """Replay the spool once /health answers again. Returns True when the spool is empty."""
+        if time.monotonic() < self._next_health_check:
+            return False
+
+        try:
+            healthy = self.session.get(f"{self.endpoint}/health", timeout=self.timeout).ok
+        except requests.RequestException:
+            healthy = False
+
+        if healthy:
+            self.logger.info("[HttpSink] Ingest reachable again, replaying spooled events")
+            # Replayed batches are large, allow them more time than a single live event
+            if self.spool.replay(lambda events: self._post(events, timeout=max(self.timeout, 5.0)),
+                                 batch_size=self.replay_batch_size):
+                return True
+
+        self._next_health_check = time.monotonic() + self.health_check_interval
+        return False
+
+    def flush(self):
+        if self.batcher is not None:
+            self.batcher.flush()
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.spool is not None:
+            with self._send_lock:
+                self._next_health_check = 0.0  # one last replay attempt before the run ends
+                if self.spool.pending() and not self._replay_spool():
+                    self.logger.warning("[HttpSink] Ingest still unreachable, spooled events stay in %s "
+                                        "and are replayed by the next run", self.spool.directory)
+            self.spool.close()
+        self.session.close()
 
 class AsyncHttpSink(AsyncEventSink):
     """
@@ -63,12 +197,22 @@ class AsyncHttpSink(AsyncEventSink):
     fall back to the `_handle_app_log` handler.
 
     Routes events to /metric, /log, or /event based on their event_type.
+
+    One pooled keep-alive client is used for the lifetime of the sink. Use it as
+    `async with AsyncHttpSink(...) as sink:` (or call open() and aclose()) so the
+    pool is closed cleanly; otherwise the client is created on first use.
+    Set http2=True to multiplex requests over one connection (requires the h2 package).
+
+    When the ingest API answers 429/503, the sink waits for Retry-After and retries once.
     """
 
-    def __init__(self, endpoint="http://localhost:8001", timeout=0.5):
+    def __init__(self, endpoint="http://localhost:8001", timeout=0.5, pool_size=10, http2=False):
         super().__init__()
         self.endpoint = endpoint
         self.timeout = timeout
+        self.pool_size = int(pool_size)
+        self.http2 = http2
+        self.client = None
 
         self.route_map = {
             # METRICS
@@ -103,7 +247,78 @@ class AsyncHttpSink(AsyncEventSink):
             path = "/log"
 
         try:
-            async with httpx.AsyncClient() as session:
-                await session.post(f"{self.endpoint}{path}", json=data, timeout=self.timeout)
+            await self._post(path, json=data, timeout=self.timeout)
         except Exception as e:
             self.logger.warning("[AsyncHttpSink] Failed to send %s to %s: %s", event_type, path, e)
+
+    async def async_handle_events(self, events):
+        """Stream several events as NDJSON to /stream in one request."""
+        if len(events) <= 1:
+            for data in events:
+                await self.async_handle_event(data)
+            return
+
+        async def ndjson_lines():
+            for data in events:
+                yield (json.dumps(data) + "\n").encode("utf-8")
+
+        self.logger.debug("[AsyncHttpSink] Streaming %d events to /stream", len(events))
+        try:
+            response = await self._post(
+                "/stream",
+                make_content=ndjson_lines,
+                headers={"Content-Type": "application/x-ndjson"},
+                # A large upload needs more time than a single event
+                timeout=max(self.timeout, 10.0),
+            )
+            result = response.json()
+            if result.get("rejected"):
+                self.logger.warning("[AsyncHttpSink] Ingest rejected %s of %d streamed events: %s",
+                                    result["rejected"], len(events), result.get("errors"))
+        except Exception as e:
+            self.logger.warning("[AsyncHttpSink] Failed to stream %d events to /stream: %s", len(events), e)
+
+    async def _post(self, path, timeout, json=None, make_content=None, headers=None):
+        """
+        POST to the ingest API. When it answers 429/503, wait for Retry-After
+        (capped at MAX_BACKOFF) and try once more, so producers slow down under load.
+        """
+        client = await self._get_client()
+        for attempt in range(2):
+            response = await client.post(
+                f"{self.endpoint}{path}",
+                json=json,
+                content=make_content() if make_content else None,
+                headers=headers,
+                timeout=timeout,
+            )
+            if response.status_code not in BACKPRESSURE_STATUS_CODES or attempt:
+                break
+            delay = min(retry_after_seconds(response), MAX_BACKOFF)
+            self.logger.warning("[AsyncHttpSink] Ingest overloaded (%s) on %s, retrying in %.1fs",
+                                response.status_code, path, delay)
+            await asyncio.sleep(delay)
+        if response.status_code in BACKPRESSURE_STATUS_CODES:
+            self.logger.warning("[AsyncHttpSink] Ingest still overloaded on %s, event(s) dropped", path)
+        return response
+
+    async def open(self):
+        await self._get_client()
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401  (optional dependency of httpx[http2])
+                except ImportError:
+                    self.logger.warning("[AsyncHttpSink] HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+                    http2 = False
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self.client = httpx.AsyncClient(limits=limits, http2=http2, timeout=self.timeout)
+        return self.client
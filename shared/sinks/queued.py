@@ -0,0 +1,166 @@
+import threading
+from collections import deque
+from .base import EventSink
+
+
+class QueuedSink(EventSink):
+    """
+    Wraps another synchronous sink and hands events to it from a background
+    worker thread, so the caller (e.g. the Robot Framework listener) never
+    blocks on network or disk I/O.
+
+    The queue is bounded. When it is full, the overflow policy decides what happens:
+        - "drop_oldest":      discard the oldest queued log/metric event (or the
+                              incoming one when none are queued)
+        - "drop_log_message": discard an incoming log/metric event, otherwise the
+                              oldest queued one
+        - "block":            wait until the worker has made room
+
+    Suite and test start/end events are never dropped: without them the viewer
+    shows tests running forever and the run counters drift. When the queue is full
+    of them, the caller waits up to lifecycle_wait seconds for room and then queues
+    the event anyway, beyond max_size.
+
+    Call close() at the end of the run to deliver whatever is still queued.
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_log_message", "block")
+    # Event types that may be dropped on overflow; all others are lifecycle events
+    DROPPABLE_EVENTS = ("log_message", "app_log", "metric")
+
+    def __init__(self, sink, max_size=10000, overflow_policy="drop_oldest", flush_timeout=10.0, lifecycle_wait=1.0):
+        super().__init__()
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unsupported overflow_policy: {overflow_policy}, options are: {', '.join(self.OVERFLOW_POLICIES)}"
+            )
+
+        self.sink = sink
+        self.max_size = max(1, int(max_size))
+        self.overflow_policy = overflow_policy
+        self.flush_timeout = float(flush_timeout)
+        self.lifecycle_wait = float(lifecycle_wait)
+        self.dropped = 0
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._busy = False
+        self._closed = False
+        self._worker_done = False
+        # Set when close() gave up waiting: the worker closes the wrapped sink once it has drained
+        self._worker_closes_sink = False
+
+        self._worker = threading.Thread(target=self._run, name="rt-sink-worker", daemon=True)
+        self._worker.start()
+
+    def _handle_event(self, data):
+        with self._lock:
+            if self._closed:
+                self.logger.warning("[QueuedSink] Sink is closed, dropping %s", data.get("event_type"))
+                return
+
+            droppable = data.get("event_type") in self.DROPPABLE_EVENTS
+            while len(self._queue) >= self.max_size:
+                if self.overflow_policy == "block":
+                    self._not_full.wait()
+                    if self._closed:
+                        return
+                elif self.overflow_policy == "drop_log_message" and droppable:
+                    self._count_drop(data)
+                    return
+                elif self._drop_queued_droppable():
+                    continue
+                elif droppable:
+                    self._count_drop(data)
+                    return
+                else:
+                    # Only lifecycle events queued: give the worker a moment, then exceed max_size
+                    if not self._not_full.wait_for(lambda: len(self._queue) < self.max_size or self._closed,
+                                                   timeout=self.lifecycle_wait):
+                        self.logger.warning("[QueuedSink] Queue full of lifecycle events, queueing %s beyond max_size",
+                                            data.get("event_type"))
+                    if self._closed:
+                        return
+                    break
+
+            self._queue.append(data)
+            self._not_empty.notify()
+
+    def _drop_queued_droppable(self) -> bool:
+        """Remove the oldest queued log/metric event. Caller must hold the lock."""
+        for index, event in enumerate(self._queue):
+            if event.get("event_type") in self.DROPPABLE_EVENTS:
+                del self._queue[index]
+                self._count_drop(event)
+                return True
+        return False
+
+    def _count_drop(self, event):
+        self.dropped += 1
+        # Warn on the first drop and then periodically, to avoid flooding the log under load
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            self.logger.warning(
+                "[QueuedSink] Queue full (%d events), dropped %s (%d dropped so far)",
+                self.max_size, event.get("event_type"), self.dropped
+            )
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+                if not self._queue:
+                    # Closed and fully drained
+                    self._worker_done = True
+                    close_sink = self._worker_closes_sink
+                    break
+                data = self._queue.popleft()
+                self._busy = True
+                self._not_full.notify()
+
+            try:
+                self.sink.handle_event(data)
+            except Exception as e:
+                self.logger.error("[QueuedSink] Event handling failed: %s", e)
+            finally:
+                with self._lock:
+                    self._busy = False
+                    if not self._queue:
+                        self._idle.notify_all()
+        if close_sink:
+            self.sink.close()
+
+    def flush(self, timeout=None):
+        """Block until the worker has handed every queued event to the wrapped sink."""
+        timeout = self.flush_timeout if timeout is None else timeout
+        with self._lock:
+            drained = self._idle.wait_for(lambda: not self._queue and not self._busy, timeout=timeout)
+        if not drained:
+            self.logger.warning("[QueuedSink] Flush timed out with %d events still queued", len(self._queue))
+        self.sink.flush()
+
+    def close(self):
+        """Stop accepting events, drain the queue and close the wrapped sink."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        self._worker.join(self.flush_timeout)
+        if self.dropped:
+            self.logger.warning("[QueuedSink] %d events were dropped due to queue overflow", self.dropped)
+        with self._lock:
+            # The worker may still be inside sink.handle_event; closing the sink under it would
+            # break that call, so it closes the sink itself when done (it is a daemon thread,
+            # so this never keeps the process alive)
+            self._worker_closes_sink = not self._worker_done
+        if self._worker_closes_sink:
+            self.logger.warning("[QueuedSink] Worker did not finish within %.1fs, %d events not delivered yet",
+                                self.flush_timeout, len(self._queue))
+            return
+        self.sink.close()
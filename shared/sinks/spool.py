@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+
+class DiskSpool:
+    """
+    Append-only on-disk spool for events that could not be delivered.
+
+    Every event is written as one NDJSON record {"seq": n, "event": {...}} to the
+    active segment file (spool-<first seq>.ndjson). A new segment is started once
+    the active one reaches segment_bytes. When all segments together exceed
+    max_bytes, the oldest segment is deleted and its events are lost.
+
+    replay() hands spooled events to a send function in order and deletes each
+    segment once it is fully delivered. The last delivered sequence number is kept
+    in spool.ack, so a replay that is interrupted halfway resumes where it stopped,
+    also after a restart.
+    """
+
+    SEGMENT_PREFIX = "spool-"
+    SEGMENT_SUFFIX = ".ndjson"
+    ACK_FILE = "spool.ack"
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024, segment_bytes=4 * 1024 * 1024):
+        self.logger = logging.getLogger("rt.sink")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.segment_bytes = int(segment_bytes)
+
+        self._lock = threading.Lock()
+        self._active = None
+        self._active_size = 0
+        self._acked = self._read_ack()
+        self._next_seq = self._last_seq() + 1
+        self._has_pending = bool(self._segments())
+
+    def pending(self) -> bool:
+        """True if there are spooled events waiting for replay."""
+        return self._has_pending
+
+    def append(self, events):
+        """Write events to the spool, rotating segments and enforcing the size cap."""
+        with self._lock:
+            for event in events:
+                record = json.dumps({"seq": self._next_seq, "event": event}) + "\n"
+                encoded = record.encode("utf-8")
+                if self._active is None or (self._active_size and self._active_size + len(encoded) > self.segment_bytes):
+                    self._rotate()
+                self._active.write(encoded)
+                self._active_size += len(encoded)
+                self._next_seq += 1
+            if self._active is not None:
+                self._active.flush()
+            self._has_pending = True
+            self._enforce_size_cap()
+
+    def replay(self, send_fn, batch_size=500) -> bool:
+        """
+        Send spooled events oldest first through send_fn(list_of_events) -> bool.
+        Stops at the first failed send. Returns True once the spool is empty.
+        """
+        with self._lock:
+            self._close_active()
+            for path in self._segments():
+                batch = []
+                for record in self._read_segment(path):
+                    if record["seq"] <= self._acked:
+                        continue
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        if not self._send(send_fn, batch):
+                            return False
+                        batch = []
+                if batch and not self._send(send_fn, batch):
+                    return False
+                path.unlink()
+            self._has_pending = False
+            return True
+
+    def close(self):
+        with self._lock:
+            self._close_active()
+
+    def _send(self, send_fn, records) -> bool:
+        if not send_fn([record["event"] for record in records]):
+            return False
+        self._acked = records[-1]["seq"]
+        self._write_ack()
+        return True
+
+    def _segments(self):
+        # Zero-padded sequence numbers make lexical order equal to write order
+        return sorted(self.directory.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"))
+
+    def _rotate(self):
+        self._close_active()
+        path = self.directory / f"{self.SEGMENT_PREFIX}{self._next_seq:012d}{self.SEGMENT_SUFFIX}"
+        self._active = path.open("ab")
+        self._active_size = 0
+
+    def _close_active(self):
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+            self._active_size = 0
+
+    def _enforce_size_cap(self):
+        segments = self._segments()
+        sizes = {path: path.stat().st_size for path in segments}
+        total = sum(sizes.values())
+        active_path = Path(self._active.name) if self._active is not None else None
+        for path in segments:
+            if total <= self.max_bytes or path == active_path:
+                break
+            self.logger.warning("[DiskSpool] Spool exceeds %d bytes, discarding oldest segment %s", self.max_bytes, path.name)
+            path.unlink()
+            total -= sizes[path]
+
+    def _read_segment(self, path):
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash while writing can leave a truncated last line behind
+                    self.logger.warning("[DiskSpool] Skipping corrupt record in %s", path.name)
+
+    def _last_seq(self) -> int:
+        segments = self._segments()
+        if not segments:
+            return self._acked
+        last = self._acked
+        for record in self._read_segment(segments[-1]):
+            last = max(last, record["seq"])
+        return last
+
+    def _read_ack(self) -> int:
+        try:
+            return int((self.directory / self.ACK_FILE).read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_ack(self):
+        tmp_path = self.directory / f"{self.ACK_FILE}.tmp"
+        tmp_path.write_text(str(self._acked))
+        os.replace(tmp_path, self.directory / self.ACK_FILE)
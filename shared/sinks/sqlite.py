@@ -3,11 +3,23 @@ import json
 import shared.helpers.sql_definitions as sql_definitions
 
 from shared.helpers.ensure_db_schema import ensure_schema
+from shared.helpers.run_counters import counter_deltas
 from .base import EventSink
+from .batching import EventBatcher
 
 # This class is used when no ingest api is needed. This will directly write listener information to database
 class SqliteSink(EventSink):
-    def __init__(self, database_url="sqlite:///eventlog.db"):
+    """
+    Writes listener events straight to SQLite.
+
+    One connection is kept open for the lifetime of the listener, in WAL mode with
+    synchronous=NORMAL, so readers are not blocked and a commit does not fsync.
+    Events are group-committed: rows are collected and written with executemany
+    once batch_size events are buffered or flush_interval seconds have passed.
+    Everything is committed on end_suite and on close().
+    """
+
+    def __init__(self, database_url="sqlite:///eventlog.db", batch_size=200, flush_interval=0.25):
         super().__init__()
 
         # Strip 'sqlite:///' prefix if present
@@ -16,16 +28,20 @@ class SqliteSink(EventSink):
         else:
             self.database_url = database_url
 
+        # event_type -> (insert statement, row builder)
         self.dispatch_map = {
-            "start_test": self._insert_rf_event,
-            "end_test": self._insert_rf_event,
-            "start_suite": self._insert_rf_event,
-            "start_keyword": self._insert_rf_event,
-            "end_keyword": self._insert_rf_event,
-            "end_suite": self._insert_rf_event,
-            "log_message": self._insert_rf_log,
+            "start_test": (sql_definitions.INSERT_EVENT, self._rf_event_values),
+            "end_test": (sql_definitions.INSERT_EVENT, self._rf_event_values),
+            "start_suite": (sql_definitions.INSERT_EVENT, self._rf_event_values),
+            "start_keyword": (sql_definitions.INSERT_EVENT, self._rf_event_values),
+            "end_keyword": (sql_definitions.INSERT_EVENT, self._rf_event_values),
+            "end_suite": (sql_definitions.INSERT_EVENT, self._rf_event_values),
+            "log_message": (sql_definitions.INSERT_RF_LOG_MESSAGE, self._rf_log_values),
         }
         self._initialize_database()
+        self.conn = self._connect()
+        self.batcher = EventBatcher(self._write_batch, max_batch_size=batch_size, linger=flush_interval,
+                                    name="rt-sqlite-batcher")
 
     def _initialize_database(self):
         self.logger.info("Ensuring tables in %s exist", self.database_url)
@@ -35,25 +51,74 @@ class SqliteSink(EventSink):
             self.logger.warning("[SQLITE_SYNC] DB init failed: %s", e)
             raise
 
-    # In synchronous sinks, the database connection is managed centrally in the dispatcher.
-    # Handlers receive the 'conn' object as an argument and perform their operations directly on it.
-    # This pattern is acceptable because sync connections are blocking and expensive to open repeatedly.
-    # Using a shared connection per event keeps the logic efficient and transactionally consistent.
+    def _connect(self):
+        # The connection is only used by the batcher, which serializes all writes
+        conn = sqlite3.connect(self.database_url, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
     def _handle_event(self, data):
         event_type = data.get("event_type")
-        handler = self.dispatch_map.get(event_type)
-        if handler:
+        if event_type not in self.dispatch_map:
+            self.logger.warning("[SQLITE_SYNC] No handler for event_type: %s", event_type)
+            return
+
+        self.batcher.add(data)
+        if event_type == "end_suite":
+            self.batcher.flush()
+
+    # In synchronous sinks, the database connection is managed centrally by the sink.
+    # All rows of a batch are inserted with one executemany per table and committed together,
+    # along with the run_counters update derived from them.
+    def _write_batch(self, events):
+        rows = {}
+        for data in events:
+            statement, build_values = self.dispatch_map[data.get("event_type")]
+            rows.setdefault(statement, []).append(build_values(data))
+        try:
+            with self.conn:  # commits on success, rolls back on error
+                for statement, values in rows.items():
+                    self.conn.executemany(statement, values)
+                self._update_run_counters(rows.get(sql_definitions.INSERT_EVENT, []))
+        except Exception as e:
+            # Only the rows that fail again are lost, each is logged by _write_rows_one_by_one
+            self.logger.debug("[SQLITE_SYNC] Batch insert of %d events failed (%s), retrying rows one by one",
+                              len(events), e)
+            self._write_rows_one_by_one(rows)
+
+    def _write_rows_one_by_one(self, rows):
+        inserted_events = []
+        with self.conn:
+            # A failing INSERT only undoes itself, the other rows stay in the transaction
+            for statement, values_list in rows.items():
+                for values in values_list:
+                    try:
+                        self.conn.execute(statement, values)
+                    except Exception as e:
+                        self.logger.warning("[SQLITE_SYNC] Failed to insert event: %s", e)
+                    else:
+                        if statement == sql_definitions.INSERT_EVENT:
+                            inserted_events.append(values)
+            # Counters only reflect the events that made it in
             try:
-                with sqlite3.connect(self.database_url) as conn:
-                    handler(conn, data)
-                    conn.commit()
+                self._update_run_counters(inserted_events)
             except Exception as e:
-                self.logger.warning("[SQLITE_SYNC] Failed to process event_type '%s': %s", event_type, e)
-                raise
-        else:
-            self.logger.warning("[SQLITE_SYNC] No handler for event_type: %s", event_type)
+                self.logger.warning("[SQLITE_SYNC] Failed to update run counters: %s", e)
+
+    def _update_run_counters(self, event_rows):
+        deltas = counter_deltas(event_rows)
+        if deltas:
+            self.conn.executemany(sql_definitions.UPSERT_RUN_COUNTERS, deltas)
+
+    def flush(self):
+        self.batcher.flush()
+
+    def close(self):
+        self.batcher.close()
+        self.conn.close()
 
-    def _insert_rf_event(self, conn, data):
+    def _rf_event_values(self, data):
         columns = sql_definitions.event_columns
         values = []
         for name, _ in columns:
@@ -63,9 +128,8 @@ class SqliteSink(EventSink):
                 values.append(json.dumps(tags))  # serialize to JSON string
             else:
                 values.append(data.get(name))
-        conn.execute(sql_definitions.INSERT_EVENT, values)
+        return values
 
-    def _insert_rf_log(self, conn, data):
+    def _rf_log_values(self, data):
         columns = sql_definitions.rf_log_columns
-        values = [data.get(name) for name, _ in columns]
-        conn.execute(sql_definitions.INSERT_RF_LOG_MESSAGE, values)
+        return [data.get(name) for name, _ in columns]
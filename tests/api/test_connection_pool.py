@@ -0,0 +1,222 @@
+import threading
+
+import psycopg2
+import pytest
+
+from api.viewer.readers.connection_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.queries.append(query)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = psycopg2.extensions.STATUS_READY
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    connections = []
+
+    def connect():
+        conn = FakeConnection()
+        connections.append(conn)
+        return conn
+
+    options = {"max_size": 2, "health_check_interval": 3600, "timeout": 0.05}
+    options.update(kwargs)
+    return ConnectionPool("postgresql://test", connect=connect, **options), connections
+
+
+def test_connections_are_reused():
+    pool, connections = make_pool()
+    for _ in range(3):
+        with pool.connection():
+            pass
+    assert len(connections) == 1
+    assert pool.stats()["size"] == 1
+    assert pool.stats()["idle"] == 1
+    assert pool.stats()["created"] == 1
+
+
+def test_acquire_waits_then_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiting_thread_gets_released_connection():
+    pool, connections = make_pool(max_size=1, timeout=2)
+    got = []
+    with pool.connection() as first:
+        worker = threading.Thread(target=lambda: got.append(pool._acquire()))
+        worker.start()
+        worker.join(0.05)
+        assert worker.is_alive()
+    worker.join(2)
+    assert got == [first]
+    assert len(connections) == 1
+
+
+def test_old_connections_are_recycled():
+    pool, connections = make_pool(max_lifetime=0)
+    with pool.connection():
+        pass
+    with pool.connection() as conn:
+        assert conn is connections[1]
+    assert connections[0].closed
+    assert pool.stats()["recycled"] == 1
+
+
+def test_failed_health_check_drops_connection():
+    pool, connections = make_pool(health_check_interval=0)
+    with pool.connection():
+        pass
+    connections[0].broken = True
+    with pool.connection() as conn:
+        assert conn is connections[1]
+    assert connections[0].closed
+    assert pool.stats()["failed_health_checks"] == 1
+
+
+def test_broken_connection_is_not_returned_to_the_pool():
+    pool, connections = make_pool()
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("terminating connection")
+    assert connections[0].closed
+    assert pool.stats()["size"] == 0
+
+
+def test_idle_connections_above_min_size_are_closed():
+    pool, connections = make_pool(min_size=1, max_idle=0)
+    with pool.connection():
+        with pool.connection():
+            pass
+    assert pool.stats()["size"] == 1
+    assert sum(1 for conn in connections if conn.closed) == 1
+
+
+def test_idle_connections_are_trimmed_on_acquire():
+    pool, connections = make_pool(min_size=1, max_idle=3600)
+    with pool.connection():
+        with pool.connection():
+            pass
+    assert pool.stats()["size"] == 2
+    pool.max_idle = 0  # both went idle long ago, and no connection is released any more
+    with pool.connection():
+        assert pool.stats()["size"] == 1
+    assert connections[1].closed  # the longest idle one
+
+
+def test_health_check_runs_without_holding_the_lock(monkeypatch):
+    pool, connections = make_pool(health_check_interval=0)
+    with pool.connection():
+        pass
+    stats = []
+
+    def execute(cursor, query, params=None):
+        # Another thread must be able to use the pool while SELECT 1 runs
+        other = threading.Thread(target=lambda: stats.append(pool.stats()))
+        other.start()
+        other.join(1)
+        cursor.conn.queries.append(query)
+
+    monkeypatch.setattr(FakeCursor, "execute", execute)
+    with pool.connection():
+        pass
+    assert len(stats) == 1
+    assert connections[0].queries == ["SELECT 1"]
+
+
+class FakeAsyncConnection:
+    pids = 0
+
+    def __init__(self):
+        FakeAsyncConnection.pids += 1
+        self.pid = FakeAsyncConnection.pids
+        self.broken = False
+        self.terminated = False
+
+    def get_server_pid(self):
+        return self.pid
+
+    async def fetchval(self, query, timeout=None):
+        if self.broken:
+            raise ConnectionResetError("connection reset by peer")
+        return 1
+
+    def terminate(self):
+        self.terminated = True
+
+
+class FakeAsyncPool:
+    """One connection slot, reopened after terminate() like an asyncpg pool holder."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.conn = None
+        self.opened = []
+
+    async def acquire(self, timeout=None):
+        if self.conn is None or self.conn.terminated:
+            self.conn = FakeAsyncConnection()
+            self.opened.append(self.conn)
+            await self.reader._init_connection(self.conn)
+        return self.conn
+
+    async def release(self, conn):
+        pass
+
+
+async def test_async_reader_recycles_old_and_unhealthy_connections(monkeypatch):
+    from api.viewer.readers import postgres_async_reader
+    from api.viewer.readers.postgres_async_reader import AsyncPostgresReader
+
+    clock = [1000.0]
+    monkeypatch.setattr(postgres_async_reader.time, "monotonic", lambda: clock[0])
+    reader = AsyncPostgresReader("postgresql://test", pool_size=1, max_lifetime=600, health_check_interval=30)
+    reader.pool = pool = FakeAsyncPool(reader)
+
+    async with reader._connection() as first:
+        pass
+    async with reader._connection() as conn:
+        assert conn is first
+
+    clock[0] += 60  # idle past the health check interval, and the server went away
+    first.broken = True
+    async with reader._connection() as conn:
+        assert conn is not first and first.terminated
+
+    clock[0] += 600  # past max_lifetime
+    async with reader._connection():
+        pass
+    assert len(pool.opened) == 3
+    assert reader._stats == {"recycled": 1, "failed_health_checks": 1}
@@ -1,4 +1,5 @@
 import pytest
+from contextlib import asynccontextmanager
 from fastapi.testclient import TestClient
 from api.ingest.app_factory import create_app
 
@@ -22,6 +23,11 @@ class DummySink:
     async def initialize_database(self):
         pass  # No-op for testing
 
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions = getattr(self, "transactions", 0) + 1
+        yield
+
 
 @pytest.fixture
 def client(monkeypatch):
@@ -76,3 +82,107 @@ def test_invalid_event_type(client):
     response = client.post("/metric", json={"event_type": "something_else"})
     assert response.status_code == 400
     assert "Invalid event_type" in response.json()["error"]
+
+
+def test_batch_endpoint_json_array(client):
+    client, sink = client
+    payload = [
+        {"event_type": "start_test", "name": "Login"},
+        {"event_type": "log_message", "message": "step"},
+        {"event_type": "metric", "value": 1},
+        {"event_type": "custom_log", "message": "falls back"},
+    ]
+    response = client.post("/batch", json=payload)
+    assert response.status_code == 200
+    assert response.json()["received"] == 4
+    assert [kind for kind, _ in sink.handled_events] == ["event", "event/log_message", "metric", "log"]
+    assert sink.transactions == 1
+
+
+def test_batch_endpoint_ndjson_rejects_events_without_type(client):
+    client, sink = client
+    body = '{"event_type": "end_test", "name": "Login"}\n{"foo": "bar"}\n'
+    response = client.post("/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.json()["received"] == 1
+    assert response.json()["rejected"] == 1
+    assert response.json()["errors"][0]["index"] == 1
+    assert len(sink.handled_events) == 1
+
+
+def test_batch_endpoint_invalid_json(client):
+    client, _ = client
+    response = client.post("/batch", content="[not json", headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+def test_stream_endpoint_dispatches_ndjson_lines(client):
+    client, sink = client
+
+    def chunks():
+        # Lines deliberately split across chunk boundaries
+        yield b'{"event_type": "app_log", "message": "a"}\n{"event_type": "met'
+        yield b'ric", "value": 1}\n{"message": "no type"}\nnot json\n'
+        yield b'{"event_type": "log_message", "message": "last"}'
+
+    response = client.post("/stream", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["accepted"] == 3
+    assert body["rejected"] == 2
+    assert [e["line"] for e in body["errors"]] == [3, 4]
+    assert [kind for kind, _ in sink.handled_events] == ["log", "metric", "event/log_message"]
+
+
+def test_stream_endpoint_falls_back_to_app_log_for_unknown_event_types(client):
+    client, sink = client
+    body = b'{"event_type": "rf-debug", "message": "a"}\n{"event_type": "unknown", "message": "b"}\n'
+
+    response = client.post("/stream", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.json()["accepted"] == 2
+    assert [(kind, e["message"]) for kind, e in sink.handled_events] == [("log", "a"), ("log", "b")]
+
+
+def test_stream_endpoint_rejects_overlong_lines(client, monkeypatch):
+    monkeypatch.setattr("api.ingest.routes.MAX_STREAM_LINE_BYTES", 64)
+    client, sink = client
+
+    def chunks():
+        yield b'{"event_type": "app_log", "message": "' + b"x" * 40
+        yield b"x" * 40  # past the limit without a newline
+        yield b"x" * 40 + b'"}\n{"event_type": "app_log", "message": "ok"}\n'
+
+    response = client.post("/stream", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (1, 1)
+    assert body["errors"] == [{"line": 1, "error": "Line exceeds 64 bytes"}]
+    assert [e["message"] for _, e in sink.handled_events] == ["ok"]
+
+
+def test_overloaded_sink_queue_returns_503_with_retry_after(client):
+    client, sink = client
+    sink.queue_depth = lambda: 1_000_000
+    response = client.post("/log", json={"event_type": "app_log", "message": "too much"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert sink.handled_events == []
+    assert client.get("/health").status_code == 200  # only POSTs are subject to admission
+
+
+async def test_admission_controller_rejects_when_waiting_room_is_full():
+    from api.ingest.admission import AdmissionController, Overloaded
+
+    controller = AdmissionController(max_in_flight=1, max_waiting=0, wait_timeout=0.01)
+    await controller.acquire(DummySink())
+    with pytest.raises(Overloaded) as exc:
+        await controller.acquire(DummySink())
+    assert exc.value.status_code == 429
+
+    controller.max_waiting = 1
+    with pytest.raises(Overloaded) as exc:
+        await controller.acquire(DummySink())
+    assert exc.value.status_code == 503  # waited, but no slot freed up in time
+
+    controller.release()
+    await controller.acquire(DummySink())
+    assert controller.in_flight == 1
@@ -0,0 +1,191 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from api.ingest.sinks.sqlite_async import AsyncSqliteSink
+
+
+def _count(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+async def sqlite_sink(tmp_path):
+    db_path = str(tmp_path / "ingest.db")
+    sink = AsyncSqliteSink(database_url=f"sqlite:///{db_path}", flush_size=1000, flush_interval=60)
+    await sink.initialize_database()
+    yield sink, db_path
+    await sink.close()
+
+
+async def test_sqlite_sink_writes_rows_on_close(sqlite_sink):
+    sink, db_path = sqlite_sink
+    await sink.handle_app_log({"event_type": "app_log", "message": "hello"})
+    await sink.handle_metric({"event_type": "metric", "metric_name": "cpu", "value": 1.5})
+    await sink.handle_rf_events({"event_type": "start_test", "testid": "t1", "tags": ["a"]})
+    await sink.handle_rf_log({"event_type": "log_message", "testid": "t1", "message": "step"})
+    assert _count(db_path, "events") == 0  # buffered by the writer task
+
+    await sink.close()
+    assert _count(db_path, "app_logs") == 1
+    assert _count(db_path, "metrics") == 1
+    assert _count(db_path, "events") == 1
+    assert _count(db_path, "rf_log_messages") == 1
+
+
+async def test_sqlite_sink_updates_run_counters_with_events(sqlite_sink):
+    sink, db_path = sqlite_sink
+    await sink.handle_rf_events({"event_type": "start_test", "suite": "Root.A"})
+    await sink.handle_rf_events({"event_type": "start_test", "suite": "Root.A"})
+    await sink.handle_rf_events({"event_type": "end_test", "suite": "Root.A", "status": "PASS", "endtime": "2025-01-01T10:00:01"})
+    await sink.flush()
+    await sink.handle_rf_events({"event_type": "end_test", "suite": "Root.A", "status": "SKIP", "endtime": "2025-01-01T10:00:02"})
+    await sink.close()
+
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT suite, passed, failed, skipped, running, last_endtime FROM run_counters").fetchall()
+    assert row == [("Root.A", 1, 0, 1, 0, "2025-01-01T10:00:02")]
+
+
+async def test_sqlite_sink_stores_only_the_run_id_the_producer_sent(sqlite_sink):
+    sink, db_path = sqlite_sink
+    await sink.handle_rf_events({"event_type": "start_suite", "run_id": "run-1"})
+    await sink.handle_rf_events({"event_type": "start_suite", "run_id": "run-2"})
+    # Runs ingest side by side, so app logs without a run_id are not attributed to the latest one
+    await sink.handle_app_log({"event_type": "app_log", "message": "no run"})
+    await sink.handle_app_log({"event_type": "app_log", "message": "first run", "run_id": "run-1"})
+    await sink.handle_metric({"event_type": "metric", "metric_name": "cpu", "value": 1})
+    await sink.close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT message, run_id FROM app_logs ORDER BY id").fetchall() == [
+            ("no run", None), ("first run", "run-1"),
+        ]
+        assert conn.execute("SELECT run_id FROM metrics").fetchall() == [(None,)]
+
+
+async def test_sqlite_sink_flushes_when_flush_size_is_reached(tmp_path):
+    db_path = str(tmp_path / "ingest.db")
+    sink = AsyncSqliteSink(database_url=f"sqlite:///{db_path}", flush_size=2, flush_interval=60)
+    await sink.initialize_database()
+
+    await sink.handle_app_log({"event_type": "app_log", "message": "1"})
+    await sink.handle_app_log({"event_type": "app_log", "message": "2"})
+    await sink.flush()
+    assert _count(db_path, "app_logs") == 2
+    await sink.close()
+
+
+async def test_sqlite_sink_failed_transaction_writes_nothing(sqlite_sink):
+    sink, db_path = sqlite_sink
+    with pytest.raises(RuntimeError):
+        async with sink.transaction():
+            await sink.handle_app_log({"event_type": "app_log", "message": "rolled back"})
+            raise RuntimeError("boom")
+
+    async with sink.transaction():
+        await sink.handle_app_log({"event_type": "app_log", "message": "kept"})
+
+    await sink.close()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT message FROM app_logs").fetchall() == [("kept",)]
+
+
+async def test_sqlite_sink_retries_a_flush_while_the_database_is_locked(tmp_path):
+    db_path = str(tmp_path / "ingest.db")
+    sink = AsyncSqliteSink(database_url=f"sqlite:///{db_path}", flush_size=1000, flush_interval=60, busy_timeout=0.05)
+    sink.flush_retry_delay = 0.05
+    await sink.initialize_database()
+
+    # Another process (e.g. metric compaction) holds the write lock for longer than the busy timeout
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    await sink.handle_app_log({"event_type": "app_log", "message": "kept"})
+    flushing = asyncio.create_task(sink.flush())
+    await asyncio.sleep(0.2)
+    blocker.execute("COMMIT")
+    blocker.close()
+
+    await flushing
+    assert _count(db_path, "app_logs") == 1
+    await sink.close()
+
+
+class FakeConnection:
+    def __init__(self, fail_copy=False):
+        self.fail_copy = fail_copy
+        self.copied = []
+        self.executed = []
+        self.upserts = []
+
+    def transaction(self):
+        return FakeContext(None)
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.fail_copy:
+            raise ValueError("invalid input for column")
+        self.copied.append((table, list(records), columns))
+
+    async def execute(self, query, *values):
+        self.executed.append(values)
+
+    async def executemany(self, query, rows):
+        self.upserts.extend(rows)
+
+
+class FakeContext:
+    def __init__(self, value):
+        self.value = value
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+
+    def acquire(self):
+        return FakeContext(self.conn)
+
+    async def close(self):
+        self.closed = True
+
+
+async def test_postgres_sink_copies_buffered_rows_on_close():
+    from api.ingest.sinks.postgres_async import AsyncPostgresSink
+
+    conn = FakeConnection()
+    sink = AsyncPostgresSink(database_url="postgresql://test", flush_size=1000, flush_interval=60)
+    sink.pool = FakePool(conn)
+
+    await sink.handle_rf_events({"event_type": "end_test", "testid": "t1", "suite": "S", "status": "PASS", "tags": ["a"]})
+    await sink.handle_rf_events({"event_type": "end_test", "testid": "t2", "suite": "S", "status": "FAIL", "tags": []})
+    await sink.handle_metric({"event_type": "metric", "metric_name": "cpu", "value": 3})
+    await sink.close()
+
+    assert [(table, len(rows)) for table, rows, _ in conn.copied] == [("events", 2), ("metrics", 1)]
+    tags_index = conn.copied[0][2].index("tags")
+    assert conn.copied[0][1][0][tags_index] == '["a"]'  # make_sql_safe still serializes tags
+    assert conn.upserts == [["", "S", 1, 1, 0, -2, None]]
+    assert sink.pool.closed
+
+
+async def test_postgres_sink_falls_back_to_row_inserts():
+    from api.ingest.sinks.postgres_async import AsyncPostgresSink
+
+    conn = FakeConnection(fail_copy=True)
+    sink = AsyncPostgresSink(database_url="postgresql://test", flush_size=1000, flush_interval=60)
+    sink.pool = FakePool(conn)
+
+    await sink.handle_app_log({"event_type": "app_log", "message": "a"})
+    await sink.handle_app_log({"event_type": "app_log", "message": "b"})
+    await sink.close()
+
+    assert len(conn.executed) == 2
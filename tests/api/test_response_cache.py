@@ -0,0 +1,34 @@
+from api.viewer.readers.cache import ResponseCache
+
+
+def test_hit_after_put_with_same_token():
+    cache = ResponseCache(max_entries=4)
+    assert cache.get((1, 1), "key") == (False, None)
+    cache.put((1, 1), "key", ["row"])
+    assert cache.get((1, 1), "key") == (True, ["row"])
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_new_token_invalidates_everything():
+    cache = ResponseCache(max_entries=4)
+    cache.put((1, 1), "a", 1)
+    cache.put((1, 1), "b", 2)
+    assert cache.get((2, 1), "a") == (False, None)
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("t", "a", 1)
+    cache.put("t", "b", 2)
+    cache.get("t", "a")
+    cache.put("t", "c", 3)
+    assert cache.get("t", "b") == (False, None)
+    assert cache.get("t", "a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_size_disables_cache():
+    assert not ResponseCache(max_entries=0).enabled
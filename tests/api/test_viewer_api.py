@@ -1,6 +1,9 @@
+import sqlite3
 from fastapi.testclient import TestClient
 from api.viewer.app_factory import create_app
+from api.viewer.readers.sqlite_async_reader import AsyncSqliteReader
 from shared.helpers.config_loader import load_config
+from shared.helpers.ensure_db_schema import ensure_schema
 import pytest
 from datetime import datetime, timezone, timedelta
 
@@ -9,23 +12,47 @@ class DummyReader:
         now = datetime.now(timezone.utc)
         self._events = [
             {
+                "id": 1,
+                "run_id": "r1",
                 "event_type": "start_suite",
                 "starttime": (now - timedelta(seconds=360)).isoformat()
             },
             {
+                "id": 2,
                 "event_type": "log_message",
                 "message": "Test message",
                 "level": "INFO"
             }
         ]
-        self._logs = [{"level": "INFO", "message": "Dummy log"}]
+        self._logs = [{"id": 1, "level": "INFO", "message": "Dummy log"}]
         self._cleared = False
 
-    def get_events(self):
-        return [] if self._cleared else self._events
+    def get_events(self, since_id=None, run_id=None, limit=None, **filters):
+        events = [] if self._cleared else self._events
+        events = [
+            e for e in events
+            if (since_id is None or e["id"] > since_id) and (run_id is None or e.get("run_id") == run_id)
+            and all(e.get(key) == value for key, value in filters.items())
+        ]
+        return events[:limit] if limit is not None else events
+
+    def get_app_logs(self, since_id=None, run_id=None, limit=None, **filters):
+        logs = [log for log in self._logs if since_id is None or log["id"] > since_id]
+        return logs[:limit] if limit is not None else logs
 
-    def get_app_logs(self):
-        return self._logs
+    def get_runs(self):
+        return [{"run_id": "r1", "name": "Suite", "counts": {"PASS": 1, "FAIL": 0, "SKIP": 0}}]
+
+    def get_summary(self, run_id=None):
+        return {
+            "run_id": run_id or "r1",
+            "counts": {"PASS": 1, "FAIL": 0, "SKIP": 0},
+            "done": 1,
+            "totaltests": 2,
+            "progress": 0.5,
+            "failures": [],
+            "elapsed": "0:06:00",
+        }
 
     def clear_events(self):
         self._cleared = True
@@ -38,6 +65,23 @@ def client():
     yield TestClient(app)
 
 
+@pytest.fixture
+def sqlite_app(tmp_path):
+    """Viewer app on an AsyncSqliteReader over an empty, migrated database."""
+    db_path = str(tmp_path / "viewer.db")
+    ensure_schema(f"sqlite:///{db_path}")
+    app = create_app({})
+    app.state.event_reader = AsyncSqliteReader(database_url=f"sqlite:///{db_path}", pool_size=1)
+    return app, db_path
+
+
+@pytest.fixture
+def sqlite_client(sqlite_app):
+    app, db_path = sqlite_app
+    with TestClient(app) as client:
+        yield client, db_path
+
+
 
 def test_get_applog(client):
     response = client.get("/applog")
@@ -53,6 +97,29 @@ def test_get_events(client):
     assert response.json()[0]["event_type"] == "start_suite"
 
 
+def test_get_events_since_cursor(client):
+    response = client.get("/events", params={"since_id": 1})
+    assert response.status_code == 200
+    assert [e["id"] for e in response.json()] == [2]
+    assert client.get("/applog", params={"since_id": 1}).json() == []
+
+
+def test_events_are_paged_with_a_next_cursor(client):
+    first = client.get("/events", params={"limit": 1})
+    assert [e["id"] for e in first.json()] == [1]
+    assert first.headers["X-Next-Cursor"] == "1"
+
+    second = client.get("/events", params={"limit": 1, "after": first.headers["X-Next-Cursor"]})
+    assert [e["id"] for e in second.json()] == [2]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_events_filters_are_passed_to_the_reader(client):
+    response = client.get("/events", params={"event_type": "log_message"})
+    assert [e["id"] for e in response.json()] == [2]
+    assert client.get("/events", params={"limit": 0}).status_code == 422
+
+
 def test_clear_events(client):
     # Eerst even checken dat events er zijn
     pre = client.get("/events")
@@ -74,6 +141,21 @@ def test_get_elapsed_time(client):
     assert isinstance(response.json()["elapsed"], str)
 
 
+def test_get_summary(client):
+    response = client.get("/summary")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["counts"]["PASS"] == 1
+    assert data["progress"] == 0.5
+
+
+def test_runs_endpoints(client):
+    assert client.get("/runs").json()[0]["run_id"] == "r1"
+    assert [e["id"] for e in client.get("/runs/r1/events").json()] == [1]
+    assert client.get("/runs/other/events").json() == []
+    assert client.get("/runs/r2/summary").json()["run_id"] == "r2"
+
+
 def test_index(client):
     response = client.get("/")
     assert response.status_code == 200
@@ -85,3 +167,143 @@ def test_index(client):
 def test_favicon(client):
     response = client.get("/favicon.ico")
     assert response.status_code == 204
+
+
+def test_async_reader_is_opened_by_the_app_lifespan(sqlite_app):
+    app, _ = sqlite_app
+    reader = app.state.event_reader
+
+    with TestClient(app) as client:
+        assert reader._pool is not None
+        assert client.get("/events").json() == []
+        assert client.get("/summary").json()["counts"] == {"PASS": 0, "FAIL": 0, "SKIP": 0}
+    assert reader._pool is None
+
+
+def test_stats_reports_reader_pool(client):
+    response = client.get("/stats")
+    assert response.status_code == 200
+    assert response.json() == {"reader": "DummyReader", "pool": None, "cache": None}
+
+
+def test_unchanged_results_are_answered_with_304(sqlite_client):
+    client, db_path = sqlite_client
+    for path in ("/events", "/applog", "/runs", "/summary"):
+        first = client.get(path)
+        etag = first.headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    etag = client.get("/events").headers["ETag"]
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO events (event_type) VALUES ('start_suite')")
+    changed = client.get("/events", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 1
+
+
+def test_summary_of_a_running_run_is_not_rebuilt_for_matching_etags(client):
+    class RunningReader(DummyReader):
+        summaries = 0
+
+        def get_change_token(self):
+            return (2, 1)
+
+        def get_summary(self, run_id=None):
+            # elapsed moves on every call while the run is going
+            RunningReader.summaries += 1
+            return {**super().get_summary(run_id), "elapsed": f"0:06:{RunningReader.summaries:02d}"}
+
+    client.app.state.event_reader = RunningReader()
+    etag = client.get("/summary").headers["ETag"]
+    for _ in range(3):
+        assert client.get("/summary", headers={"If-None-Match": etag}).status_code == 304
+    assert RunningReader.summaries == 1
+
+
+def test_columnar_format_returns_row_arrays(sqlite_client):
+    client, db_path = sqlite_client
+    with sqlite3.connect(db_path) as conn:
+        for event_type in ("start_suite", "start_test", "end_test"):
+            conn.execute("INSERT INTO events (event_type) VALUES (?)", (event_type,))
+
+    response = client.get("/events", params={"format": "columns", "limit": 2})
+    body = response.json()
+    event_type = body["columns"].index("event_type")
+    assert [row[event_type] for row in body["rows"]] == ["start_suite", "start_test"]
+    assert response.headers["X-Next-Cursor"] == str(body["rows"][-1][body["columns"].index("id")])
+
+    rows = client.get("/events").json()
+    assert [row["event_type"] for row in rows] == ["start_suite", "start_test", "end_test"]
+    assert client.get("/events", params={"format": "xml"}).status_code == 422
+
+
+def test_search_endpoint(sqlite_client):
+    client, db_path = sqlite_client
+    with sqlite3.connect(db_path) as conn:
+        for i in range(3):
+            conn.execute("INSERT INTO rf_log_messages (testid, message) VALUES (?, ?)", (f"T{i}", "connection refused"))
+
+    first = client.get("/search", params={"q": "refused", "limit": 2})
+    assert len(first.json()) == 2
+    assert first.headers["X-Next-Offset"] == "2"
+    rest = client.get("/search", params={"q": "refused", "limit": 2, "offset": 2})
+    assert len(rest.json()) == 1
+    assert "X-Next-Offset" not in rest.headers
+    assert client.get("/search", params={"q": "refused", "source": "api"}).status_code == 400
+    assert client.get("/search", params={"q": ""}).status_code == 422
+    blank = client.get("/search", params={"q": "  "})  # passes min_length but has no terms
+    assert blank.status_code == 200
+    assert blank.json() == []
+
+
+def test_metrics_endpoint(sqlite_client):
+    client, db_path = sqlite_client
+    with sqlite3.connect(db_path) as conn:
+        for minute in range(10):
+            conn.execute(
+                "INSERT INTO metrics (timestamp, metric_name, value, unit, source) VALUES (?, 'cpu_percent', ?, '%', 'host1')",
+                (f"2025-01-01T10:{minute:02d}:00+00:00", float(minute)),
+            )
+
+    response = client.get("/metrics", params={"bucket": 60, "max_points": 5})
+    body = response.json()
+    assert body["bucket_seconds"] == 120
+    points = body["series"][0]["points"]
+    assert len(points) == 5
+    assert points[0] == ["2025-01-01T10:00:00+00:00", 0.0, 0.5, 1.0, 1.0, 2]
+    assert client.get("/metrics", params={"bucket": 60, "max_points": 5},
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert client.get("/metrics", params={"metric_name": "memory_percent"}).json()["series"] == []
+    assert client.get("/metrics", params={"max_points": 0}).status_code == 422
+
+
+def test_test_logs_endpoint(sqlite_client):
+    client, db_path = sqlite_client
+    with sqlite3.connect(db_path) as conn:
+        for i in range(3):
+            conn.execute("INSERT INTO rf_log_messages (testid, run_id, level, message) VALUES ('s1-t1', 'r1', ?, ?)",
+                         ("FAIL" if i == 2 else "INFO", f"step {i}"))
+        conn.execute("INSERT INTO rf_log_messages (testid, run_id, level, message) VALUES ('s1-t1', 'r2', 'INFO', 'other run')")
+
+    first = client.get("/tests/s1-t1/logs", params={"run_id": "r1", "limit": 2})
+    assert [log["message"] for log in first.json()] == ["step 0", "step 1"]
+    rest = client.get("/tests/s1-t1/logs", params={"run_id": "r1", "after": first.headers["X-Next-Cursor"]})
+    assert [log["message"] for log in rest.json()] == ["step 2"]
+    assert "X-Next-Cursor" not in rest.headers
+    assert [log["message"] for log in client.get("/tests/s1-t1/logs", params={"level": "FAIL"}).json()] == ["step 2"]
+    assert client.get("/tests/unknown/logs").json() == []
+    assert client.get("/tests/s1-t1/logs", params={"run_id": "r1", "limit": 2},
+                      headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_test_logs_endpoint_accepts_testids_with_slashes(sqlite_client):
+    client, db_path = sqlite_client
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO rf_log_messages (testid, run_id, level, message) "
+                     "VALUES ('Suites/Login/Valid Login', 'r1', 'FAIL', 'wrong password')")
+
+    for path in ("/tests/Suites/Login/Valid Login/logs", "/tests/Suites%2FLogin%2FValid%20Login/logs"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert [log["message"] for log in response.json()] == ["wrong password"]
@@ -0,0 +1,121 @@
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.viewer.compression import CompressionMiddleware, negotiate_encoding
+from api.viewer.static import DashboardFiles
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("br;q=1.0, gzip;q=0.8", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("", ["gzip"]) is None
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return [{"message": "x" * 50, "id": i} for i in range(100)]
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+def test_large_json_is_gzipped_and_small_is_not():
+    client = TestClient(make_app())
+    big = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert big.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in big.headers["Vary"]
+    assert int(big.headers["Content-Length"]) < 5000
+    assert len(big.json()) == 100
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+
+
+async def test_streams_are_flushed_per_chunk():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": f"data: {i}\n\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(app, minimum_size=100)(scope, None, send)
+
+    start, *bodies = sent
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decoder = zlib.decompressobj(31)
+    # Every event can be decoded on arrival, without waiting for the end of the stream
+    assert [decoder.decompress(body["body"]) for body in bodies[:3]] == [b"data: 0\n\n", b"data: 1\n\n", b"data: 2\n\n"]
+    assert bodies[-1]["more_body"] is False
+    decoder.decompress(bodies[-1]["body"])
+    assert decoder.eof
+
+
+def make_dashboard(tmp_path):
+    (tmp_path / "index.html").write_text(
+        '<link rel="stylesheet" href="/dashboard/style.css"><script src="/dashboard/app.js"></script>'
+    )
+    (tmp_path / "app.js").write_text("console.log('dashboard');\n" * 50)
+    (tmp_path / "style.css").write_text("body { margin: 0; }\n")
+    app = FastAPI()
+    app.mount("/dashboard", DashboardFiles(directory=str(tmp_path), prefix="/dashboard"), name="dashboard")
+    return TestClient(app)
+
+
+def test_dashboard_assets_are_fingerprinted_and_precompressed(tmp_path):
+    client = make_dashboard(tmp_path)
+
+    index = client.get("/dashboard/")
+    assert index.headers["Cache-Control"] == "no-cache"
+    assert 'src="/dashboard/app.js"' not in index.text
+    script_path = index.text.split('<script src="')[1].split('"')[0]
+    assert script_path.startswith("/dashboard/app.") and script_path.endswith(".js")
+
+    raw = client.get(script_path, headers={"Accept-Encoding": "gzip"})
+    assert raw.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert raw.headers["Content-Encoding"] == "gzip"
+    assert raw.text == "console.log('dashboard');\n" * 50
+
+    # Too small to be worth compressing
+    css = client.get(index.text.split('href="')[1].split('"')[0], headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in css.headers
+
+    revalidated = client.get("/dashboard/", headers={"If-None-Match": index.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_dashboard_original_names_are_revalidated(tmp_path):
+    client = make_dashboard(tmp_path)
+    response = client.get("/dashboard/app.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.text == "console.log('dashboard');\n" * 50
+    assert client.get("/dashboard/missing.js").status_code == 404
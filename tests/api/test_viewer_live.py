@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+from api.viewer.live import LiveFeed, LiveSubscription, parse_last_event_id, stream_live_updates
+
+
+class ListReader:
+    def __init__(self):
+        self.events = []
+        self.app_logs = []
+        self.queries = 0
+
+    def get_events(self, since_id=None):
+        self.queries += 1
+        return [e for e in self.events if since_id is None or e["id"] > since_id]
+
+    def get_app_logs(self, since_id=None):
+        return [log for log in self.app_logs if since_id is None or log["id"] > since_id]
+
+    def get_change_token(self):
+        return (max((e["id"] for e in self.events), default=None),
+                max((log["id"] for log in self.app_logs), default=None))
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def parse_messages(chunks):
+    """Turn SSE chunks into (event, id, data) tuples, skipping comments and retry hints."""
+    messages = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            messages.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return messages
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id("12-3") == (12, 3)
+    assert parse_last_event_id(None) == (None, None)
+    assert parse_last_event_id("garbage") == (None, None)
+
+
+def test_subscription_skips_rows_already_sent():
+    subscription = LiveSubscription(event_id=2, applog_id=None)
+    events = [
+        {"id": 2, "event_type": "end_test", "status": "PASS"},
+        {"id": 3, "event_type": "end_test", "status": "FAIL"},
+    ]
+    messages = parse_messages(subscription.render(events, [{"id": 1, "message": "hi"}]))
+
+    assert [m[0] for m in messages] == ["events", "summary", "applog"]
+    assert [e["id"] for e in messages[0][2]] == [3]
+    assert messages[1][2] == {"PASS": 0, "FAIL": 1, "SKIP": 0}
+    assert subscription.sse_id == "3-1"
+    # Same batch again (e.g. backlog and broadcast overlap) produces nothing
+    assert subscription.render(events, [{"id": 1, "message": "hi"}]) == []
+
+
+async def test_stream_resumes_and_receives_broadcasts():
+    reader = ListReader()
+    reader.events = [{"id": 1, "event_type": "start_suite"}, {"id": 2, "event_type": "start_test"}]
+    feed = LiveFeed(poll_interval=3600)
+    request = FakeRequest()
+
+    stream = stream_live_updates(request, reader, feed, last_event_id="1-0", heartbeat=0.05)
+    chunks = [await stream.__anext__(), await stream.__anext__(), await stream.__anext__()]
+    messages = parse_messages(chunks)
+    # Only the gap since Last-Event-ID is replayed
+    assert [e["id"] for e in messages[0][2]] == [2]
+    assert len(feed.subscribers) == 1
+
+    reader.events.append({"id": 3, "event_type": "end_test", "status": "PASS"})
+    await feed.poll_once()
+    messages = parse_messages([await stream.__anext__(), await stream.__anext__()])
+    assert messages[0] == ("events", "3-0", [{"id": 3, "event_type": "end_test", "status": "PASS"}])
+    assert messages[1][2]["PASS"] == 1
+
+    request.disconnected = True
+    chunks = [chunk async for chunk in stream]
+    assert all(chunk.startswith(":") for chunk in chunks)
+    assert feed.subscribers == []
+
+
+async def test_new_client_only_gets_the_newest_rows():
+    reader = ListReader()
+    reader.events = [{"id": i, "event_type": "start_test"} for i in range(1, 1001)]
+    reader.app_logs = [{"id": i, "message": "hi"} for i in range(1, 4)]
+    feed = LiveFeed(poll_interval=3600, backlog=10)
+    request = FakeRequest()
+
+    stream = stream_live_updates(request, reader, feed, heartbeat=0.05)
+    messages = parse_messages([await stream.__anext__() for _ in range(4)])
+    assert [e["id"] for e in messages[0][2]] == list(range(991, 1001))
+    assert [log["id"] for log in messages[2][2]] == [1, 2, 3]
+    # The feed starts at the newest rows too, so its first poll finds nothing old to broadcast
+    assert (feed.last_event_id, feed.last_applog_id) == (1000, 3)
+    assert not await feed.poll_once()
+
+    # A client resuming from long ago is also capped at the backlog
+    resumed = stream_live_updates(request, reader, feed, last_event_id="5-0", heartbeat=0.05)
+    messages = parse_messages([await resumed.__anext__() for _ in range(3)])
+    assert [e["id"] for e in messages[0][2]] == list(range(991, 1001))
+    await stream.aclose()
+    await resumed.aclose()
+
+
+async def test_feed_polls_once_for_all_subscribers():
+    reader = ListReader()
+    feed = LiveFeed(poll_interval=3600)
+    queues = [feed.subscribe(reader) for _ in range(10)]
+    assert len(feed.subscribers) == 10
+    feed._task.cancel()  # drive polling by hand
+    await asyncio.sleep(0)
+    await feed.start(reader)
+
+    reader.events.append({"id": 1, "event_type": "start_suite"})
+    assert await feed.poll_once()
+    assert reader.queries == 1
+    assert all(q.get_nowait()["events"][0]["id"] == 1 for q in queues)
+
+    for q in queues:
+        feed.unsubscribe(q)
+    assert feed.subscribers == [] and feed._task is None
+
+
+async def test_feed_reset_is_broadcast():
+    reader = ListReader()
+    feed = LiveFeed(poll_interval=3600)
+    feed.last_event_id = 5
+    queue = feed.subscribe(reader)
+    feed._task.cancel()
+
+    feed.reset()
+    assert feed.last_event_id is None
+    assert queue.get_nowait() == {"reset": True}
+    feed.unsubscribe(queue)
@@ -0,0 +1,364 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from api.viewer.readers.sqlite_reader import SqliteReader
+from api.viewer.readers.sqlite_async_reader import AsyncSqliteReader
+from api.viewer.readers.postgres_async_reader import number_placeholders
+from api.viewer.readers import queries
+from api.viewer.readers.base_reader import metric_buckets
+from shared.helpers.ensure_db_schema import ensure_schema
+from shared.helpers.run_counters import rebuild_run_counters
+import shared.helpers.sql_definitions as sql_definitions
+
+
+def _insert_event(conn, **data):
+    values = [data.get(name) for name, _ in sql_definitions.event_columns]
+    conn.execute(sql_definitions.INSERT_EVENT, values)
+
+
+def _insert_app_log(conn, **data):
+    values = [data.get(name) for name, _ in sql_definitions.app_log_columns]
+    conn.execute(sql_definitions.INSERT_APP_LOG, values)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "viewer.db")
+    ensure_schema(f"sqlite:///{path}")
+    return path
+
+
+@pytest.fixture
+def reader(db_path):
+    return SqliteReader(database_url=f"sqlite:///{db_path}")
+
+
+def test_events_since_cursor_returns_only_newer_rows(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="start_suite", starttime="2025-01-01T10:00:00+00:00")
+        _insert_event(conn, event_type="start_test", starttime="2025-01-01T10:00:01+00:00")
+
+    events = reader.get_events()
+    assert [e["event_type"] for e in events] == ["start_suite", "start_test"]
+    cursor = events[-1]["id"]
+    assert reader.get_events(since_id=cursor) == []
+
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="end_test", endtime="2025-01-01T10:00:02+00:00")
+
+    newer = reader.get_events(since_id=cursor)
+    assert [e["event_type"] for e in newer] == ["end_test"]
+    assert newer[0]["id"] > cursor
+
+
+def test_app_logs_since_cursor(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:00+00:00", message="first")
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:01+00:00", message="second")
+
+    first_id = reader.get_app_logs()[0]["id"]
+    assert [log["message"] for log in reader.get_app_logs(since_id=first_id)] == ["second"]
+
+
+def test_summary_aggregates_counts_failures_and_progress(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="start_suite", longname="Root", starttime="2025-01-01T10:00:00+00:00", totaltests=4)
+        _insert_event(conn, event_type="start_suite", longname="Root.Child", starttime="2025-01-01T10:00:01+00:00")
+        for name in "ABCD":
+            _insert_event(conn, event_type="start_test", name=name, suite="Root.Child")
+        _insert_event(conn, event_type="end_test", name="A", status="PASS", suite="Root.Child")
+        _insert_event(conn, event_type="end_test", name="B", status="FAIL", suite="Root.Child", message="boom")
+        _insert_event(conn, event_type="end_test", name="C", status="PASS", suite="Root.Child")
+        _insert_event(conn, event_type="end_suite", longname="Root.Child", endtime="2025-01-01T10:00:30+00:00")
+    # Rows were inserted behind the sinks' back, so derive the counters from events
+    assert rebuild_run_counters(f"sqlite:///{db_path}") == 1
+
+    summary = reader.get_summary()
+    assert summary["counts"] == {"PASS": 2, "FAIL": 1, "SKIP": 0}
+    assert summary["done"] == 3
+    assert summary["running"] == 1
+    assert summary["totaltests"] == 4
+    assert summary["progress"] == 0.75
+    assert [(f["name"], f["message"]) for f in summary["failures"]] == [("B", "boom")]
+    assert summary["finished"] is False
+
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="end_suite", longname="Root", endtime="2025-01-01T10:01:05+00:00")
+    rebuild_run_counters(f"sqlite:///{db_path}")
+
+    summary = reader.get_summary()
+    assert summary["finished"] is True
+    assert summary["elapsed"] == "0:01:05"
+
+
+def test_summary_of_empty_database(reader):
+    summary = reader.get_summary()
+    assert summary["counts"] == {"PASS": 0, "FAIL": 0, "SKIP": 0}
+    assert summary["progress"] is None
+    assert summary["elapsed"] == "00:00:00"
+
+
+def test_runs_are_listed_and_queried_separately(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        for run_id, status in (("run-1", "FAIL"), ("run-2", "PASS")):
+            _insert_event(conn, run_id=run_id, event_type="start_suite", longname="Root", starttime="2025-01-01T10:00:00+00:00", totaltests=1)
+            _insert_event(conn, run_id=run_id, event_type="start_test", suite="Root")
+            _insert_event(conn, run_id=run_id, event_type="end_test", suite="Root", status=status)
+            _insert_event(conn, run_id=run_id, event_type="end_suite", longname="Root", endtime="2025-01-01T10:00:05+00:00")
+        _insert_app_log(conn, run_id="run-2", message="during run 2")
+    rebuild_run_counters(f"sqlite:///{db_path}")
+
+    runs = reader.get_runs()
+    assert [(r["run_id"], r["counts"]["FAIL"]) for r in runs] == [("run-1", 1), ("run-2", 0)]
+
+    assert {e["run_id"] for e in reader.get_events(run_id="run-1")} == {"run-1"}
+    assert [log["message"] for log in reader.get_app_logs(run_id="run-2")] == ["during run 2"]
+    assert reader.get_app_logs(run_id="run-1") == []
+
+    # Without a run_id the summary describes the latest run only
+    latest = reader.get_summary()
+    assert latest["run_id"] == "run-2"
+    assert latest["counts"] == {"PASS": 1, "FAIL": 0, "SKIP": 0}
+    assert latest["finished"] is True
+    assert len(reader.get_summary(run_id="run-1")["failures"]) == 1
+
+
+def test_events_keyset_pages_and_filters(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        for i in range(5):
+            _insert_event(conn, event_type="end_test", suite="Root.A" if i % 2 else "Root.B",
+                          status="PASS", starttime=f"2025-01-01T10:00:0{i}+00:00", tags='["smoke", "db_1"]' if i == 4 else '[]')
+
+    page = reader.get_events(limit=2)
+    assert len(page) == 2
+    rest = reader.get_events(since_id=page[-1]["id"], limit=10)
+    assert len(rest) == 3 and rest[0]["id"] > page[-1]["id"]
+
+    assert {e["suite"] for e in reader.get_events(suite="Root.A")} == {"Root.A"}
+    assert len(reader.get_events(tag="db_1")) == 1
+    assert reader.get_events(tag="db%") == []  # LIKE wildcards in a tag are matched literally
+    in_range = reader.get_events(start="2025-01-01T10:00:01", end="2025-01-01T10:00:03")
+    assert [e["starttime"][:19] for e in in_range] == ["2025-01-01T10:00:01", "2025-01-01T10:00:02"]
+
+
+def test_app_logs_filters(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:00", level="INFO", source="web", message="a")
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:01", level="ERROR", source="web", message="b")
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:02", level="ERROR", source="db", message="c")
+
+    assert [log["message"] for log in reader.get_app_logs(level="ERROR", source="web")] == ["b"]
+    assert [log["message"] for log in reader.get_app_logs(start="2025-01-01T10:00:01", limit=1)] == ["b"]
+
+
+async def test_async_sqlite_reader_matches_sync_reader(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="start_suite", longname="Root", run_id="r1",
+                      starttime="2025-01-01T10:00:00+00:00", totaltests=2)
+        _insert_event(conn, event_type="end_test", name="A", status="PASS", suite="Root", run_id="r1")
+        _insert_event(conn, event_type="end_test", name="B", status="FAIL", suite="Root", run_id="r1", message="boom")
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:00+00:00", message="hello", run_id="r1")
+    rebuild_run_counters(f"sqlite:///{db_path}")
+
+    async_reader = AsyncSqliteReader(database_url=f"sqlite:///{db_path}", pool_size=2)
+    await async_reader.open()
+    try:
+        assert await async_reader.get_events() == reader.get_events()
+        assert await async_reader.get_events(status="FAIL", limit=1) == reader.get_events(status="FAIL", limit=1)
+        assert await async_reader.get_app_logs(run_id="r1") == reader.get_app_logs(run_id="r1")
+        assert await async_reader.get_runs() == reader.get_runs()
+        summary = await async_reader.get_summary()
+        expected = reader.get_summary()
+        summary.pop("elapsed"), expected.pop("elapsed")
+        assert summary == expected
+
+        # Concurrent queries share the pool
+        results = await asyncio.gather(*(async_reader.get_events() for _ in range(5)))
+        assert all(len(rows) == 3 for rows in results)
+    finally:
+        await async_reader.close()
+
+
+async def test_async_sqlite_reader_is_read_only_but_can_clear(db_path):
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="start_suite", longname="Root", run_id="r1")
+
+    async_reader = AsyncSqliteReader(database_url=f"sqlite:///{db_path}", pool_size=1)
+    try:
+        # Opened lazily on first use
+        async with async_reader._connection() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                await conn.execute("DELETE FROM events")
+        await async_reader.clear_events()
+        assert await async_reader.get_events() == []
+    finally:
+        await async_reader.close()
+
+
+def test_number_placeholders():
+    assert number_placeholders("SELECT * FROM events WHERE run_id = ? AND id > ? LIMIT 5") == (
+        "SELECT * FROM events WHERE run_id = $1 AND id > $2 LIMIT 5"
+    )
+    assert number_placeholders("SELECT 1") == "SELECT 1"
+
+
+def test_results_are_cached_until_rows_change(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="start_suite", longname="Root", run_id="r1")
+
+    executed = []
+    fetch = reader._fetch_all_as_dicts
+    reader._fetch_all_as_dicts = lambda query, params=(): executed.append(query) or fetch(query, params)
+
+    first = reader.get_events()
+    executed.clear()
+    assert reader.get_events() == first
+    assert executed == [queries.SELECT_CHANGE_TOKEN]  # only the change token was read
+
+    with sqlite3.connect(db_path) as conn:
+        _insert_event(conn, event_type="start_test", run_id="r1")
+    assert len(reader.get_events()) == 2
+    assert reader.cache_stats()["invalidations"] == 1
+
+    reader.clear_events()
+    assert reader.get_events() == []
+
+
+def _insert_rf_log(conn, **data):
+    values = [data.get(name) for name, _ in sql_definitions.rf_log_columns]
+    conn.execute(sql_definitions.INSERT_RF_LOG_MESSAGE, values)
+
+
+def test_rf_logs_of_one_test_are_paged_and_filtered(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        for run_id in ("r1", "r2"):
+            for i, level in enumerate(("INFO", "INFO", "FAIL")):
+                _insert_rf_log(conn, testid="s1-t1", run_id=run_id, level=level,
+                               timestamp=f"2025-01-01T10:00:0{i}", message=f"{run_id} message {i}")
+        _insert_rf_log(conn, testid="s1-t2", run_id="r1", level="INFO", message="other test")
+
+    logs = reader.get_rf_logs(testid="s1-t1", run_id="r1")
+    assert [log["message"] for log in logs] == ["r1 message 0", "r1 message 1", "r1 message 2"]
+    page = reader.get_rf_logs(testid="s1-t1", run_id="r1", since_id=logs[0]["id"], limit=1)
+    assert [log["message"] for log in page] == ["r1 message 1"]
+    assert [log["message"] for log in reader.get_rf_logs(testid="s1-t1", level="FAIL")] == ["r1 message 2", "r2 message 2"]
+    assert len(reader.get_rf_logs()) == 7
+
+    # A test's messages are found through the testid index, also within a run
+    with sqlite3.connect(db_path) as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + queries.select_rf_logs("?", run_id="r1", limit=10, testid="s1-t1")[0],
+                            ("s1-t1", "r1")).fetchall()
+    assert "idx_rf_log_messages_testid" in " ".join(row[-1] for row in plan)
+
+
+def test_fts5_query_quotes_terms_and_phrases():
+    assert queries.fts5_query('connection refused') == '"connection" "refused"'
+    assert queries.fts5_query('"connection refused" OR -x') == '"connection refused" "OR" "-x"'
+    assert queries.fts5_query('say "hi') == '"say" """hi"'
+    assert queries.fts5_query('   ') == ""
+
+
+def test_search_logs_ranks_and_filters(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        _insert_rf_log(conn, testid="T1", level="INFO", timestamp="2025-01-01T10:00:00", message="Opening browser")
+        _insert_rf_log(conn, testid="T1", level="FAIL", timestamp="2025-01-01T10:00:01",
+                       message="Connection refused: connection refused by host")
+        _insert_rf_log(conn, testid="T2", level="FAIL", timestamp="2025-01-01T10:00:02",
+                       message="Error: connection was refused after a long wait for the remote server")
+        _insert_app_log(conn, timestamp="2025-01-01T10:00:03", source="api", level="ERROR", message="connection refused")
+
+    hits = reader.search_logs("rf_log", "connection refused")
+    assert [h["testid"] for h in hits] == ["T1", "T2"]  # more matches in a shorter message rank higher
+    assert hits[0]["score"] > hits[1]["score"]
+
+    assert [h["testid"] for h in reader.search_logs("rf_log", '"connection refused"')] == ["T1"]
+    assert [h["testid"] for h in reader.search_logs("rf_log", "refused", testid="T2")] == ["T2"]
+    assert reader.search_logs("rf_log", "refused", start="2025-01-01T10:00:02", end="2025-01-01T10:00:03")[0]["testid"] == "T2"
+    assert [h["id"] for h in reader.search_logs("rf_log", "refused", limit=1, offset=1)] == [hits[1]["id"]]
+    assert [h["source"] for h in reader.search_logs("applog", "refused", level="ERROR")] == ["api"]
+    assert reader.search_logs("rf_log", "!!!") == []
+    assert reader.search_logs("rf_log", "   ") == []
+    assert reader.search_logs("applog", '""') == []
+
+    with pytest.raises(ValueError):
+        reader.search_logs("rf_log", "refused", source="api")
+
+
+def test_search_index_follows_deletes_and_existing_rows(tmp_path):
+    path = str(tmp_path / "old.db")
+    # A database from before the search migration: rows exist before the FTS table
+    with sqlite3.connect(path) as conn:
+        conn.execute(sql_definitions.CREATE_RF_LOG_MESSAGE_TABLE)
+        _insert_rf_log(conn, testid="old", message="connection refused")
+    ensure_schema(f"sqlite:///{path}")
+    reader = SqliteReader(database_url=f"sqlite:///{path}", cache_size=0)
+    assert [h["testid"] for h in reader.search_logs("rf_log", "refused")] == ["old"]
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM rf_log_messages")
+    assert reader.search_logs("rf_log", "refused") == []
+
+
+def _insert_metric(conn, **data):
+    values = [data.get(name) for name, _ in sql_definitions.metric_columns]
+    conn.execute(sql_definitions.INSERT_METRIC, values)
+
+
+def _bounds(first=None, last=None, first_1m=None, first_1h=None):
+    return {"first_raw": first, "last_raw": last, "first_1m": first_1m, "last_1m": first_1m,
+            "first_1h": first_1h, "last_1h": first_1h}
+
+
+def test_metric_buckets_cap_the_number_of_points():
+    assert metric_buckets(_bounds(), 60, 10) == (0, 60)
+    origin, width = metric_buckets(_bounds("2025-01-01T10:00:30+00:00", "2025-01-01T10:09:59+00:00"), 60, 10)
+    assert (origin % 60, width) == (0, 60)
+    # Four hours of samples in at most 100 buckets: 60s buckets grow to a multiple of 60
+    assert metric_buckets(_bounds("2025-01-01T10:00:30", "2025-01-01T14:00:30"), 60, 100)[1] == 180
+    assert metric_buckets(_bounds("2025-01-01T10:00:00Z", "2025-01-01T11:00:00Z"), 1, 1)[1] == 3601
+
+
+def test_metric_buckets_follow_the_rollup_resolution():
+    raw = ("2025-01-02T10:00:00+00:00", "2025-01-02T10:00:30+00:00")
+    assert metric_buckets(_bounds(*raw), 10, 500)[1] == 10
+    # Minute rollups exist: buckets are whole minutes, aligned to minutes
+    origin, width = metric_buckets(_bounds(*raw, first_1m="2025-01-01T10:05:00+00:00",
+                                           first_1h="2025-01-01T10:00:00+00:00"), 10, 5000)
+    assert (origin % 60, width) == (0, 60)
+    # The oldest minute rollups were deleted: only the hourly ones cover that period
+    origin, width = metric_buckets(_bounds(*raw, first_1m="2025-01-02T08:00:00+00:00",
+                                           first_1h="2025-01-01T10:00:00+00:00"), 10, 5000)
+    assert (origin % 3600, width) == (0, 3600)
+
+
+def test_metrics_are_aggregated_per_bucket(db_path, reader):
+    with sqlite3.connect(db_path) as conn:
+        for second, value in ((0, 10.0), (20, 30.0), (40, 20.0), (60, 50.0), (130, 5.0)):
+            _insert_metric(conn, timestamp=f"2025-01-01T10:{second // 60:02d}:{second % 60:02d}+00:00",
+                           metric_name="cpu_percent", value=value, unit="%", source="host1", run_id="r1")
+        _insert_metric(conn, timestamp="2025-01-01T10:00:10+00:00", metric_name="memory_percent",
+                       value=70.0, unit="%", source="host1", run_id="r1")
+
+    metrics = reader.get_metrics(bucket_seconds=60)
+    assert metrics["bucket_seconds"] == 60
+    assert metrics["columns"] == ["time", "min", "avg", "max", "last", "samples"]
+    cpu, memory = metrics["series"]
+    assert (cpu["metric_name"], cpu["source"], cpu["unit"]) == ("cpu_percent", "host1", "%")
+    assert cpu["points"] == [
+        ["2025-01-01T10:00:00+00:00", 10.0, 20.0, 30.0, 20.0, 3],
+        ["2025-01-01T10:01:00+00:00", 50.0, 50.0, 50.0, 50.0, 1],
+        ["2025-01-01T10:02:00+00:00", 5.0, 5.0, 5.0, 5.0, 1],
+    ]
+    assert memory["points"] == [["2025-01-01T10:00:00+00:00", 70.0, 70.0, 70.0, 70.0, 1]]
+
+    # Three minutes of samples in two points: the buckets widen to two minutes
+    capped = reader.get_metrics(bucket_seconds=60, max_points=2, metric_name="cpu_percent")
+    assert capped["bucket_seconds"] == 120
+    assert [point[5] for point in capped["series"][0]["points"]] == [4, 1]
+
+    assert reader.get_metrics(start="2025-01-01T10:01:00+00:00", metric_name="cpu_percent")["series"][0]["points"][0][0] == (
+        "2025-01-01T10:01:00+00:00"
+    )
+    assert reader.get_metrics(run_id="other")["series"] == []
@@ -5,3 +5,17 @@ def test_realtime_results_init():
     r = listener.RealTimeResults()
     assert hasattr(r, 'logger')
     assert hasattr(r, 'ROBOT_LISTENER_API_VERSION')
+
+
+def test_every_event_carries_the_run_id():
+    r = listener.RealTimeResults("totaltests=2;run_id=build-42")
+    sent = []
+    r.sink = type("RecordingSink", (), {"handle_event": lambda self, event: sent.append(event)})()
+
+    r._send_event("start_suite", name="Suite")
+    r._send_event("log_message", message="hi")
+    assert [e["run_id"] for e in sent] == ["build-42", "build-42"]
+
+
+def test_run_id_is_generated_when_not_given():
+    assert listener.RealTimeResults().run_id != listener.RealTimeResults().run_id
@@ -1,11 +1,17 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import sys
+import os
+import json
+import subprocess
+import tempfile
 from pathlib import Path
 
 # Zorg dat je dit pad correct hebt
 import shared.helpers.cli as cli
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
 
 class TestCliWrapper(unittest.TestCase):
 
@@ -95,6 +101,33 @@ class TestCliWrapper(unittest.TestCase):
             assert "uvicorn" in args_passed
             assert "api.viewer.main:app" in args_passed
 
+    @patch("shared.helpers.run_counters.rebuild_run_counters", return_value=2)
+    @patch("shared.helpers.ensure_db_schema.ensure_schema")
+    @patch("shared.helpers.cli.load_config", return_value={"database_url": "sqlite:///x.db"})
+    @patch("shared.helpers.cli.Path.exists", return_value=True)
+    @patch("shared.helpers.cli.logger")
+    def test_main_rebuild_counters(self, mock_logger, mock_exists, mock_config, mock_schema, mock_rebuild):
+        test_argv = ["cli.py", "--rebuild-counters"]
+        with patch.object(sys, "argv", test_argv):
+            with self.assertRaises(SystemExit):
+                cli.main()
+            mock_schema.assert_called_once_with("sqlite:///x.db")
+            mock_rebuild.assert_called_once_with("sqlite:///x.db")
+
+    def test_rebuild_counters_uses_the_database_from_config_flag(self):
+        # Runs in a fresh interpreter, in a directory without realtimeresults_config.json
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / "custom.json"
+            config.write_text(json.dumps({"listener_sink_type": "http", "database_url": "sqlite:///custom.db"}))
+            env = {k: v for k, v in os.environ.items() if k not in ("REALTIME_RESULTS_CONFIG", "DATABASE_URL")}
+            env["PYTHONPATH"] = str(REPO_ROOT)
+            result = subprocess.run(
+                [sys.executable, "-m", "shared.helpers.cli", "--config", str(config), "--rebuild-counters"],
+                cwd=tmp, env=env, capture_output=True, text=True,
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertTrue((Path(tmp) / "custom.db").exists())
+            self.assertFalse((Path(tmp) / "eventlog.db").exists())
 
     def test_is_port_used_false(self):
         command = [sys.executable, "--host", "127.0.0.1", "--port", "9999"]
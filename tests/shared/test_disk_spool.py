@@ -0,0 +1,55 @@
+from shared.sinks.spool import DiskSpool
+
+
+def _events(start, stop):
+    return [{"event_type": "log_message", "message": str(i)} for i in range(start, stop)]
+
+
+def test_replay_delivers_in_order_and_empties_spool(tmp_path):
+    spool = DiskSpool(tmp_path, segment_bytes=200)
+    spool.append(_events(0, 10))
+    assert spool.pending()
+    assert len(list(tmp_path.glob("spool-*.ndjson"))) > 1  # rotated into several segments
+
+    delivered = []
+    assert spool.replay(lambda events: delivered.extend(events) or True, batch_size=3)
+
+    assert [e["message"] for e in delivered] == [str(i) for i in range(10)]
+    assert not spool.pending()
+    assert not list(tmp_path.glob("spool-*.ndjson"))
+
+
+def test_interrupted_replay_resumes_after_restart(tmp_path):
+    spool = DiskSpool(tmp_path)
+    spool.append(_events(0, 6))
+
+    delivered = []
+
+    def fail_after_first_batch(events):
+        if delivered:
+            return False
+        delivered.extend(events)
+        return True
+
+    assert not spool.replay(fail_after_first_batch, batch_size=2)
+    spool.close()
+
+    reopened = DiskSpool(tmp_path)
+    assert reopened.pending()
+    reopened.append(_events(6, 7))
+    assert reopened.replay(lambda events: delivered.extend(events) or True)
+
+    assert [e["message"] for e in delivered] == [str(i) for i in range(7)]
+
+
+def test_size_cap_discards_oldest_segment(tmp_path):
+    spool = DiskSpool(tmp_path, max_bytes=500, segment_bytes=200)
+    spool.append(_events(0, 30))
+
+    total = sum(p.stat().st_size for p in tmp_path.glob("spool-*.ndjson"))
+    assert total <= 500
+
+    delivered = []
+    spool.replay(lambda events: delivered.extend(events) or True)
+    assert delivered[-1]["message"] == "29"
+    assert delivered[0]["message"] != "0"
@@ -0,0 +1,62 @@
+import sqlite3
+
+import shared.helpers.ensure_db_schema as ensure_db_schema
+from shared.helpers.ensure_db_schema import ensure_schema
+from shared.helpers.migrations import LATEST_VERSION
+import shared.helpers.sql_definitions as sql_definitions
+
+
+def _versions(path):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+
+
+def _indexes(path, table):
+    with sqlite3.connect(path) as conn:
+        return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def test_new_database_is_migrated_to_latest_version(tmp_path):
+    path = str(tmp_path / "new.db")
+    ensure_schema(f"sqlite:///{path}")
+
+    assert _versions(path) == list(range(1, LATEST_VERSION + 1))
+    assert {"idx_events_testid", "idx_events_type_status", "idx_events_run"} <= _indexes(path, "events")
+    assert "idx_rf_log_messages_testid" in _indexes(path, "rf_log_messages")
+    assert "idx_metrics_name_timestamp" in _indexes(path, "metrics")
+
+
+def test_unversioned_database_gets_missing_columns_and_keeps_rows(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, event_type TEXT, testid TEXT, "
+                     "starttime TEXT, endtime TEXT, name TEXT, longname TEXT, suite TEXT, status TEXT, "
+                     "message TEXT, elapsed INTEGER, statistics TEXT, tags TEXT)")
+        conn.execute("INSERT INTO events (event_type) VALUES ('start_suite')")
+
+    ensure_schema(f"sqlite:///{path}")
+
+    with sqlite3.connect(path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(events)")]
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 1
+    assert [name for name, _ in sql_definitions.event_columns if name not in columns] == []
+    assert _versions(path)[-1] == LATEST_VERSION
+
+
+def test_current_database_runs_no_ddl(tmp_path, monkeypatch):
+    path = str(tmp_path / "current.db")
+    ensure_schema(f"sqlite:///{path}")
+
+    statements = []
+    real_connect = sqlite3.connect
+
+    def tracing_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(ensure_db_schema.sqlite3, "connect", tracing_connect)
+    ensure_schema(f"sqlite:///{path}")
+
+    assert statements
+    assert all(s.lstrip().upper().startswith("SELECT") for s in statements)
@@ -0,0 +1,143 @@
+import threading
+
+import requests
+
+from shared.sinks import http
+from shared.sinks.http import HttpSink, AsyncHttpSink
+from shared.sinks.spool import DiskSpool
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or {}
+
+
+class FakePost:
+    def __init__(self):
+        self.calls = []
+        self.posted = threading.Event()
+        self.down = False
+
+    def __call__(self, url, json=None, timeout=None):
+        if self.down:
+            raise requests.ConnectionError("ingest down")
+        self.calls.append((url, json))
+        self.posted.set()
+        return FakeResponse()
+
+
+def test_http_sink_posts_single_events_by_default(monkeypatch):
+    fake_post = FakePost()
+    monkeypatch.setattr(http.requests.Session, "post", fake_post)
+
+    sink = HttpSink(endpoint="http://ingest")
+    sink.handle_event({"event_type": "start_test"})
+    sink.handle_event({"event_type": "log_message"})
+
+    assert [url for url, _ in fake_post.calls] == ["http://ingest/event", "http://ingest/event/log_message"]
+
+
+def test_http_sink_batches_by_size(monkeypatch):
+    fake_post = FakePost()
+    monkeypatch.setattr(http.requests.Session, "post", fake_post)
+
+    sink = HttpSink(endpoint="http://ingest", batch_size=3, batch_linger=60)
+    for i in range(7):
+        sink.handle_event({"event_type": "log_message", "message": str(i)})
+    sink.close()
+
+    # A batch holding a single event goes to that event's own route
+    assert [url for url, _ in fake_post.calls] == ["http://ingest/batch", "http://ingest/batch", "http://ingest/event/log_message"]
+    assert [len(batch) for _, batch in fake_post.calls[:2]] == [3, 3]
+
+
+def test_http_sink_flushes_after_linger(monkeypatch):
+    fake_post = FakePost()
+    monkeypatch.setattr(http.requests.Session, "post", fake_post)
+
+    sink = HttpSink(endpoint="http://ingest", batch_size=100, batch_linger=0.01)
+    sink.handle_event({"event_type": "end_test"})
+
+    assert fake_post.posted.wait(timeout=5)
+    assert fake_post.calls[0] == ("http://ingest/event", {"event_type": "end_test"})
+    sink.close()
+
+
+async def test_async_http_sink_reuses_one_client():
+    async with AsyncHttpSink(endpoint="http://ingest", pool_size=4) as sink:
+        client = sink.client
+        assert client is not None
+        assert await sink._get_client() is client
+    assert sink.client is None
+    assert client.is_closed
+
+
+def test_http_sink_spools_while_ingest_is_down(monkeypatch, tmp_path):
+    fake_post = FakePost()
+    monkeypatch.setattr(http.requests.Session, "post", fake_post)
+    monkeypatch.setattr(http.requests.Session, "get", lambda self, url, timeout=None: FakeResponse(200))
+
+    sink = HttpSink(endpoint="http://ingest", spool=DiskSpool(tmp_path), health_check_interval=3600)
+    fake_post.down = True
+    sink.handle_event({"event_type": "start_test", "name": "a"})
+    sink.handle_event({"event_type": "end_test", "name": "a"})  # spooled without another network attempt
+    assert sink.spool.pending()
+
+    fake_post.down = False
+    sink.close()  # ingest is back: the spool is replayed in bulk
+
+    assert fake_post.calls == [("http://ingest/batch", [
+        {"event_type": "start_test", "name": "a"},
+        {"event_type": "end_test", "name": "a"},
+    ])]
+    assert not sink.spool.pending()
+
+
+async def test_async_http_sink_streams_several_events_as_ndjson():
+    import httpx
+    received = []
+
+    async def handler(request):
+        received.append((request.url.path, (await request.aread()).decode().splitlines()))
+        return httpx.Response(200, json={"accepted": 2, "rejected": 0, "errors": []})
+
+    sink = AsyncHttpSink(endpoint="http://ingest")
+    sink.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    async with sink:
+        await sink.async_handle_events([{"event_type": "app_log", "message": "a"},
+                                        {"event_type": "app_log", "message": "b"}])
+
+    assert received[0][0] == "/stream"
+    assert len(received[0][1]) == 2
+
+
+def test_http_sink_backs_off_and_retries_on_429(monkeypatch):
+    responses = [FakeResponse(429, {"Retry-After": "2"}), FakeResponse(200)]
+    calls = []
+    sleeps = []
+
+    def fake_post(self, url, json=None, timeout=None):
+        calls.append(url)
+        return responses.pop(0)
+
+    monkeypatch.setattr(http.requests.Session, "post", fake_post)
+    monkeypatch.setattr(http.time, "sleep", sleeps.append)
+
+    sink = HttpSink(endpoint="http://ingest")
+    sink.handle_event({"event_type": "end_test"})
+
+    assert calls == ["http://ingest/event", "http://ingest/event"]
+    assert sleeps == [2.0]
+
+
+def test_http_sink_spools_on_503_when_spool_configured(monkeypatch, tmp_path):
+    monkeypatch.setattr(http.requests.Session, "post",
+                        lambda self, url, json=None, timeout=None: FakeResponse(503, {"Retry-After": "30"}))
+
+    sink = HttpSink(endpoint="http://ingest", spool=DiskSpool(tmp_path), health_check_interval=1)
+    sink.handle_event({"event_type": "end_test"})
+
+    assert sink.spool.pending()
+    assert sink._next_health_check - http.time.monotonic() > 20  # Retry-After wins over the shorter interval
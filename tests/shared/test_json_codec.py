@@ -0,0 +1,46 @@
+import builtins
+import importlib
+from decimal import Decimal
+
+import pytest
+
+import shared.helpers.json_codec as json_codec
+
+
+@pytest.fixture(params=["default", "stdlib"])
+def codec(request, monkeypatch):
+    if request.param == "default":
+        yield json_codec
+        return
+    real_import = builtins.__import__
+
+    def no_orjson(name, *args, **kwargs):
+        if name == "orjson":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_orjson)
+    fallback = importlib.reload(json_codec)
+    assert fallback.BACKEND == "json"
+    yield fallback
+    monkeypatch.undo()
+    importlib.reload(json_codec)
+
+
+def test_round_trip(codec):
+    value = {"event_type": "end_test", "tags": ["smoke", "ü"], "elapsed": 1.5, "id": 3, "ok": True, "none": None}
+    encoded = codec.dumps(value)
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == value
+    assert codec.loads(encoded.decode("utf-8")) == value
+
+
+def test_tuples_are_arrays_and_unknown_types_strings(codec):
+    assert codec.loads(codec.dumps({"rows": [(1, "a")], "n": Decimal("1.5")})) == {"rows": [[1, "a"]], "n": "1.5"}
+
+
+def test_invalid_json_raises_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads(b"{not json")
+    with pytest.raises(ValueError):
+        codec.loads(b"\xff\xfe")
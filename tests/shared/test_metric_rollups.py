@@ -0,0 +1,93 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from api.viewer.readers.sqlite_reader import SqliteReader
+from shared.helpers.ensure_db_schema import ensure_schema
+from shared.helpers.metric_rollups import compact_metrics
+import shared.helpers.sql_definitions as sql_definitions
+
+NOW = datetime(2025, 1, 10, 12, 30, tzinfo=timezone.utc)
+
+
+def _database(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    ensure_schema(f"sqlite:///{path}")
+    return path
+
+
+def _insert_samples(path, start, count, step_seconds=20, source="host1"):
+    with sqlite3.connect(path) as conn:
+        for i in range(count):
+            timestamp = (start + timedelta(seconds=i * step_seconds)).isoformat()
+            values = [timestamp, "cpu_percent", float(i % 7), "%", source, "r1"]
+            conn.execute(sql_definitions.INSERT_METRIC, values)
+
+
+def _count(path, table):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_compaction_folds_old_samples_into_rollups(tmp_path):
+    path = _database(tmp_path)
+    # Two hours of samples (12:30-14:30) two days ago, and 30 minutes of recent ones
+    _insert_samples(path, NOW - timedelta(days=2), 360)
+    _insert_samples(path, NOW - timedelta(minutes=30), 90)
+
+    counts = compact_metrics(f"sqlite:///{path}", raw_retention_hours=24, minute_retention_days=7, now=NOW)
+
+    assert counts == {"metrics_1m": 120, "metrics_1h": 3, "raw_deleted": 360, "metrics_1m_deleted": 0}
+    assert _count(path, "metrics") == 90
+    with sqlite3.connect(path) as conn:
+        hour = conn.execute("SELECT timestamp, samples, total, min_value, max_value, last_value "
+                            "FROM metrics_1h ORDER BY timestamp").fetchone()
+        minute = conn.execute("SELECT timestamp, samples, total, min_value, max_value, last_value "
+                              "FROM metrics_1m ORDER BY timestamp").fetchone()
+    assert hour == ("2025-01-08T12:00:00+00:00", 90, float(sum(i % 7 for i in range(90))), 0.0, 6.0, float(89 % 7))
+    assert minute == ("2025-01-08T12:30:00+00:00", 3, 3.0, 0.0, 2.0, 2.0)
+
+    # Nothing left to fold; later the minute rollups expire and only the hourly ones remain
+    assert compact_metrics(f"sqlite:///{path}", now=NOW)["raw_deleted"] == 0
+    assert compact_metrics(f"sqlite:///{path}", now=NOW + timedelta(days=6))["metrics_1m_deleted"] == 120
+    assert _count(path, "metrics_1h") == 3 + 1  # the recent samples were folded as well
+
+
+def test_metrics_read_the_same_before_and_after_compaction(tmp_path):
+    path = _database(tmp_path)
+    _insert_samples(path, NOW - timedelta(days=2), 360)
+    _insert_samples(path, NOW - timedelta(days=2), 360, source="host2")
+    _insert_samples(path, NOW - timedelta(minutes=30), 90)
+    reader = SqliteReader(database_url=f"sqlite:///{path}", cache_size=0)
+
+    before_hourly = reader.get_metrics(bucket_seconds=3600, max_points=5000)
+    before_minutes = reader.get_metrics(bucket_seconds=60, max_points=5000, start="2025-01-08T00:00:00+00:00")
+    compact_metrics(f"sqlite:///{path}", now=NOW)
+
+    assert reader.get_metrics(bucket_seconds=3600, max_points=5000) == before_hourly
+    assert reader.get_metrics(bucket_seconds=60, max_points=5000, start="2025-01-08T00:00:00+00:00") == before_minutes
+    # Finer buckets than the rollups allow are widened to whole minutes
+    assert reader.get_metrics(bucket_seconds=20, max_points=5000)["bucket_seconds"] == 60
+    # Once the minute rollups are gone, the old period is only available per hour
+    compact_metrics(f"sqlite:///{path}", now=NOW + timedelta(days=6))
+    assert reader.get_metrics(bucket_seconds=60, max_points=5000)["bucket_seconds"] == 3600
+
+
+def test_compaction_commits_one_transaction_per_hour_and_moves_the_change_token(tmp_path):
+    path = _database(tmp_path)
+    _insert_samples(path, NOW - timedelta(days=2), 360)
+    reader = SqliteReader(database_url=f"sqlite:///{path}", cache_size=0)
+    token = reader.get_change_token()
+
+    compact_metrics(f"sqlite:///{path}", now=NOW)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT bucket_end, rows_deleted FROM metric_compactions ORDER BY id").fetchall() == [
+            ("2025-01-08T13:00:00+00:00", 90),
+            ("2025-01-08T14:00:00+00:00", 180),
+            ("2025-01-08T15:00:00+00:00", 90),
+        ]
+    assert reader.get_change_token() != token
+
+    # Expiring the minute rollups only deletes rows, which the token has to show as well
+    token = reader.get_change_token()
+    compact_metrics(f"sqlite:///{path}", now=NOW + timedelta(days=6))
+    assert reader.get_change_token() != token
@@ -0,0 +1,124 @@
+import threading
+
+from shared.sinks.base import EventSink
+from shared.sinks.queued import QueuedSink
+
+
+class RecordingSink(EventSink):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.events = []
+        self.closed = False
+        self.gate = gate
+        self.started = threading.Event()
+
+    def _handle_event(self, data):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.events.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+def test_events_are_delivered_in_order_on_close():
+    inner = RecordingSink()
+    sink = QueuedSink(inner, max_size=100)
+    for i in range(50):
+        sink.handle_event({"event_type": "log_message", "message": str(i)})
+    sink.close()
+
+    assert [e["message"] for e in inner.events] == [str(i) for i in range(50)]
+    assert inner.closed
+
+
+def _fill_blocked_queue(policy, events):
+    """Queue events while the worker is stuck on the first one."""
+    gate = threading.Event()
+    inner = RecordingSink(gate=gate)
+    sink = QueuedSink(inner, max_size=2, overflow_policy=policy, lifecycle_wait=0.01)
+    sink.handle_event({"event_type": "start_test", "name": "in-flight"})
+    inner.started.wait(timeout=5)
+    for event in events:
+        sink.handle_event(event)
+    gate.set()
+    sink.close()
+    return inner, sink
+
+
+def test_drop_oldest_policy_drops_the_oldest_log_message():
+    events = [{"event_type": "log_message", "name": f"log {i}"} for i in range(4)]
+    inner, sink = _fill_blocked_queue("drop_oldest", events)
+
+    assert [e["name"] for e in inner.events] == ["in-flight", "log 2", "log 3"]
+    assert sink.dropped == 2
+
+
+def test_lifecycle_events_are_never_dropped():
+    events = [
+        {"event_type": "log_message", "name": "log"},
+        {"event_type": "end_test", "name": "a"},
+        {"event_type": "end_test", "name": "b"},
+        {"event_type": "end_suite", "name": "suite"},
+        {"event_type": "metric", "name": "late metric"},
+    ]
+    inner, sink = _fill_blocked_queue("drop_oldest", events)
+
+    # The log goes first; once only end events are queued they wait briefly and then exceed max_size
+    assert [e["name"] for e in inner.events] == ["in-flight", "a", "b", "suite"]
+    assert sink.dropped == 2
+
+
+def test_drop_log_message_policy_keeps_test_events():
+    events = [
+        {"event_type": "log_message", "name": "log"},
+        {"event_type": "end_test", "name": "a"},
+        {"event_type": "end_test", "name": "b"},
+        {"event_type": "log_message", "name": "late log"},
+    ]
+    inner, sink = _fill_blocked_queue("drop_log_message", events)
+
+    assert [e["name"] for e in inner.events] == ["in-flight", "a", "b"]
+    assert sink.dropped == 2
+
+
+def test_block_policy_loses_nothing():
+    events = [{"event_type": "log_message", "name": str(i)} for i in range(5)]
+    gate = threading.Event()
+    inner = RecordingSink(gate=gate)
+    sink = QueuedSink(inner, max_size=2, overflow_policy="block")
+
+    producer = threading.Thread(target=lambda: [sink.handle_event(e) for e in events])
+    producer.start()
+    gate.set()
+    producer.join(timeout=5)
+    sink.close()
+
+    assert [e["name"] for e in inner.events] == [str(i) for i in range(5)]
+    assert sink.dropped == 0
+
+
+def test_invalid_policy_is_rejected():
+    try:
+        QueuedSink(RecordingSink(), overflow_policy="drop_everything")
+    except ValueError as e:
+        assert "drop_everything" in str(e)
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_close_does_not_close_the_sink_under_a_busy_worker():
+    gate = threading.Event()
+    inner = RecordingSink(gate=gate)
+    sink = QueuedSink(inner, flush_timeout=0.05)
+    sink.handle_event({"event_type": "start_test", "name": "slow"})
+    inner.started.wait(timeout=5)
+
+    sink.close()
+    assert not inner.closed  # the worker is still inside handle_event
+
+    gate.set()
+    sink._worker.join(timeout=5)
+    assert [e["name"] for e in inner.events] == ["slow"]
+    assert inner.closed  # closed by the worker once it was done
@@ -0,0 +1,67 @@
+import logging
+import sqlite3
+
+from shared.sinks.sqlite import SqliteSink
+
+
+def _count(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_events_are_group_committed_on_end_suite(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    sink = SqliteSink(database_url=f"sqlite:///{db_path}", batch_size=1000, flush_interval=60)
+
+    sink.handle_event({"event_type": "start_test", "testid": "t1", "tags": ["smoke"]})
+    sink.handle_event({"event_type": "log_message", "testid": "t1", "message": "hello"})
+    sink.handle_event({"event_type": "end_test", "testid": "t1", "status": "PASS", "tags": []})
+    assert _count(db_path, "events") == 0  # still buffered
+
+    sink.handle_event({"event_type": "end_suite", "name": "Suite"})
+    assert _count(db_path, "events") == 3
+    assert _count(db_path, "rf_log_messages") == 1
+    sink.close()
+
+
+def test_connection_uses_wal_and_close_commits(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    sink = SqliteSink(database_url=f"sqlite:///{db_path}", batch_size=1000, flush_interval=60)
+    assert sink.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    sink.handle_event({"event_type": "log_message", "testid": "t1", "message": "last words"})
+    sink.close()
+    assert _count(db_path, "rf_log_messages") == 1
+
+
+def test_run_counters_are_committed_with_the_events(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    sink = SqliteSink(database_url=f"sqlite:///{db_path}", batch_size=1000, flush_interval=60)
+
+    sink.handle_event({"event_type": "start_test", "testid": "t1", "suite": "Suite"})
+    sink.handle_event({"event_type": "end_test", "testid": "t1", "suite": "Suite", "status": "FAIL"})
+    sink.handle_event({"event_type": "start_test", "testid": "t2", "suite": "Suite"})
+    sink.handle_event({"event_type": "end_suite", "longname": "Suite", "endtime": "2025-01-01T10:00:00"})
+    sink.close()
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT suite, passed, failed, skipped, running, last_endtime FROM run_counters").fetchall()
+    assert rows == [("Suite", 0, 1, 0, 1, "2025-01-01T10:00:00")]
+
+
+def test_a_bad_row_only_loses_itself(tmp_path, caplog):
+    db_path = str(tmp_path / "events.db")
+    sink = SqliteSink(database_url=f"sqlite:///{db_path}", batch_size=1000, flush_interval=60)
+
+    sink.handle_event({"event_type": "start_test", "testid": "t1", "suite": "Suite"})
+    sink.handle_event({"event_type": "log_message", "testid": "t1", "message": {"not": "bindable"}})
+    sink.handle_event({"event_type": "log_message", "testid": "t1", "message": "fine"})
+    with caplog.at_level(logging.INFO):
+        sink.handle_event({"event_type": "end_suite", "longname": "Suite"})
+    sink.close()
+
+    assert _count(db_path, "events") == 2
+    assert _count(db_path, "rf_log_messages") == 1
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT running FROM run_counters").fetchall() == [(1,)]
+    assert len([r for r in caplog.records if r.levelno >= logging.WARNING]) == 1